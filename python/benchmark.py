@@ -0,0 +1,979 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 性能测试
+测量 截图 -> 通道交换 -> QImage -> 缩放 -> 位图上传 各阶段的耗时，
+以及不同区域尺寸和悬浮窗数量下的吞吐量和内存占用。
+默认使用合成捕获后端和 offscreen Qt 平台，可在没有桌面的 Linux CI 上运行；
+结果可保存为 JSON 基线，并在之后的运行中检查性能回退
+
+用法示例:
+    python benchmark.py --save baseline.json
+    python benchmark.py --baseline baseline.json --threshold 0.2
+    python benchmark.py --backend mss --sizes 256x256 1920x1080
+    python benchmark.py --processes 0 1 2 4 --scaling-windows 12
+    python benchmark.py --selector-widths 1920 11520
+    python benchmark.py --hotkey-runs 50
+    python benchmark.py --span-size 1280x720
+    python benchmark.py --history-seconds 60 --change-rate 0.5
+    python benchmark.py --watch-regions 50
+    python benchmark.py --stream-clients 8
+    python benchmark.py --startup-regions 10 --startup-budget-ms 1500
+    python benchmark.py --track-regions 16
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+
+# 没有指定 Qt 平台时使用 offscreen，无需显示器
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+
+# 默认的区域尺寸和悬浮窗数量
+DEFAULT_SIZES = ["256x256", "1920x1080", "3840x2160"]
+DEFAULT_WINDOWS = [1, 4, 16]
+
+# 各阶段名称
+STAGES = ["grab", "swizzle", "qimage", "scale", "upload"]
+
+
+def parse_size(text):
+    """解析 "宽x高" 格式的尺寸"""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def get_rss_bytes():
+    """获取当前进程的常驻内存（字节），无法获取时返回 None"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def summarize(samples):
+    """计算耗时样本（秒）的统计值（毫秒）"""
+    values = np.asarray(samples) * 1000.0
+    return {
+        "mean_ms": float(values.mean()),
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "max_ms": float(values.max())
+    }
+
+
+def backend_options(name, width, height, count, change_rate):
+    """make_backend 创建后端时使用的参数，供工作进程创建相同的后端"""
+    if name == "synthetic":
+        return {"width": width, "height": height, "monitor_count": count, "change_rate": change_rate}
+    return {}
+
+
+def make_backend(name, width, height, count, change_rate):
+    """创建用于测试的捕获后端
+
+    合成后端为每个悬浮窗提供一个独立的虚拟显示器，保证每个区域都需要单独截图
+    """
+    from capture_backends import create_backend
+    return create_backend(name, **backend_options(name, width, height, count, change_rate))
+
+
+def place_regions(backend, width, height, count):
+    """在后端的显示器上放置 count 个区域，放不下时返回 None"""
+    monitors = backend.monitors()
+    regions = []
+    for index in range(count):
+        monitor = monitors[index % len(monitors)]
+        if width > monitor["width"] or height > monitor["height"]:
+            return None
+        regions.append({"x": monitor["left"], "y": monitor["top"], "width": width, "height": height})
+    return regions
+
+
+def bench_stages(backend, region, dpr, frames):
+    """逐阶段测量单个区域的处理耗时
+
+    Args:
+        backend: 捕获后端
+        region: 区域信息（物理像素）
+        dpr: 设备像素比，逻辑尺寸 = 物理尺寸 / dpr
+        frames: 测量帧数
+
+    Returns:
+        dict: 阶段名称 -> 耗时统计
+    """
+    from PySide6.QtCore import Qt
+    from PySide6.QtGui import QPixmap
+    from render_manager import RenderMgr, bgra_to_rgb
+
+    render_mgr = RenderMgr()
+    rgb_mgr = RenderMgr()
+    logical_width = max(1, int(region["width"] / dpr))
+    logical_height = max(1, int(region["height"] / dpr))
+    samples = {stage: [] for stage in STAGES}
+
+    for _ in range(frames):
+        start = time.perf_counter()
+        frame = backend.grab_raw(region)
+        samples["grab"].append(time.perf_counter() - start)
+
+        # RGB 回退路径（通道交换 + 复制），作为零拷贝路径的对照
+        start = time.perf_counter()
+        rgb_mgr.convert_to_qimage(bgra_to_rgb(frame))
+        samples["swizzle"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        q_image = render_mgr.convert_to_qimage(frame)
+        samples["qimage"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        scaled = q_image.scaled(logical_width, logical_height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        samples["scale"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        QPixmap.fromImage(scaled)
+        samples["upload"].append(time.perf_counter() - start)
+
+    return {stage: summarize(values) for stage, values in samples.items()}
+
+
+def bench_pipeline(app, backend, regions, dpr, duration, broker=None):
+    """通过 FloatingWindow 测量完整管线的吞吐量
+
+    所有悬浮窗注册到同一个捕获调度器，循环调用 tick（同步模式），
+    每次 tick 后处理 Qt 事件使重绘生效
+
+    Args:
+        broker: 捕获调度器，默认为单线程的 CaptureBroker，
+            也可以传入 ProcessCaptureEngine 测量多进程捕获
+
+    Returns:
+        dict: 吞吐量、单次 tick 耗时和内存统计
+    """
+    from capture_broker import CaptureBroker
+    from floating_window import FloatingWindow
+
+    rss_before = get_rss_bytes()
+    if broker is None:
+        broker = CaptureBroker(backend)
+    windows = []
+    for region in regions:
+        logical_rect = {
+            "x": 0,
+            "y": 0,
+            "width": max(1, int(region["width"] / dpr)),
+            "height": max(1, int(region["height"] / dpr))
+        }
+        window = FloatingWindow(backend, region, logical_rect, broker)
+        window.show()
+        windows.append(window)
+
+    # 预热：第一帧会分配缓冲区
+    broker.tick()
+    app.processEvents()
+
+    tick_samples = []
+    changed = 0
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        results = broker.tick()
+        app.processEvents()
+        tick_samples.append(time.perf_counter() - start)
+        changed += sum(1 for result_changed, _ in results.values() if result_changed)
+
+    rss_after = get_rss_bytes()
+    for window in windows:
+        window.close()
+    app.processEvents()
+
+    elapsed = sum(tick_samples)
+    frame_bytes = sum(region["width"] * region["height"] * 4 for region in regions)
+    result = {
+        "windows": len(regions),
+        "ticks": len(tick_samples),
+        "ticks_per_s": len(tick_samples) / elapsed,
+        "frames_per_s": len(tick_samples) * len(regions) / elapsed,
+        "changed_frames_per_s": changed / elapsed,
+        "mb_per_s": len(tick_samples) * frame_bytes / elapsed / 1e6,
+        "tick": summarize(tick_samples),
+        "rss_mb": rss_after / 1e6 if rss_after is not None else None,
+        "rss_delta_mb": (rss_after - rss_before) / 1e6 if rss_after is not None else None
+    }
+    return result
+
+
+def bench_scaling(app, args):
+    """测量多进程捕获引擎随工作进程数量的扩展曲线
+
+    0 个进程表示当前的单线程路径（CaptureBroker），其余为 ProcessCaptureEngine
+
+    Returns:
+        dict: 进程数 -> 管线统计（附加相对单线程路径的加速比）
+    """
+    from capture_pool import ProcessCaptureEngine
+
+    width, height = parse_size(args.scaling_size)
+    count = args.scaling_windows
+    options = backend_options(args.backend, width, height, count, args.change_rate)
+    results = {}
+    for processes in args.processes:
+        backend = make_backend(args.backend, width, height, count, args.change_rate)
+        regions = place_regions(backend, width, height, count)
+        if regions is None:
+            print(f"跳过扩展测试：{args.scaling_size} x {count} 超出显示器范围")
+            backend.close()
+            return results
+        engine = None
+        if processes > 0:
+            engine = ProcessCaptureEngine(args.backend, processes, options)
+        print(f"测量扩展曲线: {args.scaling_size} x {count}, {processes} 个工作进程")
+        try:
+            results[str(processes)] = bench_pipeline(app, backend, regions, args.dpr, args.duration, engine)
+        finally:
+            if engine is not None:
+                engine.close()
+            backend.close()
+
+    base = results.get("0") or next(iter(results.values()), None)
+    for stats in results.values():
+        stats["speedup"] = stats["frames_per_s"] / base["frames_per_s"] if base else None
+    return results
+
+
+def bench_selector(app, width, height, frozen, moves=200):
+    """测量屏幕选择器拖动选择时每次鼠标移动的重绘耗时
+
+    Args:
+        width: 虚拟桌面宽度（逻辑像素）
+        height: 虚拟桌面高度
+        frozen: 是否使用冻结画面（并显示放大镜）
+        moves: 鼠标移动次数
+
+    Returns:
+        dict: 每次移动耗时统计
+    """
+    from PySide6.QtCore import QEvent, QPointF, QRect, Qt
+    from PySide6.QtGui import QMouseEvent, QPixmap, QColor
+    from screen_selector import ScreenSelector
+
+    selector = ScreenSelector()
+    selector.setGeometry(QRect(0, 0, width, height))
+    if frozen:
+        pixmap = QPixmap(width, height)
+        pixmap.fill(QColor(40, 90, 160))
+        selector.set_frozen(pixmap)
+        selector.show_loupe = True
+    selector.show()
+    app.processEvents()
+
+    def mouse_event(event_type, x, y, button, buttons):
+        point = QPointF(x, y)
+        return QMouseEvent(event_type, point, point, button, buttons, Qt.NoModifier)
+
+    selector.mousePressEvent(mouse_event(QEvent.MouseButtonPress, 100, 100, Qt.LeftButton, Qt.LeftButton))
+    app.processEvents()
+    samples = []
+    for index in range(1, moves + 1):
+        start = time.perf_counter()
+        selector.mouseMoveEvent(mouse_event(QEvent.MouseMove, 100 + index * 4, 100 + index * 2,
+                                            Qt.NoButton, Qt.LeftButton))
+        app.processEvents()
+        samples.append(time.perf_counter() - start)
+    selector.reject()
+    selector.deleteLater()
+    app.processEvents()
+    return summarize(samples)
+
+
+def bench_span(width, height, duration, change_rate):
+    """比较跨显示器（混合 DPI）区域与单显示器区域的截图耗时
+
+    合成后端提供两个 3840x2160 的显示器：左侧 100% 缩放，右侧 200% 缩放。
+    同样逻辑尺寸的区域分别放在右侧显示器内和跨越两个显示器，输出帧的像素数相同
+
+    Args:
+        width: 区域逻辑宽度
+        height: 区域逻辑高度
+        duration: 每种区域的测量时间（秒）
+        change_rate: 合成后端的画面变化率
+
+    Returns:
+        dict: 每种区域的 tick 耗时统计
+    """
+    from capture_backends import create_backend
+    from capture_broker import CaptureBroker
+    from screen_map import ScreenMap
+
+    screen_map = ScreenMap([
+        {"x": 0, "y": 0, "width": 3840, "height": 2160, "dpr": 1.0},
+        {"x": 3840, "y": 0, "width": 1920, "height": 1080, "dpr": 2.0}
+    ])
+    rects = {
+        "单显示器": {"x": 3840 + (1920 - width) // 2, "y": 0, "width": width, "height": height},
+        "跨显示器": {"x": 3840 - width // 2, "y": 0, "width": width, "height": height}
+    }
+    results = {}
+    for key, rect in rects.items():
+        backend = create_backend("synthetic", width=3840, height=2160, monitor_count=2, change_rate=change_rate)
+        broker = CaptureBroker(backend)
+        broker.register(screen_map.map_rect(rect), lambda frame, timestamp: True)
+        samples = []
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            start = time.perf_counter()
+            broker.tick()
+            samples.append(time.perf_counter() - start)
+        backend.close()
+        results[key] = summarize(samples)
+    return results
+
+
+def bench_history(width, height, fps, seconds, change_rate, max_mb):
+    """测量回放缓存保存一段画面历史的内存占用，并与保存原始帧比较
+
+    按 fps 生成 seconds 秒的合成画面（时间戳按帧率模拟，不实际等待），
+    压缩线程积压超过 1 秒的帧时等待其追上，相当于实时运行时的稳定状态
+
+    Args:
+        width: 帧宽度
+        height: 帧高度
+        fps: 帧率
+        seconds: 历史时长（秒）
+        change_rate: 合成后端的画面变化率
+        max_mb: 回放缓存上限（MB）
+
+    Returns:
+        dict: 占用、每 MB 秒数、追加和重建耗时
+    """
+    from capture_backends import create_backend
+    from frame_diff import FrameChangeDetector
+    from history import FrameHistory
+
+    backend = create_backend("synthetic", width=width, height=height, change_rate=change_rate)
+    region = {"x": 0, "y": 0, "width": width, "height": height}
+    detector = FrameChangeDetector()
+    history = FrameHistory(max_mb)
+    frames = int(seconds * fps)
+    for index in range(frames):
+        frame = backend.grab_raw(region)
+        rects = detector.detect(frame)
+        # 未变化的帧不进入历史，回看时由上一帧代表
+        history.append(frame, rects, index / fps)
+        while history.pending.qsize() > fps:
+            time.sleep(0.01)
+    while history.pending.qsize() > 0:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    stats = history.get_stats()
+
+    timestamps = history.timestamps()
+    samples = []
+    for timestamp in timestamps[::max(1, len(timestamps) // 50)][::-1]:
+        history.cache = None
+        start = time.perf_counter()
+        history.frame_at(timestamp)
+        samples.append(time.perf_counter() - start)
+    history.close()
+    backend.close()
+
+    raw_bytes = frames * width * height * 4
+    return {
+        "frames": frames,
+        "stored_frames": stats["history_frames"],
+        "history_seconds": stats["history_seconds"],
+        "history_mb": stats["history_bytes"] / 1048576,
+        "raw_mb": raw_bytes / 1048576,
+        "ratio": stats["history_bytes"] / raw_bytes,
+        "seconds_per_mb": stats["history_seconds_per_mb"],
+        "raw_seconds_per_mb": 1048576 / (width * height * 4 * fps),
+        "append_ms": stats["history_append_ms"],
+        "compress_ms": history.compress_time * 1000.0 / max(stats["history_frames"], 1),
+        "rebuild": summarize(samples)
+    }
+
+
+def bench_hotkey(app, runs, prewarmed):
+    """测量从热键消息到屏幕选择器首次绘制完成的延迟（使用 fake 热键后端）
+
+    Args:
+        runs: 触发次数
+        prewarmed: 是否复用预先创建的选择器；否则每次按下热键时新建选择器
+
+    Returns:
+        dict: 延迟统计
+    """
+    from PySide6.QtCore import QTimer
+    from hotkeys import create_hotkey_backend, MOD_ALT, VK_X
+    from screen_selector import ScreenSelector
+
+    hotkeys = create_hotkey_backend("fake")
+    hotkeys.register(1, MOD_ALT, VK_X)
+    selectors = []
+    if prewarmed:
+        selectors.append(ScreenSelector())
+        selectors[0].winId()
+    samples = []
+
+    def on_hotkey(hotkey_id, timestamp):
+        if not prewarmed:
+            selectors[:] = [ScreenSelector()]
+        selector = selectors[0]
+
+        def on_painted(latency):
+            # 首次绘制后关闭选择器
+            samples.append(latency)
+            QTimer.singleShot(0, selector.reject)
+
+        selector.first_painted.connect(on_painted)
+        selector.select_region(timestamp)
+        selector.first_painted.disconnect(on_painted)
+        if not prewarmed:
+            selector.deleteLater()
+
+    hotkeys.activated.connect(on_hotkey)
+    for _ in range(runs):
+        hotkeys.trigger(1)
+        app.processEvents()
+    hotkeys.close()
+    for selector in selectors:
+        selector.deleteLater()
+    app.processEvents()
+    return summarize(samples)
+
+
+def bench_watch(app, count, fps, duration, change_rate, window_size=(640, 360), window_fps=60):
+    """比较监视多个小区域与显示一个悬浮窗的每秒开销
+
+    监视器和悬浮窗都不等待帧间隔，连续测量单次耗时，再按各自的帧率换算为每秒耗时
+
+    Args:
+        count: 监视区域数量（120x40，在 1920x1080 的显示器上按网格排列）
+        fps: 监视帧率
+        duration: 各自的测量时间（秒）
+        change_rate: 合成后端的画面变化率
+        window_size: 对照悬浮窗的区域尺寸
+        window_fps: 对照悬浮窗的帧率
+
+    Returns:
+        dict: 监视和悬浮窗的单次耗时统计及每秒耗时
+    """
+    from watch import RegionWatcher
+
+    backend = make_backend("synthetic", 1920, 1080, 1, change_rate)
+    watcher = RegionWatcher(backend, fps=fps)
+    columns = 1920 // 128
+    for index in range(count):
+        watcher.add({"x": (index % columns) * 128, "y": (index // columns) * 48 % 1040, "width": 120, "height": 40})
+    watcher.step()
+    samples = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        watcher.next_due = 0.0
+        start = time.perf_counter()
+        watcher.step()
+        samples.append(time.perf_counter() - start)
+    watcher.close()
+    backend.close()
+
+    width, height = window_size
+    backend = make_backend("synthetic", width, height, 1, change_rate)
+    window = bench_pipeline(app, backend, place_regions(backend, width, height, 1), 1.0, duration)
+    backend.close()
+
+    tick = summarize(samples)
+    return {
+        "regions": count,
+        "fps": fps,
+        "tick": tick,
+        "ms_per_s": tick["mean_ms"] * fps,
+        "window_size": f"{width}x{height}",
+        "window_fps": window_fps,
+        "window_tick": window["tick"],
+        "window_ms_per_s": window["tick"]["mean_ms"] * window_fps
+    }
+
+
+def bench_stream(clients, width, height, duration, change_rate, max_fps=15, slow_clients=1):
+    """测量串流服务把一个区域分发给多个本机 MJPEG 客户端时的编码开销和各客户端帧率
+
+    捕获端以 60 FPS 提交合成画面，其中 slow_clients 个客户端每读取一次等待 0.2 秒
+
+    Returns:
+        dict: 编码耗时、编码帧率、快/慢客户端的接收帧率和丢帧统计
+    """
+    import socket
+    import threading
+    from stream_server import StreamServer, BOUNDARY
+
+    backend = make_backend("synthetic", width, height, 1, change_rate)
+    region = place_regions(backend, width, height, 1)[0]
+    server = StreamServer(port=0, max_fps=max_fps)
+    server.start()
+    source = server.add_source("bench")
+    marker = f"--{BOUNDARY}".encode("latin-1")
+    received = [0] * clients
+    stop = threading.Event()
+
+    def read(index, delay):
+        connection = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        if delay:
+            # 较小的接收缓冲区，使服务端尽快感受到慢客户端
+            connection.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 16)
+        connection.connect(("127.0.0.1", server.port))
+        connection.sendall(b"GET /stream/bench HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        connection.settimeout(0.1)
+        tail = b""
+        while not stop.is_set():
+            try:
+                data = connection.recv(1 << 16)
+            except socket.timeout:
+                continue
+            if not data:
+                break
+            received[index] += (tail + data).count(marker)
+            tail = data[-len(marker):]
+            if delay:
+                time.sleep(delay)
+        connection.close()
+
+    readers = [threading.Thread(target=read, args=(index, 0.2 if index < slow_clients else 0.0), daemon=True)
+               for index in range(clients)]
+    for reader in readers:
+        reader.start()
+    while source.clients < clients:
+        time.sleep(0.01)
+
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        source.publish(backend.grab_raw(region), time.perf_counter())
+        time.sleep(1 / 60)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for reader in readers:
+        reader.join(1.0)
+    stats = source.get_stats()
+    server.stop()
+    backend.close()
+
+    fast = received[slow_clients:] or [0]
+    slow = received[:slow_clients] or [0]
+    encode = stats["stream_encode"]
+    return {
+        "clients": clients,
+        "size": f"{width}x{height}",
+        "max_fps": max_fps,
+        "encode": encode,
+        "encoded_per_s": stats["stream_encoded"] / elapsed,
+        "encode_ms_per_s": encode["mean_ms"] * stats["stream_encoded"] / elapsed,
+        "fast_fps": sum(fast) / len(fast) / elapsed,
+        "slow_fps": sum(slow) / len(slow) / elapsed,
+        "skipped": stats["stream_skipped"],
+        "dropped": stats["stream_dropped"]
+    }
+
+
+def bench_track(count, duration, change_rate, move_hz=30, size=(320, 180)):
+    """测量区域跟随目标窗口时每帧分摊的跟随开销
+
+    每个区域锚定到一个模拟窗口，所有窗口以 move_hz 的频率移动；
+    分别在有移动通知和只依靠轮询（0.1 秒）两种模式下运行调度器
+
+    Returns:
+        dict: 模式 -> 每帧跟随耗时、每帧截图耗时、查询次数和区域滞后于窗口的比例
+    """
+    from capture_broker import CaptureBroker
+    from scheduler import Scheduler
+    from stats import FrameStats
+    from window_tracker import FakeWindowTracker, WindowAnchors, make_anchor
+
+    width, height = size
+    results = {}
+    for mode, notifications in (("通知", True), ("轮询", False)):
+        backend = make_backend("synthetic", 1920, 1080, 1, change_rate)
+        broker = CaptureBroker(backend)
+        scheduler = Scheduler(broker, budget=1.0)
+        tracker = FakeWindowTracker(notifications=notifications)
+        scheduler.anchors = WindowAnchors(tracker, broker)
+        columns = 1920 // (width + 40)
+        windows = []
+        for index in range(count):
+            x, y = (index % columns) * (width + 40), (index // columns) * (height + 40) % 800
+            hwnd = tracker.add_window((x, y, width + 40, height + 40))
+            region = {"x": x + 20, "y": y + 20, "width": width, "height": height}
+            stats = FrameStats()
+            token = broker.register(region, lambda frame, timestamp: True, 60, 60, stats)
+            scheduler.anchors.add(token, make_anchor(tracker.find_window(x, y), region), region, stats)
+            windows.append((hwnd, token, stats))
+
+        lagging = samples = 0
+        next_move = start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            now = time.perf_counter()
+            if now >= next_move:
+                # 所有窗口左右来回移动
+                offset = int(40 * ((now - start) * move_hz % 2 > 1))
+                for hwnd, _, _ in windows:
+                    x, y, _, _ = tracker.fake_windows[hwnd]["rect"]
+                    tracker.move_window(hwnd, x - x % 40 + offset, y)
+                next_move += 1.0 / move_hz
+            delay = scheduler.step()
+            # 截图之后检查区域是否已跟上窗口
+            for hwnd, token, _ in windows:
+                samples += 1
+                lagging += broker.subscribers[token]["region"]["x"] != tracker.fake_windows[hwnd]["rect"][0] + 20
+            time.sleep(delay or 0)
+
+        track = [stats.histograms["track"].snapshot()["mean_ms"] for _, _, stats in windows]
+        capture = [stats.histograms["capture"].snapshot()["mean_ms"] for _, _, stats in windows]
+        tracker_stats = tracker.get_stats()
+        results[mode] = {
+            "regions": count,
+            "track_ms": sum(track) / count,
+            "capture_ms": sum(capture) / count,
+            "queries": tracker_stats["track_queries"],
+            "moves": tracker_stats["track_moves"],
+            "lag_ratio": lagging / samples if samples else 0.0
+        }
+        tracker.close()
+        backend.close()
+    return results
+
+
+def bench_startup(regions, budget_ms, runs=3, size=(320, 180)):
+    """测量恢复 regions 个悬浮窗的冷启动耗时
+
+    写入包含 regions 个会话窗口的临时配置文件（合成后端），以子进程运行
+    main.py --exit-after-startup，从进程启动计到所有恢复的悬浮窗显示第一帧
+
+    Returns:
+        dict: 各阶段耗时的中位数（导入、初始化、恢复会话、第一帧、进程总耗时），
+            以及预算和是否超出预算
+    """
+    import tempfile
+    import subprocess
+
+    width, height = size
+    windows = []
+    for index in range(regions):
+        x, y = (index % 5) * width, (index // 5) * height
+        region = {"x": x, "y": y, "width": width, "height": height}
+        windows.append({"region": region, "logical_rect": dict(region), "position": [x, y],
+                        "size": [width, height], "target_fps": 30, "min_fps": 5, "filters": []})
+    config = {"capture": {"method": "synthetic"}}
+    session = {"windows": windows, "scale_mode": "auto"}
+
+    main_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    samples = {key: [] for key in ("import_ms", "init_ms", "restore_ms", "first_frame_ms", "wall_ms")}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "config.json")
+        for _ in range(runs):
+            # 每次运行都从同一份配置和会话开始（退出时会重新保存会话）
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(config, f)
+            with open(os.path.join(directory, "session.json"), "w", encoding="utf-8") as f:
+                json.dump(session, f)
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, main_path, "--config", path, "--hotkeys", "fake",
+                                     "--exit-after-startup"], env=env, capture_output=True, text=True, timeout=60)
+            wall_ms = (time.perf_counter() - start) * 1000
+            lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+            if result.returncode != 0 or not lines:
+                raise RuntimeError(f"启动测试失败: {result.stderr.strip()[-500:]}")
+            startup = json.loads(lines[-1])
+            if startup["windows"] != regions or not startup["complete"]:
+                raise RuntimeError(f"只恢复了 {startup['windows']}/{regions} 个悬浮窗或第一帧超时")
+            for key in samples:
+                samples[key].append(wall_ms if key == "wall_ms" else startup[key])
+
+    result = {key: sorted(values)[len(values) // 2] for key, values in samples.items()}
+    result.update(regions=regions, runs=runs, budget_ms=budget_ms,
+                  over_budget=result["first_frame_ms"] > budget_ms)
+    return result
+
+
+def is_regression(current, base, threshold, min_delta_ms):
+    """判断耗时是否超过基线的允许范围"""
+    return current > base * (1 + threshold) and current - base > min_delta_ms
+
+
+def compare(results, baseline, threshold, min_delta_ms=0.05):
+    """与基线比较，返回回退项列表
+
+    Args:
+        results: 本次结果
+        baseline: 基线结果
+        threshold: 允许的相对变慢比例，如 0.2 表示慢 20% 以内不算回退
+        min_delta_ms: 绝对差值低于该值时忽略，避免微秒级阶段的测量噪声
+
+    Returns:
+        list: 回退描述字符串列表
+    """
+    regressions = []
+    for size, stages in results["stages"].items():
+        for stage, stats in stages.items():
+            base = baseline.get("stages", {}).get(size, {}).get(stage)
+            if base and is_regression(stats["mean_ms"], base["mean_ms"], threshold, min_delta_ms):
+                regressions.append(f"阶段 {size} {stage}: {base['mean_ms']:.3f}ms -> {stats['mean_ms']:.3f}ms")
+    for key, stats in results["pipeline"].items():
+        base = baseline.get("pipeline", {}).get(key)
+        if base and is_regression(stats["tick"]["mean_ms"], base["tick"]["mean_ms"], threshold, min_delta_ms):
+            regressions.append(f"管线 {key}: {base['tick']['mean_ms']:.3f}ms -> {stats['tick']['mean_ms']:.3f}ms")
+    return regressions
+
+
+def print_results(results):
+    """打印结果表格"""
+    print("\n各阶段平均耗时 (ms):")
+    print(f"{'区域':>12} " + " ".join(f"{stage:>9}" for stage in STAGES))
+    for size, stages in results["stages"].items():
+        print(f"{size:>12} " + " ".join(f"{stages[stage]['mean_ms']:>9.3f}" for stage in STAGES))
+
+    print("\n完整管线:")
+    print(f"{'配置':>16} {'tick ms':>9} {'帧/秒':>9} {'MB/s':>9} {'RSS MB':>9}")
+    for key, stats in results["pipeline"].items():
+        rss = f"{stats['rss_mb']:.1f}" if stats["rss_mb"] is not None else "-"
+        print(f"{key:>16} {stats['tick']['mean_ms']:>9.3f} {stats['frames_per_s']:>9.1f} "
+              f"{stats['mb_per_s']:>9.1f} {rss:>9}")
+
+    if results.get("selector"):
+        print("\n屏幕选择器每次鼠标移动的重绘耗时 (ms):")
+        print(f"{'桌面':>16} {'平均':>9} {'p95':>9}")
+        for key, stats in results["selector"].items():
+            print(f"{key:>16} {stats['mean_ms']:>9.3f} {stats['p95_ms']:>9.3f}")
+
+    if results.get("span"):
+        print("\n混合 DPI 跨显示器区域与单显示器区域的截图耗时 (ms):")
+        print(f"{'区域':>16} {'平均':>9} {'p95':>9}")
+        for key, stats in results["span"].items():
+            print(f"{key:>16} {stats['mean_ms']:>9.3f} {stats['p95_ms']:>9.3f}")
+
+    if results.get("history"):
+        stats = results["history"]
+        print(f"\n回放缓存（{stats['frames']} 帧）:")
+        print(f"  保存 {stats['history_seconds']:.1f}s 历史占用 {stats['history_mb']:.1f}MB，"
+              f"原始帧需要 {stats['raw_mb']:.0f}MB（{stats['ratio']:.2%}）")
+        print(f"  每 MB {stats['seconds_per_mb']:.2f}s（原始帧 {stats['raw_seconds_per_mb']:.3f}s）")
+        print(f"  每帧追加 {stats['append_ms']:.3f}ms（捕获线程），压缩 {stats['compress_ms']:.3f}ms（后台线程），"
+              f"重建一帧平均 {stats['rebuild']['mean_ms']:.1f}ms / 最大 {stats['rebuild']['max_ms']:.1f}ms")
+
+    if results.get("hotkey"):
+        print("\n热键到屏幕选择器首次绘制的延迟 (ms):")
+        print(f"{'选择器':>16} {'平均':>9} {'p95':>9} {'最大':>9}")
+        for key, stats in results["hotkey"].items():
+            print(f"{key:>16} {stats['mean_ms']:>9.3f} {stats['p95_ms']:>9.3f} {stats['max_ms']:>9.3f}")
+
+    if results.get("watch"):
+        stats = results["watch"]
+        print("\n区域监视与悬浮窗的开销:")
+        print(f"  监视 {stats['regions']} 个区域 @ {stats['fps']:g} FPS：单次 {stats['tick']['mean_ms']:.3f}ms，"
+              f"每秒 {stats['ms_per_s']:.1f}ms")
+        print(f"  1 个 {stats['window_size']} 悬浮窗 @ {stats['window_fps']} FPS：单次 "
+              f"{stats['window_tick']['mean_ms']:.3f}ms，每秒 {stats['window_ms_per_s']:.1f}ms")
+
+    if results.get("stream"):
+        stats = results["stream"]
+        print(f"\n串流 {stats['size']} 到 {stats['clients']} 个 MJPEG 客户端（上限 {stats['max_fps']} FPS）:")
+        print(f"  编码 {stats['encoded_per_s']:.1f} 帧/秒，每帧 {stats['encode']['mean_ms']:.2f}ms，"
+              f"每秒 {stats['encode_ms_per_s']:.1f}ms（与客户端数量无关）")
+        print(f"  快客户端 {stats['fast_fps']:.1f} FPS，慢客户端 {stats['slow_fps']:.1f} FPS，"
+              f"限速跳过 {stats['skipped']} 帧，慢客户端丢帧 {stats['dropped']}")
+
+    if results.get("startup"):
+        stats = results["startup"]
+        print(f"\n恢复 {stats['regions']} 个悬浮窗的冷启动（{stats['runs']} 次的中位数，ms）:")
+        print(f"  导入 {stats['import_ms']:.0f}，初始化 {stats['init_ms']:.0f}，恢复会话 {stats['restore_ms']:.0f}，"
+              f"全部显示第一帧 {stats['first_frame_ms']:.0f}（预算 {stats['budget_ms']:.0f}），"
+              f"进程总耗时 {stats['wall_ms']:.0f}")
+
+    if results.get("track"):
+        print("\n区域跟随目标窗口（窗口 30 次/秒移动）:")
+        print(f"{'模式':>8} {'跟随 ms/帧':>12} {'截图 ms/帧':>12} {'查询次数':>9} {'滞后比例':>9}")
+        for mode, stats in results["track"].items():
+            print(f"{mode:>8} {stats['track_ms']:>12.4f} {stats['capture_ms']:>12.3f} "
+                  f"{stats['queries']:>9} {stats['lag_ratio']:>9.1%}")
+
+    if results.get("scaling"):
+        print(f"\n多进程扩展曲线（{os.cpu_count()} 个 CPU 核心，0 表示单线程路径）:")
+        print(f"{'进程数':>8} {'tick ms':>9} {'帧/秒':>9} {'加速比':>9}")
+        for processes, stats in results["scaling"].items():
+            print(f"{processes:>8} {stats['tick']['mean_ms']:>9.3f} {stats['frames_per_s']:>9.1f} "
+                  f"{stats['speedup']:>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LandscapeCutter 捕获显示管线性能测试")
+    parser.add_argument("--backend", default="synthetic", help="捕获后端名称（默认 synthetic）")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="区域尺寸，如 1920x1080")
+    parser.add_argument("--windows", nargs="+", type=int, default=DEFAULT_WINDOWS, help="悬浮窗数量")
+    parser.add_argument("--frames", type=int, default=60, help="逐阶段测量的帧数")
+    parser.add_argument("--duration", type=float, default=2.0, help="每个管线配置的测量时间（秒）")
+    parser.add_argument("--dpr", type=float, default=1.5, help="设备像素比，决定缩放比例")
+    parser.add_argument("--change-rate", type=float, default=1.0, help="合成后端的画面变化率")
+    parser.add_argument("--max-pixels", type=int, default=16 * 1920 * 1080,
+                        help="单个管线配置允许的最大总像素数，超过则跳过")
+    parser.add_argument("--processes", nargs="+", type=int,
+                        help="测量多进程捕获的扩展曲线，如 0 1 2 4（0 为单线程路径）")
+    parser.add_argument("--scaling-size", default="1920x1080", help="扩展测试的区域尺寸")
+    parser.add_argument("--scaling-windows", type=int, default=12, help="扩展测试的悬浮窗数量")
+    parser.add_argument("--selector-widths", nargs="+", type=int,
+                        help="测量屏幕选择器在这些虚拟桌面宽度下的拖动重绘耗时，如 1920 11520")
+    parser.add_argument("--span-size",
+                        help="比较该逻辑尺寸的区域跨越混合 DPI 显示器与位于单个显示器时的截图耗时，如 1280x720")
+    parser.add_argument("--history-seconds", type=float, default=0,
+                        help="测量回放缓存保存该时长的 1080p/30 FPS 画面的内存占用（0 表示不测量）")
+    parser.add_argument("--history-mb", type=int, default=512, help="回放缓存测试的内存上限（MB）")
+    parser.add_argument("--hotkey-runs", type=int, default=0,
+                        help="测量热键到屏幕选择器显示的延迟，指定触发次数（0 表示不测量）")
+    parser.add_argument("--watch-regions", type=int, default=0,
+                        help="比较监视该数量的区域与显示一个悬浮窗的每秒开销（0 表示不测量）")
+    parser.add_argument("--watch-fps", type=float, default=2.0, help="区域监视测试的监视帧率")
+    parser.add_argument("--stream-clients", type=int, default=0,
+                        help="测量串流服务向该数量的本机客户端分发 1280x720 画面的开销（0 表示不测量）")
+    parser.add_argument("--track-regions", type=int, default=0,
+                        help="测量该数量的区域跟随移动窗口时的开销，0 表示跳过")
+    parser.add_argument("--startup-regions", type=int, default=0,
+                        help="测量恢复该数量悬浮窗的冷启动耗时，0 表示跳过")
+    parser.add_argument("--startup-budget-ms", type=float, default=1500,
+                        help="冷启动到全部显示第一帧的预算（毫秒），超出时以非零状态退出")
+    parser.add_argument("--save", help="把结果保存为 JSON 基线")
+    parser.add_argument("--baseline", help="与 JSON 基线比较，出现回退时以非零状态退出")
+    parser.add_argument("--threshold", type=float, default=0.2, help="允许的相对变慢比例")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="忽略低于该绝对差值的变化（毫秒）")
+    args = parser.parse_args()
+
+    from PySide6 import __version__ as pyside_version
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    results = {
+        "meta": {
+            "backend": args.backend,
+            "dpr": args.dpr,
+            "frames": args.frames,
+            "duration": args.duration,
+            "change_rate": args.change_rate,
+            "python": platform.python_version(),
+            "pyside": pyside_version,
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S")
+        },
+        "stages": {},
+        "pipeline": {},
+        "scaling": {},
+        "selector": {},
+        "span": {},
+        "history": {},
+        "hotkey": {},
+        "watch": {},
+        "stream": {},
+        "startup": {},
+        "track": {}
+    }
+
+    for size in args.sizes:
+        width, height = parse_size(size)
+        backend = make_backend(args.backend, width, height, 1, args.change_rate)
+        regions = place_regions(backend, width, height, 1)
+        if regions is None:
+            print(f"跳过 {size}：超出显示器范围")
+            backend.close()
+            continue
+        print(f"测量各阶段: {size}")
+        results["stages"][size] = bench_stages(backend, regions[0], args.dpr, args.frames)
+        backend.close()
+
+        for count in args.windows:
+            if width * height * count > args.max_pixels:
+                print(f"跳过 {size} x {count}：总像素数超过 --max-pixels")
+                continue
+            backend = make_backend(args.backend, width, height, count, args.change_rate)
+            regions = place_regions(backend, width, height, count)
+            if regions is None:
+                print(f"跳过 {size} x {count}：超出显示器范围")
+                backend.close()
+                continue
+            print(f"测量完整管线: {size} x {count}")
+            results["pipeline"][f"{size}@{count}"] = bench_pipeline(app, backend, regions, args.dpr, args.duration)
+            backend.close()
+
+    if args.processes:
+        results["scaling"] = bench_scaling(app, args)
+
+    for width in args.selector_widths or []:
+        for frozen in (False, True):
+            key = f"{width}x2160" + ("（冻结）" if frozen else "")
+            print(f"测量屏幕选择器: {key}")
+            results["selector"][key] = bench_selector(app, width, 2160, frozen)
+
+    if args.span_size:
+        width, height = parse_size(args.span_size)
+        print(f"测量跨显示器区域: {args.span_size}")
+        results["span"] = bench_span(width, height, args.duration, args.change_rate)
+
+    if args.history_seconds > 0:
+        print(f"测量回放缓存: 1920x1080 30 FPS {args.history_seconds:g}s")
+        results["history"] = bench_history(1920, 1080, 30, args.history_seconds, args.change_rate, args.history_mb)
+
+    if args.hotkey_runs > 0:
+        for prewarmed in (False, True):
+            key = "预先创建" if prewarmed else "每次新建"
+            print(f"测量热键延迟: {key}")
+            results["hotkey"][key] = bench_hotkey(app, args.hotkey_runs, prewarmed)
+
+    if args.watch_regions > 0:
+        print(f"测量区域监视: {args.watch_regions} 个区域 @ {args.watch_fps:g} FPS")
+        results["watch"] = bench_watch(app, args.watch_regions, args.watch_fps, args.duration, args.change_rate)
+
+    if args.stream_clients > 0:
+        print(f"测量串流服务: {args.stream_clients} 个客户端")
+        results["stream"] = bench_stream(args.stream_clients, 1280, 720, args.duration, args.change_rate)
+
+    if args.track_regions > 0:
+        print(f"测量区域跟随: {args.track_regions} 个区域")
+        results["track"] = bench_track(args.track_regions, args.duration, args.change_rate)
+
+    if args.startup_regions > 0:
+        print(f"测量冷启动: 恢复 {args.startup_regions} 个悬浮窗")
+        results["startup"] = bench_startup(args.startup_regions, args.startup_budget_ms)
+
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n结果已保存到: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\n发现 {len(regressions)} 项性能回退（阈值 {args.threshold:.0%}）:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"\n与基线相比没有超过 {args.threshold:.0%} 的性能回退")
+    if results["startup"].get("over_budget"):
+        print(f"\n冷启动超出预算: {results['startup']['first_frame_ms']:.0f}ms > "
+              f"{results['startup']['budget_ms']:.0f}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
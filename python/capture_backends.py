@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 捕获后端模块
+定义统一的捕获接口，并按名称注册和创建捕获后端（mss、合成、回放等）
+"""
+
+import importlib
+
+import numpy as np
+
+# 能力标志
+CAP_BATCH = "batch"                  # grab_batch 对同一时刻的画面截取多个矩形
+CAP_ZERO_COPY = "zero_copy"          # grab_raw 返回的数组直接引用后端缓冲区
+CAP_HEADLESS = "headless"            # 不需要桌面环境即可运行
+CAP_DETERMINISTIC = "deterministic"  # 相同参数下输出可复现
+
+
+class CaptureBackend:
+    """捕获后端基类
+
+    子类至少需要实现 grab_raw 和 monitors，图像统一为 (height, width, 4) 的 BGRA uint8 数组
+    """
+
+    # 后端名称
+    name = ""
+    # 输出像素格式
+    pixel_format = "BGRA"
+    # 能力标志集合
+    capabilities = frozenset()
+
+    def grab_raw(self, region):
+        """捕获指定区域的原始 BGRA 数据
+
+        Args:
+            region: 区域信息，包含 x, y, width, height
+
+        Returns:
+            np.ndarray: 形状为 (height, width, 4) 的 BGRA 图像数据
+        """
+        raise NotImplementedError
+
+    def grab_batch(self, regions):
+        """一次捕获多个区域
+
+        默认逐个调用 grab_raw；支持 CAP_BATCH 的后端保证所有区域来自同一帧
+
+        Args:
+            regions: 区域列表
+
+        Returns:
+            list: 与 regions 一一对应的 BGRA 图像数据
+        """
+        return [self.grab_raw(region) for region in regions]
+
+    def capture(self, region):
+        """捕获指定区域
+
+        Args:
+            region: 区域信息，包含 x, y, width, height
+
+        Returns:
+            np.ndarray: RGB 图像数据（BGRA 数据的视图）
+        """
+        return self.grab_raw(region)[:, :, 2::-1]
+
+    def monitors(self):
+        """获取各显示器的几何信息
+
+        Returns:
+            list: 显示器列表，每项包含 left, top, width, height
+        """
+        raise NotImplementedError
+
+    def has_capability(self, capability):
+        """是否具有指定能力"""
+        return capability in self.capabilities
+
+    def close(self):
+        """释放后端资源"""
+        pass
+
+
+def crop_region(image, region, left=0, top=0):
+    """从整幅画面中裁剪区域，超出画面的部分填充为黑色
+
+    Args:
+        image: 整幅 BGRA 画面
+        region: 区域信息，包含 x, y, width, height（与画面同一坐标系）
+        left: 画面左上角的 x 坐标
+        top: 画面左上角的 y 坐标
+
+    Returns:
+        np.ndarray: 区域的 BGRA 图像数据（新分配的数组）
+    """
+    out = np.zeros((region["height"], region["width"], 4), dtype=np.uint8)
+    x0 = max(region["x"] - left, 0)
+    y0 = max(region["y"] - top, 0)
+    x1 = min(region["x"] - left + region["width"], image.shape[1])
+    y1 = min(region["y"] - top + region["height"], image.shape[0])
+    if x1 > x0 and y1 > y0:
+        ox = x0 - (region["x"] - left)
+        oy = y0 - (region["y"] - top)
+        out[oy:oy + y1 - y0, ox:ox + x1 - x0] = image[y0:y1, x0:x1]
+    return out
+
+
+# 内置后端：名称 -> "模块:类名"，创建时才导入，无需安装未使用后端的依赖
+BACKENDS = {
+    "mss": "capture_mss:Capture",
+    "synthetic": "capture_synthetic:SyntheticCapture",
+    "replay": "capture_replay:ReplayCapture",
+}
+
+
+def register_backend(name, backend):
+    """注册捕获后端
+
+    Args:
+        name: 后端名称
+        backend: CaptureBackend 子类，或 "模块:类名" 字符串
+    """
+    BACKENDS[name] = backend
+
+
+def available_backends():
+    """获取已注册的后端名称列表"""
+    return sorted(BACKENDS)
+
+
+def get_backend_class(name):
+    """获取后端类
+
+    Args:
+        name: 后端名称
+
+    Returns:
+        type: CaptureBackend 子类
+
+    Raises:
+        ValueError: 后端未注册
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"未知的捕获后端: {name}，可用后端: {', '.join(available_backends())}")
+    backend = BACKENDS[name]
+    if isinstance(backend, str):
+        module_name, class_name = backend.split(":")
+        backend = getattr(importlib.import_module(module_name), class_name)
+        BACKENDS[name] = backend
+    return backend
+
+
+def create_backend(name="mss", **options):
+    """按名称创建捕获后端
+
+    Args:
+        name: 后端名称
+        **options: 传给后端构造函数的参数
+
+    Returns:
+        CaptureBackend: 捕获后端实例
+    """
+    return get_backend_class(name)(**options)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 捕获调度模块
+汇总所有悬浮窗的区域，每个刷新周期按显示器合并后只截图一次，
+再把各自的 BGRA 切片（NumPy 视图）分发给对应的悬浮窗。
+跨显示器的区域（带有 parts）的各子矩形与其他区域在同一次批量截图中截取，再拼接后分发
+"""
+
+import sys
+import time
+import threading
+
+from screen_map import RegionStitcher
+
+
+class CaptureBroker:
+    def __init__(self, capture, merge_ratio=1.5, grab_lock=None):
+        """初始化捕获调度器
+
+        Args:
+            capture: 捕获后端（CaptureBackend，需提供 grab_batch 和 monitors 方法）
+            merge_ratio: 合并阈值，两个矩形的外接矩形面积不超过
+                两者面积之和的该倍数时合并为一次截图
+            grab_lock: 截图锁，多个调度器在不同线程中共用同一个捕获后端时传入同一把锁，
+                保证同一时刻只有一个线程调用后端
+        """
+        self.capture = capture
+        self.merge_ratio = merge_ratio
+        self.grab_lock = grab_lock or threading.Lock()
+
+        # 订阅者：token -> {"region", "callback", "target_fps", "min_fps", "stats", "output_size", "stitcher"}
+        self.subscribers = {}
+        self.next_token = 1
+        self.lock = threading.Lock()
+
+        # 截图计划缓存，区域变化时才重新计算
+        self.plan = None
+
+    def register(self, region, callback, target_fps=60, min_fps=5, stats=None):
+        """注册一个区域
+
+        Args:
+            region: 区域信息，包含 x, y, width, height（物理像素）
+            callback: 回调函数 callback(frame, timestamp)，frame 为该区域的 BGRA 视图，
+                仅在回调期间有效，需要保留时应复制；返回值表示画面是否变化
+            target_fps: 画面变化时的目标帧率
+            min_fps: 画面静止时允许降到的最低帧率
+            stats: FrameStats 对象，提供时记录该区域分摊的截图耗时
+
+        Returns:
+            int: 订阅标识，用于注销
+        """
+        with self.lock:
+            token = self.next_token
+            self.next_token += 1
+            self.subscribers[token] = {
+                "region": dict(region),
+                "callback": callback,
+                "target_fps": target_fps,
+                "min_fps": min_fps,
+                "stats": stats,
+                "output_size": None,
+                "stitcher": RegionStitcher(region) if "parts" in region else None
+            }
+            self.plan = None
+        return token
+
+    def unregister(self, token):
+        """注销区域
+
+        Args:
+            token: register 返回的订阅标识
+        """
+        with self.lock:
+            if self.subscribers.pop(token, None) is not None:
+                self.plan = None
+
+    def update_region(self, token, region):
+        """更新已注册区域的位置或大小
+
+        Args:
+            token: 订阅标识
+            region: 新的区域信息
+        """
+        with self.lock:
+            if token in self.subscribers:
+                self.subscribers[token]["region"] = dict(region)
+                self.subscribers[token]["stitcher"] = RegionStitcher(region) if "parts" in region else None
+                self.plan = None
+
+    def set_output_size(self, token, width, height):
+        """记录区域的显示尺寸
+
+        本调度器总是分发原始分辨率的视图，由悬浮窗自行缩小；
+        多进程捕获引擎（ProcessCaptureEngine）会在工作进程中按该尺寸缩小后再交回
+
+        Args:
+            token: 订阅标识
+            width: 显示宽度
+            height: 显示高度
+        """
+        with self.lock:
+            if token in self.subscribers:
+                self.subscribers[token]["output_size"] = (width, height)
+
+    def set_outputs(self, token, enabled):
+        """启用或停止交回原始分辨率的帧
+
+        本调度器分发的总是原始分辨率的视图，无需处理；
+        多进程捕获引擎（ProcessCaptureEngine）据此决定是否另外交回原始帧
+        """
+
+    def has_subscribers(self):
+        """是否存在已注册的区域"""
+        return bool(self.subscribers)
+
+    def build_plan(self):
+        """计算截图计划
+
+        先按显示器对区域分组，再在组内贪心合并相邻的矩形，
+        距离较远的区域保留为独立的截图矩形，避免截取大片无用区域
+
+        跨显示器的区域不参与合并，在 tick 中按子矩形单独截取
+
+        Returns:
+            list: 截图矩形列表，每项为 (left, top, right, bottom, tokens)
+        """
+        monitors = self.capture.monitors()
+        groups = {}
+        for token, subscriber in self.subscribers.items():
+            if subscriber["stitcher"] is not None:
+                continue
+            region = subscriber["region"]
+            key = self.find_monitor(region, monitors)
+            groups.setdefault(key, []).append(
+                [region["x"], region["y"],
+                 region["x"] + region["width"], region["y"] + region["height"],
+                 [token]]
+            )
+
+        plan = []
+        for rects in groups.values():
+            plan.extend(self.merge_rects(rects))
+        return plan
+
+    @staticmethod
+    def find_monitor(region, monitors):
+        """查找区域中心所在的显示器索引，找不到时返回 -1"""
+        cx = region["x"] + region["width"] // 2
+        cy = region["y"] + region["height"] // 2
+        for index, monitor in enumerate(monitors):
+            if (monitor["left"] <= cx < monitor["left"] + monitor["width"]
+                    and monitor["top"] <= cy < monitor["top"] + monitor["height"]):
+                return index
+        return -1
+
+    def merge_rects(self, rects):
+        """贪心合并矩形，直到没有值得合并的矩形对
+
+        Args:
+            rects: 矩形列表，每项为 [left, top, right, bottom, tokens]
+
+        Returns:
+            list: 合并后的矩形列表
+        """
+        def area(r):
+            return (r[2] - r[0]) * (r[3] - r[1])
+
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(rects)):
+                for j in range(i + 1, len(rects)):
+                    a, b = rects[i], rects[j]
+                    union = [min(a[0], b[0]), min(a[1], b[1]),
+                             max(a[2], b[2]), max(a[3], b[3]), a[4] + b[4]]
+                    if area(union) <= self.merge_ratio * (area(a) + area(b)):
+                        rects[i] = union
+                        del rects[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        return [tuple(r) for r in rects]
+
+    def tick(self, tokens=None):
+        """执行一次截图并分发给订阅者
+
+        Args:
+            tokens: 本次需要刷新的订阅标识集合，为 None 时刷新全部；
+                合并矩形中只有部分区域到期时只截取到期区域的外接矩形
+
+        Returns:
+            dict: token -> (changed, cost)，changed 为回调报告的画面是否变化，
+                cost 为该区域分摊的截图时间与回调耗时之和（秒）
+        """
+        with self.lock:
+            if self.plan is None:
+                self.plan = self.build_plan()
+            plan = self.plan
+            subscribers = dict(self.subscribers)
+
+        # 先确定本次要截取的矩形，再一次性批量截图，保证所有区域来自同一时刻
+        grabs = []
+        for left, top, right, bottom, plan_tokens in plan:
+            due = [token for token in plan_tokens
+                   if token in subscribers and (tokens is None or token in tokens)]
+            if not due:
+                continue
+            if len(due) < len(plan_tokens):
+                regions = [subscribers[token]["region"] for token in due]
+                left = min(r["x"] for r in regions)
+                top = min(r["y"] for r in regions)
+                right = max(r["x"] + r["width"] for r in regions)
+                bottom = max(r["y"] + r["height"] for r in regions)
+            grabs.append(({
+                "x": left,
+                "y": top,
+                "width": right - left,
+                "height": bottom - top
+            }, due))
+
+        # 跨显示器的区域：各子矩形加入同一次批量截图
+        spans = [token for token, subscriber in subscribers.items()
+                 if subscriber["stitcher"] is not None and (tokens is None or token in tokens)]
+        rects = [rect for rect, _ in grabs]
+        for token in spans:
+            rects.extend(subscribers[token]["stitcher"].rects)
+
+        results = {}
+        if not rects:
+            return results
+
+        timestamp = time.perf_counter()
+        with self.grab_lock:
+            images = self.capture.grab_batch(rects)
+        grab_cost = (time.perf_counter() - timestamp) / (sum(len(due) for _, due in grabs) + len(spans))
+
+        offset = len(grabs)
+        for token in spans:
+            subscriber = subscribers[token]
+            stitcher = subscriber["stitcher"]
+            start = time.perf_counter()
+            frame = stitcher.stitch(images[offset:offset + len(stitcher.rects)])
+            offset += len(stitcher.rects)
+            if subscriber["stats"] is not None:
+                subscriber["stats"].record("capture", grab_cost + time.perf_counter() - start)
+            try:
+                changed = subscriber["callback"](frame, timestamp)
+            except BrokenPipeError:
+                raise
+            except Exception as e:
+                print(f"分发帧错误: {str(e)}", file=sys.stderr)
+                changed = False
+            results[token] = (bool(changed), grab_cost + time.perf_counter() - start)
+
+        for (rect, due), image in zip(grabs, images):
+            for token in due:
+                subscriber = subscribers[token]
+                region = subscriber["region"]
+                if subscriber["stats"] is not None:
+                    subscriber["stats"].record("capture", grab_cost)
+                x0 = region["x"] - rect["x"]
+                y0 = region["y"] - rect["y"]
+                # BGRA 切片视图，不复制数据
+                view = image[y0:y0 + region["height"], x0:x0 + region["width"]]
+                start = time.perf_counter()
+                try:
+                    changed = subscriber["callback"](view, timestamp)
+                except BrokenPipeError:
+                    # 输出端已关闭（如无界面模式的标准输出管道），交给调用方结束运行
+                    raise
+                except Exception as e:
+                    print(f"分发帧错误: {str(e)}", file=sys.stderr)
+                    changed = False
+                results[token] = (bool(changed), grab_cost + time.perf_counter() - start)
+        return results
+
+    def get_rates(self):
+        """获取所有订阅者的帧率设置
+
+        Returns:
+            dict: token -> (target_fps, min_fps)
+        """
+        with self.lock:
+            return {token: (subscriber["target_fps"], subscriber["min_fps"])
+                    for token, subscriber in self.subscribers.items()}
@@ -3,27 +3,34 @@
 
 """
 LandscapeCutter 屏幕捕获模块
+默认的 mss 捕获后端
 """
 
+import sys
+
 import mss
 import numpy as np
 
-class Capture:
+from capture_backends import CaptureBackend, CAP_ZERO_COPY
+
+class Capture(CaptureBackend):
+    name = "mss"
+    capabilities = frozenset({CAP_ZERO_COPY})
+    
     def __init__(self):
         """初始化捕获模块"""
         self.sct = mss.mss()
     
-    def capture(self, region):
-        """捕获指定区域
+    def grab_raw(self, region):
+        """捕获指定区域的原始 BGRA 数据
         
         Args:
             region: 区域信息，包含 x, y, width, height
             
         Returns:
-            np.ndarray: 捕获的图像数据
+            np.ndarray: 形状为 (height, width, 4) 的 BGRA 图像数据
         """
         try:
-            # 使用MSS捕获屏幕区域
             monitor = {
                 "top": region["y"],
                 "left": region["x"],
@@ -31,14 +38,21 @@ class Capture:
                 "height": region["height"]
             }
             screenshot = self.sct.grab(monitor)
-            # 转换为numpy数组
-            img = np.array(screenshot)
-            # 转换为RGB格式（MSS返回的是BGRA，需要交换通道顺序）
-            img = img[:, :, :3]
-            # 交换B和R通道，从BGR转换为RGB
-            img = img[:, :, ::-1]
-            return img
+            # 直接包装 mss 的原始缓冲区，避免 np.array 的整帧复制
+            img = np.frombuffer(screenshot.raw, dtype=np.uint8)
+            return img.reshape(screenshot.height, screenshot.width, 4)
         except Exception as e:
-            print(f"捕获错误: {str(e)}")
-            # 返回空图像
-            return np.zeros((region["height"], region["width"], 3), dtype=np.uint8)
+            print(f"捕获错误: {str(e)}", file=sys.stderr)
+            return np.zeros((region["height"], region["width"], 4), dtype=np.uint8)
+    
+    def monitors(self):
+        """获取各显示器的几何信息
+        
+        Returns:
+            list: 显示器列表，每项包含 left, top, width, height
+        """
+        return self.sct.monitors[1:]
+    
+    def close(self):
+        """释放 mss 资源"""
+        self.sct.close()
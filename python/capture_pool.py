@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 多进程捕获模块
+把区域分配到多个工作进程，每个进程使用自己的捕获后端实例（如独立的 mss.mss()）
+完成截图、缩小到显示尺寸和变化检测，再通过共享内存把变化的帧交回 GUI 进程，
+不经过 pickle，也不在 GUI 进程中争用 GIL。工作进程的入口在不导入 Qt 的 capture_worker 模块中。
+
+ProcessCaptureEngine 与 CaptureBroker 接口相同，可直接交给 Scheduler 和 FloatingWindow 使用；
+回调额外收到工作进程检测出的脏区域，悬浮窗无需再次缩小和检测变化。
+通过 set_outputs 启用输出后，回调还会收到原始分辨率的帧，供录制、导出和串流使用
+"""
+
+import os
+import sys
+import time
+import threading
+import contextlib
+import importlib.util
+import multiprocessing
+
+from frame_export import FrameReader
+from capture_worker import worker_main
+
+
+@contextlib.contextmanager
+def worker_main_module():
+    """启动工作进程期间把 __main__ 模块指向 capture_worker
+
+    spawn 方式启动的子进程会按 __main__ 的模块名或路径重新导入父进程的主模块，
+    main.py 会因此在每个工作进程中导入 PySide6；改为导入不依赖 Qt 的 capture_worker
+    """
+    main = sys.modules.get("__main__")
+    if main is None:
+        yield
+        return
+    spec = getattr(main, "__spec__", None)
+    main.__spec__ = importlib.util.find_spec("capture_worker")
+    try:
+        yield
+    finally:
+        main.__spec__ = spec
+
+
+class ProcessCaptureEngine:
+    def __init__(self, backend="mss", workers=None, backend_options=None):
+        """初始化多进程捕获引擎
+
+        Args:
+            backend: 捕获后端名称，每个工作进程各自创建一个实例
+            workers: 工作进程数量，默认为 CPU 核心数（最多 8 个）
+            backend_options: 传给后端构造函数的参数
+        """
+        self.backend = backend
+        self.backend_options = dict(backend_options or {})
+        if workers is None:
+            workers = min(os.cpu_count() or 1, 8)
+        self.worker_count = max(1, workers)
+
+        # 订阅者：token -> {"region", "callback", "target_fps", "min_fps", "stats", "worker",
+        #                   "reader", "source_reader"}
+        self.subscribers = {}
+        self.next_token = 1
+        self.lock = threading.Lock()
+
+        # 统一使用 spawn，工作进程不继承 GUI 进程的 Qt 状态
+        context = multiprocessing.get_context("spawn")
+        self.connections = []
+        self.processes = []
+        with worker_main_module():
+            for index in range(self.worker_count):
+                parent_conn, child_conn = context.Pipe()
+                process = context.Process(target=worker_main, name=f"CaptureWorker-{index}",
+                                          args=(index, backend, self.backend_options, child_conn),
+                                          daemon=True)
+                process.start()
+                child_conn.close()
+                self.connections.append(parent_conn)
+                self.processes.append(process)
+        # 各工作进程负责的像素数，新区域分配给负载最小的进程
+        self.loads = [0] * self.worker_count
+
+    def register(self, region, callback, target_fps=60, min_fps=5, stats=None):
+        """注册一个区域，参数与 CaptureBroker.register 相同
+
+        回调收到的帧已在工作进程中缩小到 set_output_size 设置的显示尺寸，
+        且只在画面变化时调用，调用方式为 callback(frame, timestamp, rects, source)，
+        rects 为缩小后的帧上相对上一次交回的帧的脏矩形列表，
+        source 为原始分辨率的帧，仅在 set_outputs 启用输出时提供，否则为 None
+        """
+        with self.lock:
+            token = self.next_token
+            self.next_token += 1
+            worker = self.loads.index(min(self.loads))
+            self.loads[worker] += region["width"] * region["height"]
+            self.subscribers[token] = {
+                "region": dict(region),
+                "callback": callback,
+                "target_fps": target_fps,
+                "min_fps": min_fps,
+                "stats": stats,
+                "worker": worker,
+                "reader": None,
+                "source_reader": None
+            }
+            output_size = (region["width"], region["height"])
+            self.connections[worker].send(("add", token, dict(region), output_size))
+        return token
+
+    def unregister(self, token):
+        """注销区域"""
+        with self.lock:
+            subscriber = self.subscribers.pop(token, None)
+            if subscriber is None:
+                return
+            region = subscriber["region"]
+            self.loads[subscriber["worker"]] -= region["width"] * region["height"]
+            self.close_reader(subscriber)
+            self.connections[subscriber["worker"]].send(("remove", token))
+
+    def update_region(self, token, region):
+        """更新已注册区域的位置或大小"""
+        with self.lock:
+            subscriber = self.subscribers.get(token)
+            if subscriber is not None:
+                subscriber["region"] = dict(region)
+                self.connections[subscriber["worker"]].send(("region", token, dict(region)))
+
+    def set_output_size(self, token, width, height):
+        """设置区域的显示尺寸，工作进程把帧缩小到该尺寸后再交回"""
+        with self.lock:
+            subscriber = self.subscribers.get(token)
+            if subscriber is not None:
+                self.connections[subscriber["worker"]].send(("size", token, (width, height)))
+
+    def set_outputs(self, token, enabled):
+        """启用或停止交回原始分辨率的帧
+
+        启用时工作进程重置变化检测，下一帧作为完整画面交回；停止时工作进程释放原始帧的共享内存，
+        tick 随后断开对应的读取端
+
+        Args:
+            token: 订阅标识
+            enabled: 是否有录制、导出或串流等输出需要原始分辨率的帧
+        """
+        with self.lock:
+            subscriber = self.subscribers.get(token)
+            if subscriber is not None:
+                self.connections[subscriber["worker"]].send(("outputs", token, bool(enabled)))
+
+    def has_subscribers(self):
+        """是否存在已注册的区域"""
+        return bool(self.subscribers)
+
+    @staticmethod
+    def close_reader(subscriber, key=None):
+        """断开订阅者的共享内存连接
+
+        Args:
+            subscriber: 订阅者
+            key: 只断开 "reader" 或 "source_reader"，为 None 时全部断开
+        """
+        for name in (key,) if key else ("reader", "source_reader"):
+            if subscriber[name] is not None:
+                subscriber[name].close()
+                subscriber[name] = None
+
+    def read_frame(self, subscriber, key, name, sequence):
+        """从工作进程的共享内存读取指定序号的帧
+
+        Returns:
+            np.ndarray: 共享内存上的视图，该帧已被覆盖时返回 None
+        """
+        reader = subscriber[key]
+        if reader is None or reader.name != name:
+            self.close_reader(subscriber, key)
+            reader = FrameReader(name, track=True)
+            subscriber[key] = reader
+        frame, info = reader.read_latest()
+        if frame is None or info["sequence"] != sequence:
+            return None
+        return frame
+
+    def tick(self, tokens=None):
+        """让各工作进程并行截取到期的区域，并把变化的帧分发给订阅者
+
+        Args:
+            tokens: 本次需要刷新的订阅标识集合，为 None 时刷新全部
+
+        Returns:
+            dict: token -> (changed, cost)，cost 为工作进程中的截图和处理耗时
+                加上 GUI 进程中回调的耗时（秒）
+        """
+        with self.lock:
+            subscribers = dict(self.subscribers)
+            shards = {}
+            for token, subscriber in subscribers.items():
+                if tokens is None or token in tokens:
+                    shards.setdefault(subscriber["worker"], []).append(token)
+
+            # 先向所有工作进程发出请求，再依次收集结果，各进程并行工作
+            for worker, shard in shards.items():
+                self.connections[worker].send(("tick", shard))
+            replies = {}
+            for worker in shards:
+                try:
+                    replies.update(self.connections[worker].recv())
+                except (EOFError, OSError) as e:
+                    print(f"工作进程 {worker} 通信错误: {str(e)}")
+
+        results = {}
+        for token, reply in replies.items():
+            changed, name, sequence, timestamp, grab_cost, work_cost, rects, source_name, source_sequence = reply
+            subscriber = subscribers[token]
+            if subscriber["stats"] is not None:
+                subscriber["stats"].record("capture", grab_cost)
+            cost = grab_cost + work_cost
+            if changed:
+                start = time.perf_counter()
+                try:
+                    frame = self.read_frame(subscriber, "reader", name, sequence)
+                    source = None
+                    if source_name is not None:
+                        source = self.read_frame(subscriber, "source_reader", source_name, source_sequence)
+                    else:
+                        self.close_reader(subscriber, "source_reader")
+                    if frame is not None:
+                        changed = bool(subscriber["callback"](frame, timestamp, rects, source))
+                except Exception as e:
+                    print(f"分发帧错误: {str(e)}")
+                    changed = False
+                cost += time.perf_counter() - start
+            results[token] = (changed, cost)
+        return results
+
+    def get_rates(self):
+        """获取所有订阅者的帧率设置
+
+        Returns:
+            dict: token -> (target_fps, min_fps)
+        """
+        with self.lock:
+            return {token: (subscriber["target_fps"], subscriber["min_fps"])
+                    for token, subscriber in self.subscribers.items()}
+
+    def close(self, timeout=2.0):
+        """停止所有工作进程
+
+        Args:
+            timeout: 等待每个进程退出的最长时间（秒）
+        """
+        with self.lock:
+            for subscriber in self.subscribers.values():
+                self.close_reader(subscriber)
+            self.subscribers.clear()
+            for conn in self.connections:
+                try:
+                    conn.send(("stop",))
+                except (OSError, ValueError):
+                    pass
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        for conn in self.connections:
+            conn.close()
+        self.connections = []
+        self.processes = []
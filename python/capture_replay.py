@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 回放捕获后端
+按顺序读取录制的帧文件（.npy 或 OpenCV 可读取的图片）作为虚拟桌面画面
+"""
+
+import os
+
+import numpy as np
+
+from capture_backends import CaptureBackend, crop_region, CAP_BATCH, CAP_HEADLESS, CAP_DETERMINISTIC
+
+# 支持的帧文件扩展名
+FRAME_EXTENSIONS = (".npy", ".png", ".bmp", ".jpg", ".jpeg", ".tif", ".tiff")
+
+
+def load_frame(path):
+    """读取一个帧文件并转换为 BGRA
+
+    Args:
+        path: 帧文件路径
+
+    Returns:
+        np.ndarray: 形状为 (height, width, 4) 的 BGRA 图像数据
+    """
+    if path.lower().endswith(".npy"):
+        frame = np.load(path)
+    else:
+        import cv2
+        frame = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if frame is None:
+            raise ValueError(f"无法读取帧文件: {path}")
+
+    if frame.ndim == 2:
+        frame = np.repeat(frame[:, :, None], 3, axis=2)
+    if frame.shape[2] == 3:
+        # BGR 补充不透明的 alpha 通道
+        alpha = np.full(frame.shape[:2] + (1,), 255, dtype=np.uint8)
+        frame = np.concatenate((frame, alpha), axis=2)
+    return np.ascontiguousarray(frame, dtype=np.uint8)
+
+
+class ReplayCapture(CaptureBackend):
+    name = "replay"
+    capabilities = frozenset({CAP_BATCH, CAP_HEADLESS, CAP_DETERMINISTIC})
+
+    def __init__(self, path, loop=True, preload=True, left=0, top=0):
+        """初始化回放捕获后端
+
+        Args:
+            path: 帧文件目录（按文件名排序）或单个帧文件
+            loop: 播放完最后一帧后是否从头开始，否则停在最后一帧
+            preload: 是否预先把所有帧读入内存，避免回放时的磁盘读取影响测量
+            left: 画面左上角对应的桌面 x 坐标
+            top: 画面左上角对应的桌面 y 坐标
+        """
+        if os.path.isdir(path):
+            names = sorted(name for name in os.listdir(path) if name.lower().endswith(FRAME_EXTENSIONS))
+            self.paths = [os.path.join(path, name) for name in names]
+        else:
+            self.paths = [path]
+        if not self.paths:
+            raise ValueError(f"没有找到帧文件: {path}")
+
+        self.loop = loop
+        self.left = left
+        self.top = top
+        self.frames = [load_frame(p) for p in self.paths] if preload else None
+        self.frame_index = -1
+        self.current = None
+        self.advance()
+
+    def advance(self):
+        """切换到下一帧"""
+        index = self.frame_index + 1
+        if index >= len(self.paths):
+            if not self.loop:
+                return
+            index = 0
+        if index == self.frame_index:
+            return
+        self.frame_index = index
+        self.current = self.frames[index] if self.frames is not None else load_frame(self.paths[index])
+
+    def grab_raw(self, region):
+        """截取当前帧中的指定区域，然后切换到下一帧
+
+        Args:
+            region: 区域信息，包含 x, y, width, height
+
+        Returns:
+            np.ndarray: 形状为 (height, width, 4) 的 BGRA 图像数据
+        """
+        image = crop_region(self.current, region, self.left, self.top)
+        self.advance()
+        return image
+
+    def grab_batch(self, regions):
+        """从当前帧中截取多个区域，然后切换到下一帧
+
+        Args:
+            regions: 区域列表
+
+        Returns:
+            list: 与 regions 一一对应的 BGRA 图像数据
+        """
+        images = [crop_region(self.current, region, self.left, self.top) for region in regions]
+        self.advance()
+        return images
+
+    def monitors(self):
+        """以帧的尺寸作为唯一的显示器"""
+        height, width = self.current.shape[:2]
+        return [{"left": self.left, "top": self.top, "width": width, "height": height}]
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 合成捕获后端
+生成可配置分辨率和变化率的虚拟桌面，无需显示器即可确定性地测试和调优显示管线
+"""
+
+import numpy as np
+
+from capture_backends import CaptureBackend, crop_region, CAP_BATCH, CAP_HEADLESS, CAP_DETERMINISTIC
+
+
+class SyntheticCapture(CaptureBackend):
+    name = "synthetic"
+    capabilities = frozenset({CAP_BATCH, CAP_HEADLESS, CAP_DETERMINISTIC})
+
+    def __init__(self, width=1920, height=1080, monitor_count=1, change_rate=0.5,
+                 change_size=64, changes_per_frame=1, seed=0):
+        """初始化合成捕获后端
+
+        Args:
+            width: 每个虚拟显示器的宽度
+            height: 每个虚拟显示器的高度
+            monitor_count: 虚拟显示器数量（横向排列）
+            change_rate: 每一帧发生变化的概率，0 表示静止画面，1 表示每帧都变化
+            change_size: 每处变化的方块边长（像素）
+            changes_per_frame: 变化帧中变化方块的数量
+            seed: 随机种子，相同参数和种子得到相同的帧序列
+        """
+        self.width = width
+        self.height = height
+        self.monitor_count = monitor_count
+        self.change_rate = change_rate
+        self.change_size = change_size
+        self.changes_per_frame = changes_per_frame
+        self.rng = np.random.default_rng(seed)
+        self.frame_index = 0
+
+        # 以渐变图案初始化整个虚拟桌面
+        total_width = width * monitor_count
+        xs = np.arange(total_width, dtype=np.uint32)
+        ys = np.arange(height, dtype=np.uint32)[:, None]
+        self.desktop = np.empty((height, total_width, 4), dtype=np.uint8)
+        self.desktop[:, :, 0] = (xs * 255 // max(total_width - 1, 1)).astype(np.uint8)
+        self.desktop[:, :, 1] = (ys * 255 // max(height - 1, 1)).astype(np.uint8)
+        self.desktop[:, :, 2] = ((xs + ys) % 256).astype(np.uint8)
+        self.desktop[:, :, 3] = 255
+
+    def advance(self):
+        """生成下一帧：按变化率在随机位置绘制若干纯色方块"""
+        self.frame_index += 1
+        if self.rng.random() >= self.change_rate:
+            return
+        size = self.change_size
+        desktop_height, desktop_width = self.desktop.shape[:2]
+        for _ in range(self.changes_per_frame):
+            x = int(self.rng.integers(0, max(desktop_width - size, 1)))
+            y = int(self.rng.integers(0, max(desktop_height - size, 1)))
+            color = self.rng.integers(0, 256, size=3, dtype=np.uint8)
+            self.desktop[y:y + size, x:x + size, :3] = color
+
+    def grab_raw(self, region):
+        """生成下一帧并截取指定区域
+
+        Args:
+            region: 区域信息，包含 x, y, width, height
+
+        Returns:
+            np.ndarray: 形状为 (height, width, 4) 的 BGRA 图像数据
+        """
+        self.advance()
+        return crop_region(self.desktop, region)
+
+    def grab_batch(self, regions):
+        """生成下一帧并截取多个区域，所有区域来自同一帧
+
+        Args:
+            regions: 区域列表
+
+        Returns:
+            list: 与 regions 一一对应的 BGRA 图像数据
+        """
+        self.advance()
+        return [crop_region(self.desktop, region) for region in regions]
+
+    def monitors(self):
+        """获取虚拟显示器的几何信息"""
+        return [{"left": i * self.width, "top": 0, "width": self.width, "height": self.height}
+                for i in range(self.monitor_count)]
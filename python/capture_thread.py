@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 捕获线程模块
+在后台线程中执行截图和图像转换，通过单槽「最新帧信箱」把结果交给 GUI 线程，
+GUI 线程只负责取出最新的图像并显示
+"""
+
+import time
+import threading
+
+
+class LatestFrameMailbox:
+    def __init__(self):
+        """初始化最新帧信箱
+
+        只保存一帧：新帧到达时若旧帧尚未被取走则直接丢弃旧帧
+        """
+        self.lock = threading.Lock()
+        self.item = None
+        self.timestamp = None
+
+        # 统计信息
+        self.produced = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.last_age = 0.0
+
+    def put(self, item, timestamp):
+        """放入一帧
+
+        Args:
+            item: 帧数据
+            timestamp: 截图时间戳（time.perf_counter）
+        """
+        with self.lock:
+            if self.item is not None:
+                self.dropped += 1
+            self.item = item
+            self.timestamp = timestamp
+            self.produced += 1
+
+    def pending(self):
+        """是否有尚未取走的帧"""
+        return self.item is not None
+
+    def take(self):
+        """取出最新的一帧
+
+        Returns:
+            tuple: (item, timestamp)，没有新帧时返回 None
+        """
+        with self.lock:
+            if self.item is None:
+                return None
+            item, timestamp = self.item, self.timestamp
+            self.item = None
+            self.timestamp = None
+            self.delivered += 1
+        self.last_age = time.perf_counter() - timestamp
+        return item, timestamp
+
+    def get_stats(self):
+        """获取统计信息
+
+        Returns:
+            dict: 包含 produced, delivered, dropped, frame_age_ms
+        """
+        return {
+            "produced": self.produced,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "frame_age_ms": self.last_age * 1000.0
+        }
+
+
+class CaptureWorker(threading.Thread):
+    def __init__(self, scheduler, idle_interval=0.1):
+        """初始化捕获线程
+
+        Args:
+            scheduler: 调度器，线程中循环调用其 step 方法，并按返回的时间休眠
+            idle_interval: 调度器中没有区域时的等待间隔（秒）
+        """
+        super().__init__(name="CaptureWorker", daemon=True)
+        self.scheduler = scheduler
+        self.idle_interval = idle_interval
+        self.active = threading.Event()
+        self.stop_event = threading.Event()
+
+    def run(self):
+        """线程主循环"""
+        while True:
+            # 没有悬浮窗时阻塞等待，不产生空转唤醒
+            self.active.wait()
+            if self.stop_event.is_set():
+                break
+
+            try:
+                delay = self.scheduler.step()
+            except Exception as e:
+                print(f"捕获线程错误: {str(e)}")
+                delay = self.idle_interval
+
+            if delay is None:
+                delay = self.idle_interval
+            self.stop_event.wait(delay)
+
+    def resume(self):
+        """开始或恢复截图"""
+        self.active.set()
+
+    def pause(self):
+        """暂停截图"""
+        self.active.clear()
+
+    def stop(self):
+        """停止线程"""
+        self.stop_event.set()
+        self.active.set()
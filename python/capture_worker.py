@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 多进程捕获的工作进程
+工作进程用自己的捕获后端实例截图，在原始帧上做变化检测，把变化的帧缩小到显示尺寸，
+连同缩小后坐标系中的脏区域交回 GUI 进程，GUI 进程只需生成图像块。
+悬浮窗启用录制、共享内存导出或串流时，变化的原始分辨率帧另外发布到第二块共享内存。
+
+本模块及其依赖都不导入 PySide6：spawn 方式启动的工作进程以本模块代替 main.py 作为
+__main__ 导入（见 capture_pool.ProcessCaptureEngine），不加载 Qt
+"""
+
+import os
+import math
+import time
+
+from frame_export import FrameExporter
+
+
+def reduce_to_size(frame, width, height, cv2=None):
+    """把帧缩小到不超过显示尺寸（工作进程中使用，不依赖 Qt）
+
+    Args:
+        frame: BGRA 图像数据
+        width: 显示宽度
+        height: 显示高度
+        cv2: OpenCV 模块，提供时缩放到显示尺寸，否则按整数倍取样
+
+    Returns:
+        np.ndarray: 缩小后的图像数据，无需缩小时返回原帧
+    """
+    source_height, source_width = frame.shape[:2]
+    if width >= source_width and height >= source_height:
+        return frame
+    if cv2 is not None:
+        # 整数倍缩小时区域插值有快速路径，非整数倍时区域插值比双线性慢数倍
+        integral = source_width % width == 0 and source_height % height == 0
+        interpolation = cv2.INTER_AREA if integral else cv2.INTER_LINEAR
+        return cv2.resize(frame, (width, height), interpolation=interpolation)
+    factor = min(source_width // max(width, 1), source_height // max(height, 1))
+    if factor >= 2:
+        return frame[::factor, ::factor]
+    return frame
+
+
+def reduce_rects(rects, source_size, size):
+    """把原始帧上的脏区域换算到缩小后的帧上
+
+    缩小时输出像素由对应的原始像素及其相邻像素插值得到，换算后向外扩展 1 像素
+
+    Args:
+        rects: 原始帧上的脏矩形列表，每项为 (x, y, width, height)
+        source_size: 原始帧尺寸 (width, height)
+        size: 缩小后的尺寸 (width, height)
+
+    Returns:
+        list: 缩小后的帧上的脏矩形列表
+    """
+    source_width, source_height = source_size
+    width, height = size
+    if (width, height) == (source_width, source_height):
+        return list(rects)
+    scale_x = width / source_width
+    scale_y = height / source_height
+    result = []
+    for x, y, w, h in rects:
+        left = max(0, int(math.floor(x * scale_x)) - 1)
+        top = max(0, int(math.floor(y * scale_y)) - 1)
+        right = min(width, int(math.ceil((x + w) * scale_x)) + 1)
+        bottom = min(height, int(math.ceil((y + h) * scale_y)) + 1)
+        if right > left and bottom > top:
+            result.append((left, top, right - left, bottom - top))
+    return result
+
+
+def worker_main(index, backend, backend_options, conn):
+    """工作进程主循环
+
+    Args:
+        index: 工作进程序号
+        backend: 捕获后端名称
+        backend_options: 传给后端构造函数的参数
+        conn: 与 GUI 进程通信的管道
+    """
+    from capture_backends import create_backend
+    from frame_diff import FrameChangeDetector
+    from screen_map import RegionStitcher, region_rects
+    try:
+        import cv2
+    except ImportError:
+        cv2 = None
+
+    capture = create_backend(backend, **backend_options)
+    # 每个区域的状态：token -> dict
+    regions = {}
+    generation = 0
+
+    def close_exporter(state, key="exporter"):
+        if state[key] is not None:
+            state[key].close()
+            state[key] = None
+
+    def publish(state, key, token, frame, timestamp):
+        # 首帧或尺寸变化时（重新）创建共享内存
+        nonlocal generation
+        exporter = state[key]
+        if exporter is None or exporter.shape != frame.shape:
+            close_exporter(state, key)
+            generation += 1
+            name = f"lc_{os.getpid()}_{token}_{generation}"
+            exporter = FrameExporter(name, frame.shape[0], frame.shape[1], frame.shape[2])
+            state[key] = exporter
+        exporter.publish(frame, timestamp)
+        return exporter
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        command = message[0]
+
+        if command == "add":
+            _, token, region, output_size = message
+            regions[token] = {
+                "region": region,
+                "output_size": output_size,
+                "detector": FrameChangeDetector(),
+                "exporter": None,
+                "outputs": False,
+                "source_exporter": None,
+                "stitcher": RegionStitcher(region) if "parts" in region else None
+            }
+        elif command == "remove":
+            state = regions.pop(message[1], None)
+            if state is not None:
+                close_exporter(state)
+                close_exporter(state, "source_exporter")
+        elif command == "region":
+            state = regions.get(message[1])
+            if state is not None:
+                state["region"] = message[2]
+                state["stitcher"] = RegionStitcher(message[2]) if "parts" in message[2] else None
+                state["detector"].reset()
+        elif command == "size":
+            state = regions.get(message[1])
+            if state is not None:
+                state["output_size"] = message[2]
+                # 下一帧按新尺寸整帧发布
+                state["detector"].reset()
+        elif command == "outputs":
+            state = regions.get(message[1])
+            if state is not None:
+                state["outputs"] = message[2]
+                if message[2]:
+                    # 下一帧视为变化，输出从完整画面开始
+                    state["detector"].reset()
+                else:
+                    close_exporter(state, "source_exporter")
+        elif command == "tick":
+            tokens = [token for token in message[1] if token in regions]
+            results = {}
+            if tokens:
+                timestamp = time.perf_counter()
+                # 跨显示器的区域按子矩形截取，与其他区域在同一次批量截图中完成
+                rects = []
+                for token in tokens:
+                    rects.extend(region_rects(regions[token]["region"]))
+                try:
+                    grabbed = capture.grab_batch(rects)
+                except Exception as e:
+                    print(f"工作进程 {index} 截图错误: {str(e)}")
+                    grabbed = []
+                images = []
+                offset = 0
+                for token in tokens:
+                    stitcher = regions[token]["stitcher"]
+                    if stitcher is None:
+                        images.append(grabbed[offset] if offset < len(grabbed) else None)
+                        offset += 1
+                    else:
+                        parts = grabbed[offset:offset + len(stitcher.rects)]
+                        images.append(stitcher.stitch(parts) if len(parts) == len(stitcher.rects) else None)
+                        offset += len(stitcher.rects)
+                grab_cost = (time.perf_counter() - timestamp) / len(tokens)
+                for token, image in zip(tokens, images):
+                    if image is None:
+                        continue
+                    start = time.perf_counter()
+                    state = regions[token]
+                    # 先在原始帧上做廉价的变化检测，只有变化的帧才缩小和发布
+                    dirty = state["detector"].detect(image)
+                    changed = bool(dirty)
+                    source = None
+                    if changed:
+                        width, height = state["output_size"]
+                        frame = reduce_to_size(image, width, height, cv2)
+                        dirty = reduce_rects(dirty, (image.shape[1], image.shape[0]),
+                                             (frame.shape[1], frame.shape[0]))
+                        publish(state, "exporter", token, frame, timestamp)
+                        if state["outputs"]:
+                            source = publish(state, "source_exporter", token, image, timestamp)
+                    exporter = state["exporter"]
+                    results[token] = (changed, exporter.name if exporter else None,
+                                      exporter.sequence if exporter else 0,
+                                      timestamp, grab_cost, time.perf_counter() - start, dirty,
+                                      source.name if source else None, source.sequence if source else 0)
+            conn.send(results)
+        elif command == "stop":
+            break
+
+    for state in regions.values():
+        close_exporter(state)
+        close_exporter(state, "source_exporter")
+    capture.close()
+    conn.close()
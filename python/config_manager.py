@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 配置管理模块
+读写 config.json：捕获后端（capture.method）、最近选择的区域（selected_region）、
+跟随的目标窗口（target_window）和区域监视（watches）。
+上次退出时打开的悬浮窗会话单独保存在同目录的 session.json 中，
+窗口移动和缩放时只重写会话文件，config.json 仅在配置项变化时写入。
+
+写入时先写临时文件再替换，程序中途退出也不会留下损坏的配置文件。
+本模块只依赖标准库，启动时不引入任何重量级模块
+"""
+
+import os
+import json
+
+# 会话中每个窗口必须包含的字段
+SESSION_KEYS = ("region", "logical_rect", "position", "size")
+
+# 会话文件名，与配置文件位于同一目录
+SESSION_FILE = "session.json"
+
+
+def read_json(path):
+    """读取 JSON 文件
+
+    Returns:
+        dict: 文件内容，文件不存在或无法解析时返回 None
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"读取配置文件错误: {str(e)}")
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def write_json(path, data):
+    """先写临时文件再替换，写入 JSON 文件
+
+    Returns:
+        bool: 是否保存成功
+    """
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(temp_path, path)
+    except OSError as e:
+        print(f"保存配置文件错误: {str(e)}")
+        return False
+    return True
+
+
+class ConfigManager:
+    def __init__(self, path, session_path=None):
+        """读取配置文件
+
+        Args:
+            path: 配置文件路径，不存在时使用空配置，保存时创建
+            session_path: 会话文件路径，默认为配置文件目录下的 session.json
+        """
+        self.path = path
+        self.session_path = session_path or os.path.join(os.path.dirname(os.path.abspath(path)), SESSION_FILE)
+        self.data = self.load()
+        # 配置项是否有未保存的修改
+        self.dirty = False
+
+    def load(self):
+        """读取配置文件
+
+        Returns:
+            dict: 配置内容，文件不存在或无法解析时返回空字典
+        """
+        return read_json(self.path) or {}
+
+    def save(self):
+        """保存配置文件
+
+        Returns:
+            bool: 是否保存成功
+        """
+        if not write_json(self.path, self.data):
+            return False
+        self.dirty = False
+        return True
+
+    def get(self, key, default=None):
+        """读取顶层配置项"""
+        return self.data.get(key, default)
+
+    def backend(self, default="mss"):
+        """配置的捕获后端名称（capture.method）"""
+        capture = self.data.get("capture")
+        if isinstance(capture, dict) and capture.get("method"):
+            return capture["method"]
+        return default
+
+    def set_backend(self, name):
+        """设置捕获后端名称"""
+        capture = self.data.get("capture")
+        if not isinstance(capture, dict):
+            capture = self.data["capture"] = {}
+        self.set_item(capture, "method", name)
+
+    def set_item(self, data, key, value):
+        """设置配置项，值变化时标记为需要保存"""
+        if data.get(key) != value:
+            data[key] = value
+            self.dirty = True
+
+    def set_selected_region(self, region, anchor=None):
+        """记录最近选择的区域（物理像素），无界面模式默认使用该区域
+
+        Args:
+            region: 区域信息
+            anchor: 锚定信息（见 window_tracker.make_anchor），提供时同时记录区域相对目标窗口的偏移
+        """
+        selected = {key: region[key] for key in ("x", "y", "width", "height")}
+        if anchor is not None:
+            selected["relative_x"] = anchor["relative_x"]
+            selected["relative_y"] = anchor["relative_y"]
+        self.set_item(self.data, "selected_region", selected)
+
+    def set_target_window(self, target):
+        """记录最近锚定的目标窗口
+
+        Args:
+            target: 窗口信息，包含 hwnd, process_id, title（见 window_tracker.WindowTracker.find_window）
+        """
+        self.set_item(self.data, "target_window", {key: target[key] for key in ("hwnd", "process_id", "title")})
+
+    def load_session(self):
+        """读取上次保存的悬浮窗会话
+
+        会话文件不存在时读取旧版本保存在 config.json 中的 session
+
+        Returns:
+            tuple: (窗口状态列表, 缩放模式)，窗口状态见 FloatingWindow.session_state；
+                无效的窗口被忽略，缩放模式未保存时为 None
+        """
+        session = read_json(self.session_path)
+        if session is None:
+            session = self.data.get("session")
+        if not isinstance(session, dict):
+            return [], None
+        windows = []
+        for state in session.get("windows") or []:
+            if not isinstance(state, dict) or any(key not in state for key in SESSION_KEYS):
+                print(f"忽略无效的会话窗口: {state}")
+                continue
+            windows.append(state)
+        return windows, session.get("scale_mode")
+
+    def save_session(self, windows, scale_mode=None):
+        """保存当前的悬浮窗会话
+
+        会话写入会话文件后，config.json 中旧版本的 session 标记为删除，下次保存配置时移除
+
+        Args:
+            windows: 窗口状态列表，见 FloatingWindow.session_state
+            scale_mode: 缩放模式
+
+        Returns:
+            bool: 是否保存成功
+        """
+        if not write_json(self.session_path, {"windows": windows, "scale_mode": scale_mode}):
+            return False
+        if self.data.pop("session", None) is not None:
+            self.dirty = True
+        return True
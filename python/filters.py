@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 滤镜模块
+在变化检测之后、QImage 转换之前对帧做可组合的变换（灰度、二值化、对比度、反色、裁剪、旋转）。
+所有滤镜都基于 NumPy 向量化运算，输出写入预分配的缓冲区，并且只处理脏矩形：
+逐像素滤镜的脏矩形不变，裁剪和旋转把脏矩形映射到输出坐标
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# 大于该像素数的脏矩形在线程池中按行分段并行处理
+PARALLEL_PIXELS = 256 * 256
+
+
+class Filter:
+    """滤镜基类
+
+    子类实现 prepare（根据输入形状分配缓冲区并返回输出形状）和 process（处理一个脏矩形）
+    """
+
+    # 滤镜名称，用于统计和配置
+    name = ""
+    # 是否为逐像素滤镜（输出与输入同尺寸，脏矩形不变，可以按行分段并行）
+    pointwise = True
+
+    def __init__(self):
+        self.buffer = None
+
+    def spec(self):
+        """滤镜的配置字符串，可由 parse_filters 还原"""
+        return self.name
+
+    def output_size(self, width, height):
+        """输入尺寸为 width x height 时的输出尺寸"""
+        return width, height
+
+    def prepare(self, shape, scale):
+        """按输入形状分配输出缓冲区
+
+        Args:
+            shape: 输入帧形状 (height, width, 4)
+            scale: 输入帧相对原始区域的缩放比例
+
+        Returns:
+            tuple: 输出帧形状
+        """
+        if self.buffer is None or self.buffer.shape != tuple(shape):
+            self.buffer = np.zeros(shape, dtype=np.uint8)
+            self.buffer[:, :, 3] = 255
+        return tuple(shape)
+
+    def map_rect(self, rect, shape):
+        """把输入坐标中的脏矩形映射到输出坐标，完全落在输出之外时返回 None"""
+        return rect
+
+    def output(self, frame):
+        """本帧的输出图像"""
+        return self.buffer
+
+    def process(self, frame, rect):
+        """处理输入帧中的一个矩形，写入输出缓冲区
+
+        Args:
+            frame: 输入帧
+            rect: 脏矩形 (x, y, width, height)
+        """
+        raise NotImplementedError
+
+
+class LutFilter(Filter):
+    """查表实现的逐像素滤镜，对 B、G、R 三个通道使用同一张 256 项的表"""
+
+    def __init__(self):
+        super().__init__()
+        self.lut = np.arange(256, dtype=np.uint8)
+
+    def process(self, frame, rect):
+        x, y, width, height = rect
+        source = frame[y:y + height, x:x + width, :3]
+        np.take(self.lut, source, out=self.buffer[y:y + height, x:x + width, :3])
+
+
+class Invert(LutFilter):
+    name = "invert"
+
+    def __init__(self):
+        """反色"""
+        super().__init__()
+        self.lut = 255 - np.arange(256, dtype=np.uint8)
+
+
+class Contrast(LutFilter):
+    name = "contrast"
+
+    def __init__(self, alpha=1.5, beta=0.0):
+        """对比度增强：输出 = (输入 - 128) * alpha + 128 + beta
+
+        Args:
+            alpha: 对比度系数
+            beta: 亮度偏移
+        """
+        super().__init__()
+        self.alpha = float(alpha)
+        self.beta = float(beta)
+        values = (np.arange(256, dtype=np.float32) - 128.0) * self.alpha + 128.0 + self.beta
+        self.lut = np.clip(values, 0, 255).astype(np.uint8)
+
+    def spec(self):
+        return f"{self.name}:{self.alpha:g}:{self.beta:g}"
+
+
+class Grayscale(Filter):
+    name = "gray"
+
+    def __init__(self):
+        """灰度（整数加权：0.114 B + 0.587 G + 0.299 R）"""
+        super().__init__()
+        self.weights = (29, 150, 77)
+
+    def gray(self, frame, rect):
+        """计算矩形区域的灰度值"""
+        x, y, width, height = rect
+        source = frame[y:y + height, x:x + width]
+        gray = np.multiply(source[:, :, 0], self.weights[0], dtype=np.uint16)
+        gray += np.multiply(source[:, :, 1], self.weights[1], dtype=np.uint16)
+        gray += np.multiply(source[:, :, 2], self.weights[2], dtype=np.uint16)
+        gray >>= 8
+        return gray.astype(np.uint8)
+
+    def process(self, frame, rect):
+        x, y, width, height = rect
+        gray = self.gray(frame, rect)
+        self.buffer[y:y + height, x:x + width, :3] = gray[:, :, None]
+
+
+class Threshold(Grayscale):
+    name = "threshold"
+
+    def __init__(self, value=128):
+        """二值化：灰度大于 value 为白色，否则为黑色
+
+        Args:
+            value: 阈值 0-255
+        """
+        super().__init__()
+        self.value = int(value)
+        self.lut = np.where(np.arange(256) > self.value, 255, 0).astype(np.uint8)
+
+    def spec(self):
+        return f"{self.name}:{self.value}"
+
+    def process(self, frame, rect):
+        x, y, width, height = rect
+        gray = self.lut[self.gray(frame, rect)]
+        self.buffer[y:y + height, x:x + width, :3] = gray[:, :, None]
+
+
+class Crop(Filter):
+    name = "crop"
+    pointwise = False
+
+    def __init__(self, x, y, width, height):
+        """在区域内裁剪（输出是输入的视图，不复制）
+
+        Args:
+            x, y, width, height: 裁剪矩形，以原始区域的物理像素为单位，
+                帧在此之前被缩小时按相同比例换算；前面有旋转时以旋转后的坐标为准
+        """
+        super().__init__()
+        self.rect = (int(x), int(y), int(width), int(height))
+        self.scaled = self.rect
+
+    def spec(self):
+        return f"{self.name}:" + ":".join(str(value) for value in self.rect)
+
+    def output_size(self, width, height):
+        x, y, crop_width, crop_height = self.clip(self.rect, width, height)
+        return crop_width, crop_height
+
+    @staticmethod
+    def clip(rect, width, height):
+        """把裁剪矩形限制在 width x height 之内，至少保留 1 像素"""
+        x = min(max(rect[0], 0), width - 1)
+        y = min(max(rect[1], 0), height - 1)
+        return x, y, max(1, min(rect[2], width - x)), max(1, min(rect[3], height - y))
+
+    def prepare(self, shape, scale):
+        scaled = tuple(int(round(value * scale)) for value in self.rect)
+        self.scaled = self.clip(scaled, shape[1], shape[0])
+        return (self.scaled[3], self.scaled[2]) + tuple(shape[2:])
+
+    def map_rect(self, rect, shape):
+        cx, cy, cw, ch = self.scaled
+        left = max(rect[0], cx)
+        top = max(rect[1], cy)
+        right = min(rect[0] + rect[2], cx + cw)
+        bottom = min(rect[1] + rect[3], cy + ch)
+        if right <= left or bottom <= top:
+            return None
+        return left - cx, top - cy, right - left, bottom - top
+
+    def output(self, frame):
+        x, y, width, height = self.scaled
+        return frame[y:y + height, x:x + width]
+
+    def process(self, frame, rect):
+        pass
+
+
+class Rotate(Filter):
+    name = "rotate"
+    pointwise = False
+
+    def __init__(self, angle=90):
+        """顺时针旋转
+
+        Args:
+            angle: 90、180 或 270
+        """
+        super().__init__()
+        if angle not in (90, 180, 270):
+            raise ValueError(f"不支持的旋转角度: {angle}")
+        self.angle = int(angle)
+        # np.rot90 的 k 为逆时针旋转次数
+        self.k = -(self.angle // 90)
+
+    def spec(self):
+        return f"{self.name}:{self.angle}"
+
+    def output_size(self, width, height):
+        return (width, height) if self.angle == 180 else (height, width)
+
+    def prepare(self, shape, scale):
+        height, width = shape[:2]
+        out_width, out_height = self.output_size(width, height)
+        return super().prepare((out_height, out_width) + tuple(shape[2:]), scale)
+
+    def map_rect(self, rect, shape):
+        x, y, width, height = rect
+        frame_height, frame_width = shape[:2]
+        if self.angle == 90:
+            return frame_height - y - height, x, height, width
+        if self.angle == 180:
+            return frame_width - x - width, frame_height - y - height, width, height
+        return y, frame_width - x - width, height, width
+
+    def process(self, frame, rect):
+        x, y, width, height = rect
+        ox, oy, out_width, out_height = self.map_rect(rect, frame.shape)
+        np.copyto(self.buffer[oy:oy + out_height, ox:ox + out_width],
+                  np.rot90(frame[y:y + height, x:x + width], self.k))
+
+
+# 滤镜名称 -> 类
+FILTERS = {
+    cls.name: cls for cls in (Grayscale, Threshold, Contrast, Invert, Crop, Rotate)
+}
+
+
+def create_filter(spec):
+    """按配置字符串创建滤镜
+
+    Args:
+        spec: "名称" 或 "名称:参数1:参数2..."，如 "threshold:100"、"rotate:90"、"crop:0:0:640:360"
+
+    Returns:
+        Filter: 滤镜实例
+
+    Raises:
+        ValueError: 未知的滤镜或参数错误
+    """
+    name, *args = spec.strip().split(":")
+    if name not in FILTERS:
+        raise ValueError(f"未知的滤镜: {name}，可用滤镜: {', '.join(sorted(FILTERS))}")
+    try:
+        return FILTERS[name](*(float(arg) if "." in arg else int(arg) for arg in args))
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"滤镜参数错误: {spec} ({str(e)})")
+
+
+def parse_filters(text):
+    """解析逗号分隔的滤镜配置，如 "gray,contrast:2,rotate:90"
+
+    Returns:
+        list: 滤镜实例列表
+    """
+    return [create_filter(spec) for spec in text.split(",") if spec.strip()]
+
+
+class FilterPipeline:
+    # 所有悬浮窗共用的线程池，NumPy 运算期间释放 GIL，可与捕获和其他窗口并行
+    pool = None
+
+    def __init__(self, filters, source_size, workers=None):
+        """初始化滤镜管线
+
+        Args:
+            filters: 滤镜列表，按顺序应用
+            source_size: 原始区域尺寸 (width, height)，裁剪坐标以此为准
+            workers: 线程池大小，0 表示在调用线程中处理；默认为 CPU 核心数（最多 4 个），单核时为 0
+        """
+        self.filters = list(filters)
+        self.source_size = tuple(source_size)
+        if workers is None:
+            workers = min(os.cpu_count() or 1, 4)
+            if workers < 2:
+                workers = 0
+        self.workers = workers
+        if workers > 0 and FilterPipeline.pool is None:
+            FilterPipeline.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="FilterWorker")
+        self.input_shape = None
+        self.shapes = []
+
+    def spec(self):
+        """管线的配置字符串"""
+        return ",".join(filter_.spec() for filter_ in self.filters)
+
+    def output_size(self):
+        """原始区域经过所有滤镜后的输出尺寸 (width, height)"""
+        width, height = self.source_size
+        for filter_ in self.filters:
+            width, height = filter_.output_size(width, height)
+        return width, height
+
+    def run(self, filter_, frame, rects):
+        """用线程池并行处理逐像素滤镜的大矩形"""
+        tasks = []
+        for rect in rects:
+            x, y, width, height = rect
+            if self.workers and filter_.pointwise and width * height >= PARALLEL_PIXELS:
+                band = (height + self.workers - 1) // self.workers
+                for top in range(y, y + height, band):
+                    tasks.append((x, top, width, min(band, y + height - top)))
+            else:
+                filter_.process(frame, rect)
+        if tasks:
+            list(self.pool.map(lambda rect: filter_.process(frame, rect), tasks))
+
+    def apply(self, frame, rects, stats=None):
+        """对帧的脏矩形依次应用所有滤镜
+
+        Args:
+            frame: BGRA 图像数据
+            rects: 脏矩形列表，每项为 (x, y, width, height)
+            stats: FrameStats 对象，提供时记录每个滤镜的耗时
+
+        Returns:
+            tuple: (输出帧, 输出坐标中的脏矩形列表)
+        """
+        if frame.shape != self.input_shape:
+            # 尺寸变化时重新分配缓冲区，并整帧处理
+            self.input_shape = frame.shape
+            scale = frame.shape[1] / self.source_size[0]
+            shape = frame.shape
+            self.shapes = []
+            for filter_ in self.filters:
+                self.shapes.append(shape)
+                shape = filter_.prepare(shape, scale)
+            rects = [(0, 0, frame.shape[1], frame.shape[0])]
+
+        for filter_, shape in zip(self.filters, self.shapes):
+            start = time.perf_counter()
+            self.run(filter_, frame, rects)
+            mapped = (filter_.map_rect(rect, shape) for rect in rects)
+            rects = [rect for rect in mapped if rect is not None]
+            frame = filter_.output(frame)
+            if stats is not None:
+                stats.record_filter(filter_.name, time.perf_counter() - start)
+        return frame, rects
@@ -3,29 +3,90 @@
 
 """
 LandscapeCutter 悬浮窗模块
-支持实时显示、拖动和双击关闭
+支持实时显示、拖动、调整大小、滚轮缩放、双击关闭和回看最近的画面
 """
 
-from PySide6.QtWidgets import QLabel
-from PySide6.QtGui import QImage, QPixmap, QPainter, QColor, QPen
-from PySide6.QtCore import Qt, QTimer, QPoint, QRectF
+from PySide6.QtWidgets import QLabel, QMenu
+from PySide6.QtGui import QPixmap, QPainter, QColor, QPen, QFont, QImage
+from PySide6.QtCore import Qt, QTimer, QPoint, QPointF, QRect, QRectF, Signal
+
+import math
+import time
+import bisect
+import threading
 
 import numpy as np
 
+from render_manager import RenderMgr, FrameScaler
+from capture_thread import LatestFrameMailbox
+from frame_diff import FrameChangeDetector
+from stats import FrameStats
+from filters import FilterPipeline, create_filter
+from screen_map import RegionStitcher
+
 class FloatingWindow(QLabel):
-    def __init__(self, capture, region, logical_rect):
+    # 悬浮窗关闭信号
+    closed = Signal(object)
+    # 捕获线程放入新帧的通知信号（跨线程排队到 GUI 线程）
+    frame_ready = Signal()
+    # 请求把本悬浮窗改为区域监视
+    watch_requested = Signal(object)
+    # 请求把本悬浮窗的区域锚定到下方的目标窗口（True）或取消锚定（False）
+    anchor_requested = Signal(object, bool)
+    # 位置、大小或滤镜变化（用于保存会话）
+    state_changed = Signal()
+    
+    def __init__(self, capture, region, logical_rect, broker=None, threaded=False,
+                 target_fps=60, min_fps=5, scale_mode="auto"):
         """初始化悬浮窗
         
         Args:
             capture: 捕获对象
             region: 区域信息，包含 x, y, width, height（物理像素，用于截图）
             logical_rect: 逻辑矩形，包含 x, y, width, height（用于设置窗口位置和大小）
+            broker: 捕获调度器，提供时由调度器统一截图并推送帧，不再使用自身定时器
+            threaded: 调度器是否运行在后台捕获线程中，为 True 时图像转换在捕获线程完成，
+                GUI 线程只从信箱中取出最新帧显示
+            target_fps: 画面变化时的目标帧率
+            min_fps: 画面静止时调度器允许降到的最低帧率
+            scale_mode: 缩放模式，见 render_manager.SCALE_MODES
         """
         super().__init__()
         
         # 初始化参数
         self.capture = capture
         self.region = region
+        # 跨显示器的区域在没有捕获调度器时自行拼接
+        self.stitcher = RegionStitcher(region) if "parts" in region else None
+        self.broker = broker
+        self.broker_token = None
+        self.threaded = threaded
+        self.target_fps = target_fps
+        self.min_fps = min_fps
+        self.render_mgr = RenderMgr()
+        self.mailbox = LatestFrameMailbox()
+        self.change_detector = FrameChangeDetector()
+        # 录制、导出和串流按原始分辨率的帧单独判断变化，缩小后看不出的细小变化也会输出
+        self.output_detector = FrameChangeDetector()
+        self.frame_stats = FrameStats()
+        self.scaler = FrameScaler(scale_mode)
+        # 滤镜管线，为 None 时不做变换
+        self.filters = None
+        # 录制器和共享内存导出器，启用时捕获回调把变化的帧交给它们
+        self.recorder = None
+        self.exporter = None
+        self.export_lock = threading.Lock()
+        # 串流区域（stream_server.StreamSource），有客户端时把变化的帧交给它编码
+        self.stream = None
+        # 锚定的目标窗口（见 window_tracker.make_anchor）和窗口锚定（window_tracker.WindowAnchors），
+        # 锚定时区域随目标窗口移动
+        self.anchor = None
+        self.anchors = None
+        # 回放缓存，启用时捕获回调把变化的帧交给它；rewind_time 不为 None 时处于回看模式
+        self.history = None
+        self.rewind_time = None
+        self.scrubbing = False
+        self.scrub_height = 22
         self.logical_x = logical_rect["x"]
         self.logical_y = logical_rect["y"]
         self.logical_width = logical_rect["width"]
@@ -39,8 +100,12 @@ class FloatingWindow(QLabel):
         self.setWindowFlags(Qt.Window | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         self.setAttribute(Qt.WA_TranslucentBackground)
         
-        # 设置窗口大小为逻辑尺寸（与用户选择的矩形大小一致）
-        self.setFixedSize(self.logical_width, self.logical_height)
+        # 初始窗口大小为逻辑尺寸（与用户选择的矩形大小一致），之后可调整和缩放
+        self.display_width = self.logical_width
+        self.display_height = self.logical_height
+        self.aspect_ratio = self.logical_width / self.logical_height
+        self.setMinimumSize(32, 32)
+        self.resize(self.logical_width, self.logical_height)
         
         # 将窗口移动到选择区域的左上角位置（使用逻辑坐标）
         self.move(self.logical_x, self.logical_y)
@@ -48,25 +113,149 @@ class FloatingWindow(QLabel):
         print(f"悬浮窗大小: {self.logical_width} x {self.logical_height}")
         print(f"悬浮窗位置: ({self.logical_x}, {self.logical_y})")
         
+        # 持久的后备位图，只把变化的图块画到上面
+        self.backing_pixmap = QPixmap(self.logical_width, self.logical_height)
+        self.backing_pixmap.fill(Qt.black)
+        
         # 拖拽相关
         self.dragging = False
         self.drag_position = QPoint()
         
+        # 调整大小相关：在右边缘或下边缘附近按下鼠标时调整大小
+        self.resize_margin = 8
+        self.resizing = False
+        self.resize_edges = (False, False)
+        self.resize_origin = QPoint()
+        self.resize_start_size = None
+        self.setMouseTracking(True)
+        
         # 双击相关
         self.last_click_time = 0
         self.double_click_threshold = 300  # 毫秒
         self.click_count = 0
         
-        # 初始化定时器，用于实时刷新
+        # 统计浮层，显示时每 500ms 刷新一次浮层区域
+        self.show_overlay = False
+        self.overlay_rect = QRect(4, 4, 300, 58)
+        self.overlay_timer = QTimer(self)
+        self.overlay_timer.timeout.connect(lambda: self.update(self.overlay_rect))
+        
+        # 初始化定时器，仅在没有捕获调度器时用于实时刷新；窗口显示后才开始截图
         self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(16)  # ~60 fps，减少延迟到约16ms
+        if self.broker is None:
+            self.timer.timeout.connect(self.update_frame)
+        elif threaded:
+            self.frame_ready.connect(self.present_frame, Qt.QueuedConnection)
     
-    def paintEvent(self, event):
-        """绘制事件 - 添加边框效果"""
-        super().paintEvent(event)
+    def start_capture(self):
+        """开始截图（窗口显示时调用）"""
+        if self.broker is None:
+            if not self.timer.isActive():
+                self.timer.start(int(1000 / self.target_fps))
+            return
+        if self.broker_token is not None:
+            return
+        if self.threaded:
+            # 捕获线程负责截图和转换，放入新帧后通知 GUI 线程取最新帧，无需轮询
+            self.broker_token = self.broker.register(self.region, self.produce_frame, self.target_fps,
+                                                     self.min_fps, self.frame_stats)
+        else:
+            # 由调度器统一截图，与其他悬浮窗共用一次屏幕读取
+            self.broker_token = self.broker.register(self.region, self.show_frame, self.target_fps,
+                                                     self.min_fps, self.frame_stats)
+        self.broker.set_output_size(self.broker_token, *self.capture_size())
+        if self.has_outputs():
+            self.broker.set_outputs(self.broker_token, True)
+        if self.anchor is not None and self.anchors is not None:
+            self.anchors.add(self.broker_token, self.anchor, self.region, self.frame_stats)
+        # 后备位图可能已过时，第一帧整帧绘制
+        self.change_detector.reset()
+    
+    def stop_capture(self):
+        """停止截图（窗口隐藏或关闭时调用）"""
+        self.timer.stop()
+        if self.broker is not None and self.broker_token is not None:
+            self.release_anchor()
+            self.broker.unregister(self.broker_token)
+            self.broker_token = None
+    
+    def current_region(self):
+        """区域的当前位置，锚定时为跟随目标窗口后的位置"""
+        if self.anchors is not None and self.broker_token is not None:
+            region = self.anchors.region(self.broker_token)
+            if region is not None:
+                return region
+        return self.region
+    
+    def release_anchor(self):
+        """从窗口锚定中移除本区域，区域停留在最后跟随到的位置"""
+        if self.anchors is None or self.broker_token is None:
+            return
+        self.region = self.current_region()
+        self.anchors.remove(self.broker_token)
+    
+    def set_anchor(self, anchors, anchor):
+        """把区域锚定到目标窗口或取消锚定
+        
+        Args:
+            anchors: 窗口锚定（window_tracker.WindowAnchors）
+            anchor: 锚定信息，包含 hwnd, relative_x, relative_y（见 window_tracker.make_anchor），
+                为 None 时取消锚定
+        """
+        self.release_anchor()
+        self.anchors = anchors
+        self.anchor = anchor
+        if anchor is not None and self.broker_token is not None:
+            anchors.add(self.broker_token, anchor, self.region, self.frame_stats)
+        self.change_detector.reset()
+        self.state_changed.emit()
+    
+    def session_state(self):
+        """用于保存会话的窗口状态
         
+        Returns:
+            dict: 包含 region（物理区域）, logical_rect（选择时的逻辑矩形）, position, size,
+                target_fps, min_fps, filters（滤镜配置字符串列表）和 anchor（锚定信息，未锚定时为 None）
+        """
+        return {
+            "region": self.current_region(),
+            "logical_rect": {
+                "x": self.logical_x,
+                "y": self.logical_y,
+                "width": self.logical_width,
+                "height": self.logical_height
+            },
+            "position": [self.x(), self.y()],
+            "size": [self.width(), self.height()],
+            "target_fps": self.target_fps,
+            "min_fps": self.min_fps,
+            "filters": self.filter_specs(),
+            "anchor": self.anchor
+        }
+    
+    def showEvent(self, event):
+        """显示事件：开始截图"""
+        self.start_capture()
+        super().showEvent(event)
+    
+    def hideEvent(self, event):
+        """隐藏事件：停止截图"""
+        self.stop_capture()
+        super().hideEvent(event)
+    
+    def moveEvent(self, event):
+        """移动事件"""
+        self.state_changed.emit()
+        super().moveEvent(event)
+    
+    def paintEvent(self, event):
+        """绘制事件 - 绘制后备位图并添加边框效果"""
         painter = QPainter(self)
+        
+        # 只绘制需要更新的区域
+        dirty_rect = event.rect()
+        painter.drawPixmap(dirty_rect, self.backing_pixmap, dirty_rect)
+        
         painter.setRenderHint(QPainter.Antialiasing)
         
         # 绘制边框
@@ -75,34 +264,804 @@ class FloatingWindow(QLabel):
         painter.setPen(pen)
         painter.setBrush(Qt.NoBrush)
         painter.drawRect(rect)
+        
+        if self.show_overlay and dirty_rect.intersects(self.overlay_rect):
+            self.draw_overlay(painter)
+        
+        if self.rewind_time is not None and dirty_rect.intersects(self.scrub_rect()):
+            self.draw_scrub_bar(painter)
+    
+    def draw_overlay(self, painter):
+        """绘制统计浮层"""
+        stats = self.get_stats()
+        lines = [
+            f"{stats['fps']:.0f} FPS  帧龄 {stats['age']['p50_ms']:.1f}ms  "
+            f"跳过 {stats['skip_ratio']:.0%}  丢帧 {stats['dropped']}",
+            f"p95 截图 {stats['capture']['p95_ms']:.1f} 转换 {stats['convert']['p95_ms']:.1f} "
+            f"缩放 {stats['scale']['p95_ms']:.1f} 绘制 {stats['paint']['p95_ms']:.1f} ms",
+            f"复制 {stats['bytes_copied'] / 1e6:.1f} MB"
+        ]
+        if stats["filters"]:
+            # 显示最耗时的滤镜
+            name, filter_stats = max(stats["filters"].items(), key=lambda item: item[1]["p95_ms"])
+            lines[2] += f"  滤镜 {name} p95 {filter_stats['p95_ms']:.1f}ms"
+        if stats["track"]["count"]:
+            lines[2] += f"  跟随 p95 {stats['track']['p95_ms']:.3f}ms"
+        painter.fillRect(self.overlay_rect, QColor(0, 0, 0, 160))
+        painter.setPen(QColor(255, 255, 255))
+        painter.setFont(QFont("Arial", 8))
+        line_height = self.overlay_rect.height() // len(lines)
+        for index, line in enumerate(lines):
+            line_rect = QRect(self.overlay_rect.x() + 4, self.overlay_rect.y() + index * line_height,
+                              self.overlay_rect.width() - 8, line_height)
+            painter.drawText(line_rect, Qt.AlignLeft | Qt.AlignVCenter, line)
+    
+    def scrub_rect(self):
+        """回看时底部进度条的区域"""
+        return QRect(0, self.height() - self.scrub_height, self.width(), self.scrub_height)
+    
+    def draw_scrub_bar(self, painter):
+        """绘制回看进度条：历史时间轴、当前位置和相对实时画面的时间"""
+        rect = self.scrub_rect()
+        painter.fillRect(rect, QColor(0, 0, 0, 180))
+        time_range = self.history.time_range() if self.history is not None else None
+        if time_range is None:
+            return
+        oldest, newest = time_range
+        track = rect.adjusted(6, rect.height() - 6, -6, -3)
+        painter.fillRect(track, QColor(90, 90, 90))
+        ratio = (self.rewind_time - oldest) / (newest - oldest) if newest > oldest else 1.0
+        position = track.x() + int(ratio * track.width())
+        painter.fillRect(QRect(track.x(), track.y(), position - track.x(), track.height()), QColor(255, 80, 80))
+        painter.fillRect(QRect(position - 2, track.y() - 3, 4, track.height() + 6), QColor(255, 255, 255))
+        painter.setPen(QColor(255, 255, 255))
+        painter.setFont(QFont("Arial", 8))
+        painter.drawText(rect.adjusted(6, 0, -6, -8), Qt.AlignLeft | Qt.AlignVCenter,
+                         f"回看 {self.rewind_time - newest:+.2f}s / {oldest - newest:.1f}s  ←/→ 逐帧  Esc 返回")
+    
+    def set_overlay_visible(self, visible):
+        """显示或隐藏统计浮层
+        
+        Args:
+            visible: 是否显示
+        """
+        self.show_overlay = visible
+        if visible:
+            self.overlay_timer.start(500)
+        else:
+            self.overlay_timer.stop()
+        self.update(self.overlay_rect)
     
     def update_frame(self):
         """更新显示帧"""
+        # 捕获区域（使用物理像素坐标），直接使用原始 BGRA 数据
+        start = time.perf_counter()
+        if self.stitcher is not None:
+            frame = self.stitcher.grab(self.capture)
+        else:
+            frame = self.capture.grab_raw(self.region)
+        self.frame_stats.record("capture", time.perf_counter() - start)
+        self.show_frame(frame, start)
+    
+    def show_frame(self, frame, timestamp=None, rects=None, source=None):
+        """显示一帧图像
+        
+        Args:
+            frame: BGRA (h, w, 4) 或 RGB (h, w, 3) 图像数据，可以是切片视图
+            timestamp: 截图时间戳（time.perf_counter），可选
+            rects: 多进程捕获时工作进程已缩小帧并检测出的脏区域，提供时跳过缩小和变化检测
+            source: 多进程捕获时启用输出后工作进程交回的原始分辨率帧，交给 output_frame
+            
+        Returns:
+            bool: 画面是否变化
+        """
         try:
-            # 捕获区域（使用物理像素坐标）
-            frame = self.capture.capture(self.region)
-            if frame.size > 0:
-                # 确保数组是C连续的
-                frame = np.ascontiguousarray(frame)
-                
-                # 转换为QImage
-                height, width, channels = frame.shape
-                bytes_per_line = channels * width
-                q_image = QImage(frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-                
-                # 将图像缩放到逻辑尺寸，保持与选择区域大小一致
-                q_image = q_image.scaled(self.logical_width, self.logical_height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                
-                # 转换为QPixmap并显示
-                pixmap = QPixmap.fromImage(q_image)
-                self.setPixmap(pixmap)
+            if frame.size == 0:
+                return False
+            size = (self.display_width, self.display_height)
+            filters = self.filters
+            if rects is None:
+                self.output_frame(frame, timestamp)
+                frame, reduce_time = self.reduce_frame(frame, size, filters)
+                # 画面未变化时跳过滤镜、转换、缩放和重绘，变化时只处理脏区域
+                rects = self.change_detector.detect(frame)
+            else:
+                # 多进程捕获只交回变化的帧；frame 已缩小到显示尺寸，输出使用原始分辨率的 source
+                if source is not None:
+                    self.output_frame(source, timestamp, detect=False)
+                reduce_time = 0.0
+                rects = self.change_detector.accept(frame.shape, rects)
+            if not rects:
+                return False
+            if filters is not None:
+                frame, rects = filters.apply(frame, rects, self.frame_stats)
+                if not rects:
+                    # 变化落在裁剪范围之外
+                    return False
+            if self.record_history(frame, rects, timestamp):
+                return True
+            # 同步模式下立即绘制，图像块无需脱离截图缓冲区
+            patches = self.make_patches(frame, rects, size, reduce_time, detach=False)
+            self.apply_patches(patches, timestamp)
+            return True
         except Exception as e:
             print(f"更新帧错误: {str(e)}")
+            return False
+    
+    def produce_frame(self, frame, timestamp, rects=None, source=None):
+        """在捕获线程中转换一帧的脏区域并放入信箱
+        
+        Args:
+            frame: BGRA 图像数据，仅在回调期间有效
+            timestamp: 截图时间戳（time.perf_counter）
+            rects: 多进程捕获时工作进程已缩小帧并检测出的脏区域，提供时只生成图像块
+            source: 多进程捕获时启用输出后工作进程交回的原始分辨率帧，交给 output_frame
+            
+        Returns:
+            bool: 画面是否变化
+        """
+        try:
+            if frame.size == 0:
+                return False
+            size = (self.display_width, self.display_height)
+            filters = self.filters
+            if rects is None:
+                self.output_frame(frame, timestamp)
+                frame, reduce_time = self.reduce_frame(frame, size, filters)
+                rects = self.change_detector.detect(frame)
+            else:
+                if source is not None:
+                    self.output_frame(source, timestamp, detect=False)
+                reduce_time = 0.0
+                rects = self.change_detector.accept(frame.shape, rects)
+            if not rects:
+                return False
+            if filters is not None:
+                frame, rects = filters.apply(frame, rects, self.frame_stats)
+                if not rects:
+                    # 变化落在裁剪范围之外
+                    return False
+            if self.record_history(frame, rects, timestamp):
+                return True
+            if self.mailbox.pending():
+                # 上一帧尚未显示就会被丢弃，其脏区域无法单独补回，改为整帧更新
+                rects = [(0, 0, frame.shape[1], frame.shape[0])]
+            patches = self.make_patches(frame, rects, size, reduce_time)
+            self.mailbox.put((size, patches), timestamp)
+            self.frame_ready.emit()
+            return True
+        except Exception as e:
+            print(f"转换帧错误: {str(e)}")
+            return False
+    
+    def present_frame(self):
+        """在 GUI 线程中显示信箱里的最新帧"""
+        item = self.mailbox.take()
+        if item is None:
+            return
+        (size, patches), timestamp = item
+        if size != (self.display_width, self.display_height):
+            # 图像块按调整大小之前的尺寸生成，丢弃并在下一帧整帧重绘
+            self.change_detector.reset()
+            return
+        self.apply_patches(patches, timestamp)
+    
+    def reduce_frame(self, frame, size, filters=None):
+        """按显示尺寸尽早缩小帧（可在非 GUI 线程调用）
+        
+        Args:
+            frame: 原始图像数据
+            size: 显示尺寸 (width, height)
+            filters: 滤镜管线，裁剪和旋转后的输出仍需覆盖显示尺寸
+            
+        Returns:
+            tuple: (缩小后的帧, 耗时秒数)
+        """
+        start = time.perf_counter()
+        width, height = size
+        if filters is not None:
+            output_width, output_height = filters.output_size()
+            scale = max(width / output_width, height / output_height)
+            width = int(math.ceil(frame.shape[1] * scale))
+            height = int(math.ceil(frame.shape[0] * scale))
+        frame = self.scaler.reduce(frame, width, height)
+        return frame, time.perf_counter() - start
+    
+    def capture_size(self):
+        """交给捕获调度器的显示尺寸：有滤镜时放大到裁剪和旋转后的输出仍能覆盖显示尺寸
+        
+        Returns:
+            tuple: (width, height)
+        """
+        width, height = self.display_width, self.display_height
+        if self.filters is not None:
+            output_width, output_height = self.filters.output_size()
+            scale = max(width / output_width, height / output_height)
+            width = int(math.ceil(self.region["width"] * scale))
+            height = int(math.ceil(self.region["height"] * scale))
+        return width, height
+    
+    def has_outputs(self):
+        """是否启用了录制、共享内存导出或串流"""
+        return self.recorder is not None or self.exporter is not None or self.stream is not None
+    
+    def update_outputs(self):
+        """输出启用、停止或需要完整画面时调用
+        
+        下一帧视为变化，使输出从完整画面开始；并通知捕获调度器是否需要交回原始分辨率的帧
+        （多进程捕获引擎交回的帧已缩小到显示尺寸）
+        """
+        self.output_detector.reset()
+        token = self.broker_token
+        if self.broker is not None and token is not None:
+            self.broker.set_outputs(token, self.has_outputs())
+    
+    def output_frame(self, frame, timestamp, detect=True):
+        """把变化的原始分辨率帧交给录制器、共享内存导出器和串流服务，均不阻塞
+        
+        变化按原始帧判断，与显示用的缩小帧无关；没有启用任何输出时不做检测
+        
+        Args:
+            frame: BGRA 图像数据
+            timestamp: 截图时间戳（time.perf_counter）
+            detect: 是否检测变化，为 False 时帧已知有变化
+        """
+        recorder = self.recorder
+        exporter = self.exporter
+        stream = self.stream
+        if recorder is None and exporter is None and stream is None:
+            return
+        if frame.ndim != 3 or frame.shape[2] != 4:
+            return
+        if detect and not self.output_detector.check(frame):
+            return
+        if timestamp is None:
+            timestamp = time.perf_counter()
+        if recorder is not None:
+            recorder.submit(frame, timestamp)
+        if exporter is not None and exporter.shape != frame.shape:
+            exporter = self.recreate_exporter(exporter, frame.shape)
+        if exporter is not None:
+            exporter.publish(frame, timestamp)
+        if stream is not None:
+            stream.publish(frame, timestamp)
+    
+    def record_history(self, frame, rects, timestamp):
+        """把显示的帧交给回放缓存（可在非 GUI 线程调用）
+        
+        Args:
+            frame: 经过滤镜的 BGRA 图像数据
+            rects: 脏矩形列表
+            timestamp: 截图时间戳（time.perf_counter）
+            
+        Returns:
+            bool: 是否处于回看模式（此时不显示实时画面）
+        """
+        history = self.history
+        if history is not None and frame.ndim == 3 and frame.shape[2] == 4:
+            history.append(frame, rects, time.perf_counter() if timestamp is None else timestamp)
+        return self.rewind_time is not None
+    
+    def recreate_exporter(self, exporter, shape):
+        """帧尺寸变化时以相同名称重新创建共享内存（读取端需要重新连接）
+        
+        Args:
+            exporter: 当前的导出器
+            shape: 新的帧形状
+            
+        Returns:
+            FrameExporter: 新的导出器，导出已停止或创建失败时返回 None
+        """
+        with self.export_lock:
+            if self.exporter is not exporter:
+                return self.exporter
+            exporter.close()
+            self.exporter = None
+            try:
+                from frame_export import FrameExporter
+                self.exporter = FrameExporter(exporter.name, shape[0], shape[1], shape[2])
+            except Exception as e:
+                print(f"创建共享内存错误: {str(e)}")
+            return self.exporter
+    
+    def make_patches(self, frame, rects, size, scale_time=0.0, detach=True):
+        """将帧的脏区域转换为缩放到显示尺寸的图像块（可在非 GUI 线程调用）
+        
+        Args:
+            frame: BGRA 或 RGB 图像数据
+            rects: 脏矩形列表，每项为 (x, y, width, height)（帧像素）
+            size: 显示尺寸 (width, height)
+            scale_time: 之前已花费的缩放耗时（秒），计入统计
+            detach: 是否复制图像块，使其不再引用截图缓冲区（跨线程传递时必须为 True）
+            
+        Returns:
+            list: 图像块列表，每项为 (目标 QRect, QImage, 源 QRect 或 None)
+        """
+        display_width, display_height = size
+        
+        # 转换为QImage，BGRA 数据直接包装，无需通道交换和复制
+        start = time.perf_counter()
+        q_image = self.render_mgr.convert_to_qimage(frame)
+        convert_time = time.perf_counter() - start
+        
+        frame_height, frame_width = frame.shape[:2]
+        identity = (display_width, display_height) == (frame_width, frame_height)
+        transformation = self.scaler.transformation()
+        # 有缩放网格时用 QImage.scaled 缩放对齐的图块；否则按整帧的映射取样或绘制图块，采样位置与整帧一致
+        aligned = (self.scaler.tile_grid(frame_width, display_width) is not None
+                   and self.scaler.tile_grid(frame_height, display_height) is not None)
+        
+        patches = []
+        for x, y, width, height in rects:
+            if identity:
+                target = QRect(x, y, width, height)
+                if not detach:
+                    # 尺寸一致时直接从包装的截图数据绘制，不复制
+                    patches.append((target, q_image, QRect(x, y, width, height)))
+                    continue
+                # copy 只复制脏区域，同时使图像块不再引用截图缓冲区
+                start = time.perf_counter()
+                patch = q_image.copy(x, y, width, height)
+                convert_time += time.perf_counter() - start
+                self.frame_stats.add_bytes(patch.sizeInBytes())
+                patches.append((target, patch, None))
+                continue
+            
+            # 图块对齐到缩放网格并扩展滤波半径后缩放，只绘制对齐部分，拼接处没有接缝
+            source_left, source_right, scaled_left, scaled_right, left, right = self.scaler.tile_span(
+                x, width, frame_width, display_width)
+            source_top, source_bottom, scaled_top, scaled_bottom, top, bottom = self.scaler.tile_span(
+                y, height, frame_height, display_height)
+            target = QRect(left, top, right - left, bottom - top)
+            if target.isEmpty():
+                continue
+            if not aligned and transformation == Qt.FastTransformation:
+                # 最近邻：每个显示像素直接取其中心对应的帧像素
+                start = time.perf_counter()
+                xs = (np.arange(left, right) * 2 + 1) * frame_width // (2 * display_width)
+                ys = (np.arange(top, bottom) * 2 + 1) * frame_height // (2 * display_height)
+                patch = self.render_mgr.convert_to_qimage(frame.take(ys, axis=0).take(xs, axis=1)).copy()
+                scale_time += time.perf_counter() - start
+                patches.append((target, patch, None))
+                continue
+            start = time.perf_counter()
+            patch = q_image.copy(source_left, source_top, source_right - source_left, source_bottom - source_top)
+            convert_time += time.perf_counter() - start
+            self.frame_stats.add_bytes(patch.sizeInBytes())
+            start = time.perf_counter()
+            if aligned:
+                patch = patch.scaled(scaled_right - scaled_left, scaled_bottom - scaled_top, Qt.IgnoreAspectRatio,
+                                     transformation)
+                source = QRect(left - scaled_left, top - scaled_top, target.width(), target.height())
+            else:
+                scaled = QImage(target.width(), target.height(), patch.format())
+                painter = QPainter(scaled)
+                painter.setCompositionMode(QPainter.CompositionMode_Source)
+                painter.setRenderHint(QPainter.SmoothPixmapTransform, transformation == Qt.SmoothTransformation)
+                painter.translate(-left, -top)
+                painter.scale(display_width / frame_width, display_height / frame_height)
+                painter.drawImage(QPointF(source_left, source_top), patch)
+                painter.end()
+                patch = scaled
+                source = None
+            scale_time += time.perf_counter() - start
+            patches.append((target, patch, source))
+        
+        self.frame_stats.record("convert", convert_time)
+        self.frame_stats.record("scale", scale_time)
+        return patches
+    
+    def apply_patches(self, patches, timestamp=None):
+        """把图像块画到后备位图并只重绘对应区域（仅限 GUI 线程）
+        
+        Args:
+            patches: make_patches 返回的图像块列表
+            timestamp: 截图时间戳（time.perf_counter），用于统计帧龄
+        """
+        start = time.perf_counter()
+        painter = QPainter(self.backing_pixmap)
+        for target, patch, source in patches:
+            if source is None:
+                painter.drawImage(target.topLeft(), patch)
+            else:
+                painter.drawImage(target, patch, source)
+        painter.end()
+        
+        for target, _, _ in patches:
+            self.update(target)
+        self.frame_stats.record("paint", time.perf_counter() - start)
+        self.frame_stats.mark_painted(timestamp)
+    
+    def start_recording(self, path, fmt="video", **options):
+        """开始录制
+        
+        Args:
+            path: 输出路径，见 recorder.FrameRecorder
+            fmt: 输出格式，见 recorder.RECORD_FORMATS
+            **options: 传给 FrameRecorder 的其他参数（fps, queue_size, drop_policy）
+            
+        Returns:
+            bool: 是否成功开始
+        """
+        self.stop_recording()
+        options.setdefault("fps", self.target_fps)
+        try:
+            from recorder import FrameRecorder
+            recorder = FrameRecorder(path, fmt, **options)
+        except Exception as e:
+            print(f"开始录制错误: {str(e)}")
+            return False
+        recorder.start()
+        self.recorder = recorder
+        self.update_outputs()
+        return True
+    
+    def stop_recording(self):
+        """停止录制，不等待：写入线程写完剩余帧后自行关闭文件"""
+        recorder = self.recorder
+        if recorder is None:
+            return
+        self.recorder = None
+        self.update_outputs()
+        recorder.stop(wait=False)
+    
+    def start_export(self, name):
+        """开始把画面发布到共享内存，供其他进程用 frame_export.FrameReader 读取
+        
+        Args:
+            name: 共享内存名称
+            
+        Returns:
+            bool: 是否成功开始
+        """
+        self.stop_export()
+        try:
+            from frame_export import FrameExporter
+            exporter = FrameExporter(name, self.region["height"], self.region["width"])
+        except Exception as e:
+            print(f"创建共享内存错误: {str(e)}")
+            return False
+        with self.export_lock:
+            self.exporter = exporter
+        self.update_outputs()
+        return True
+    
+    def stop_export(self):
+        """停止共享内存导出并删除共享内存"""
+        with self.export_lock:
+            exporter = self.exporter
+            self.exporter = None
+        if exporter is not None:
+            self.update_outputs()
+            exporter.close()
+    
+    def start_stream(self, source):
+        """开始把画面提供给串流服务
+        
+        Args:
+            source: StreamServer.add_source 返回的串流区域
+        """
+        # 客户端连接时重置变化检测，下一帧作为完整画面提交
+        source.request_frame = self.update_outputs
+        self.stream = source
+        self.update_outputs()
+    
+    def stop_stream(self):
+        """停止串流"""
+        if self.stream is not None:
+            self.stream = None
+            self.update_outputs()
+    
+    def save_snapshot(self, path):
+        """把当前显示的画面保存为图片文件
+        
+        Args:
+            path: 输出文件路径，格式由扩展名决定
+            
+        Returns:
+            bool: 是否保存成功
+        """
+        if not self.backing_pixmap.save(path):
+            print(f"保存快照错误: {path}")
+            return False
+        return True
+    
+    def start_history(self, max_mb):
+        """开始在回放缓存中保存最近的画面
+        
+        Args:
+            max_mb: 内存上限（MB），见 history.FrameHistory
+        """
+        self.stop_history()
+        from history import FrameHistory
+        self.history = FrameHistory(max_mb)
+        # 下一帧视为变化，使历史从完整画面开始
+        self.change_detector.reset()
+    
+    def stop_history(self):
+        """停止保存画面并释放回放缓存"""
+        self.exit_rewind()
+        history = self.history
+        if history is None:
+            return
+        self.history = None
+        history.close()
+    
+    def enter_rewind(self):
+        """进入回看模式：停止显示实时画面，从最新一帧开始回看"""
+        time_range = self.history.time_range() if self.history is not None else None
+        if time_range is None:
+            return
+        self.rewind_time = time_range[1]
+        self.setFocus()
+        self.show_history_frame()
+    
+    def exit_rewind(self):
+        """退出回看模式，下一帧整帧重绘实时画面"""
+        if self.rewind_time is None:
+            return
+        self.rewind_time = None
+        self.scrubbing = False
+        self.change_detector.reset()
+        self.update()
+    
+    def show_history_frame(self):
+        """把回看位置的历史帧画到后备位图"""
+        frame, timestamp = self.history.frame_at(self.rewind_time)
+        if frame is None:
+            return
+        self.rewind_time = timestamp
+        q_image = self.render_mgr.convert_to_qimage(frame)
+        painter = QPainter(self.backing_pixmap)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, self.scaler.transformation() == Qt.SmoothTransformation)
+        painter.drawImage(QRect(0, 0, self.display_width, self.display_height), q_image)
+        painter.end()
+        self.update()
+    
+    def step_rewind(self, frames):
+        """回看位置前后移动若干帧"""
+        if self.rewind_time is None or self.history is None:
+            return
+        timestamps = self.history.timestamps()
+        if not timestamps:
+            return
+        index = bisect.bisect_right(timestamps, self.rewind_time) - 1
+        index = min(max(index + frames, 0), len(timestamps) - 1)
+        self.rewind_time = timestamps[index]
+        self.show_history_frame()
+    
+    def scrub_to(self, x):
+        """把回看位置移动到进度条上的横坐标"""
+        time_range = self.history.time_range() if self.history is not None else None
+        if time_range is None:
+            return
+        oldest, newest = time_range
+        ratio = min(max((x - 6) / max(self.width() - 12, 1), 0.0), 1.0)
+        self.rewind_time = oldest + ratio * (newest - oldest)
+        self.show_history_frame()
+    
+    def set_filters(self, specs):
+        """设置滤镜
+        
+        Args:
+            specs: 滤镜配置字符串列表（见 filters.create_filter），为空时取消所有滤镜
+        """
+        try:
+            filters = [create_filter(spec) for spec in specs]
+        except ValueError as e:
+            print(f"设置滤镜错误: {str(e)}")
+            return
+        pipeline = FilterPipeline(filters, (self.region["width"], self.region["height"])) if filters else None
+        output_width, output_height = pipeline.output_size() if pipeline else (self.region["width"],
+                                                                              self.region["height"])
+        self.filters = pipeline
+        self.change_detector.reset()
+        if self.broker is not None and self.broker_token is not None:
+            self.broker.set_output_size(self.broker_token, *self.capture_size())
+        self.state_changed.emit()
+        
+        # 裁剪和旋转会改变宽高比，保持窗口宽度不变调整高度
+        aspect_ratio = output_width / output_height
+        if abs(aspect_ratio - self.aspect_ratio) > 1e-3:
+            self.aspect_ratio = aspect_ratio
+            self.resize(self.width(), max(self.minimumHeight(), int(round(self.width() / aspect_ratio))))
+    
+    def filter_specs(self):
+        """当前滤镜的配置字符串列表"""
+        return self.filters.spec().split(",") if self.filters is not None else []
+    
+    def set_scale_mode(self, mode):
+        """设置缩放模式
+        
+        Args:
+            mode: 缩放模式，见 render_manager.SCALE_MODES
+        """
+        self.scaler = FrameScaler(mode)
+        self.change_detector.reset()
+    
+    def get_stats(self):
+        """获取帧统计信息
+        
+        Returns:
+            dict: 包含 produced, delivered, dropped, frame_age_ms,
+                changed_frames, skipped_frames, skip_ratio, dirty_ratio,
+                fps, painted_frames, bytes_copied，以及 capture, convert, scale,
+                paint, age, track 各阶段的耗时直方图摘要；录制、导出、回放缓存和串流启用时还包含
+                FrameRecorder.get_stats、FrameExporter.get_stats、FrameHistory.get_stats
+                和 StreamSource.get_stats 的各项
+        """
+        stats = self.mailbox.get_stats()
+        stats.update(self.change_detector.get_stats())
+        stats.update(self.frame_stats.snapshot())
+        stats["bytes_copied"] += self.change_detector.copied_bytes + self.render_mgr.copied_bytes
+        recorder = self.recorder
+        if recorder is not None:
+            stats.update(recorder.get_stats())
+        exporter = self.exporter
+        if exporter is not None:
+            stats.update(exporter.get_stats())
+        history = self.history
+        if history is not None:
+            stats.update(history.get_stats())
+        stream = self.stream
+        if stream is not None:
+            stats.update(stream.get_stats())
+        return stats
+    
+    def contextMenuEvent(self, event):
+        """右键菜单：设置本悬浮窗的滤镜"""
+        specs = self.filter_specs()
+        names = [spec.split(":")[0] for spec in specs]
+        menu = QMenu(self)
+        
+        def toggle(spec):
+            name = spec.split(":")[0]
+            if name in names:
+                self.set_filters([item for item in specs if item.split(":")[0] != name])
+            else:
+                # 逐像素滤镜放在裁剪和旋转之前
+                position = len([item for item in names if item not in ("crop", "rotate")])
+                self.set_filters(specs[:position] + [spec] + specs[position:])
+        
+        for spec, text in (("gray", "灰度"), ("threshold:128", "二值化"),
+                           ("contrast:1.5", "增强对比度"), ("invert", "反色")):
+            action = menu.addAction(text)
+            action.setCheckable(True)
+            action.setChecked(spec.split(":")[0] in names)
+            action.triggered.connect(lambda checked=False, spec=spec: toggle(spec))
+        
+        rotate_menu = menu.addMenu("旋转")
+        current = next((spec for spec in specs if spec.startswith("rotate")), None)
+        for angle in (0, 90, 180, 270):
+            action = rotate_menu.addAction(f"{angle}°")
+            action.setCheckable(True)
+            action.setChecked(current == f"rotate:{angle}" or (angle == 0 and current is None))
+            rotated = [spec for spec in specs if not spec.startswith("rotate")]
+            if angle:
+                rotated.append(f"rotate:{angle}")
+            action.triggered.connect(lambda checked=False, rotated=rotated: self.set_filters(rotated))
+        
+        width, height = self.region["width"], self.region["height"]
+        uncropped = [spec for spec in specs if not spec.startswith("crop")]
+        if "crop" in names:
+            action = menu.addAction("取消裁剪")
+            action.triggered.connect(lambda: self.set_filters(uncropped))
+        else:
+            crop = f"crop:{width // 4}:{height // 4}:{width // 2}:{height // 2}"
+            position = len([item for item in names if item != "rotate"])
+            action = menu.addAction("裁剪到中心 1/2")
+            action.triggered.connect(lambda: self.set_filters(specs[:position] + [crop] + specs[position:]))
+        
+        if specs:
+            menu.addSeparator()
+            menu.addAction("清除滤镜").triggered.connect(lambda: self.set_filters([]))
+        
+        menu.addSeparator()
+        if self.rewind_time is not None:
+            menu.addAction("返回实时画面").triggered.connect(self.exit_rewind)
+        else:
+            action = menu.addAction("回看（滚轮或 ←/→ 拖动时间）")
+            action.setEnabled(self.history is not None and self.history.time_range() is not None)
+            action.triggered.connect(self.enter_rewind)
+        menu.addAction("改为监视（变化时通知）").triggered.connect(lambda: self.watch_requested.emit(self))
+        if "parts" not in self.region and self.broker is not None:
+            # 跨显示器的区域按选择时的显示器拆分，不支持跟随
+            text = f"跟随目标窗口（{self.anchor['title']}）" if self.anchor is not None else "跟随下方的目标窗口"
+            action = menu.addAction(text)
+            action.setCheckable(True)
+            action.setChecked(self.anchor is not None)
+            action.triggered.connect(lambda checked: self.anchor_requested.emit(self, checked))
+        menu.exec(event.globalPos())
+    
+    def resizeEvent(self, event):
+        """调整大小事件：重建后备位图，下一帧整帧重绘"""
+        size = event.size()
+        if size.width() != self.display_width or size.height() != self.display_height:
+            self.backing_pixmap = self.backing_pixmap.scaled(size.width(), size.height(),
+                                                             Qt.IgnoreAspectRatio, Qt.FastTransformation)
+            self.display_width = size.width()
+            self.display_height = size.height()
+            self.change_detector.reset()
+            if self.broker is not None and self.broker_token is not None:
+                self.broker.set_output_size(self.broker_token, *self.capture_size())
+            if self.rewind_time is not None:
+                self.show_history_frame()
+            self.state_changed.emit()
+        super().resizeEvent(event)
+    
+    def wheelEvent(self, event):
+        """滚轮事件：按比例缩放悬浮窗，回看模式下前后移动回看位置"""
+        steps = event.angleDelta().y() / 120.0
+        if steps == 0:
+            return
+        if self.rewind_time is not None:
+            self.step_rewind(-int(math.copysign(max(1, abs(round(steps))), steps)))
+            event.accept()
+            return
+        width = max(self.minimumWidth(), int(round(self.width() * 1.1 ** steps)))
+        self.resize(width, max(self.minimumHeight(), int(round(width / self.aspect_ratio))))
+        event.accept()
+    
+    def hit_edges(self, pos):
+        """判断位置是否位于可调整大小的右边缘或下边缘
+        
+        Returns:
+            tuple: (是否在右边缘, 是否在下边缘)
+        """
+        return (pos.x() >= self.width() - self.resize_margin,
+                pos.y() >= self.height() - self.resize_margin)
+    
+    def update_cursor(self, edges):
+        """根据所在边缘设置鼠标形状"""
+        if edges[0] and edges[1]:
+            self.setCursor(Qt.SizeFDiagCursor)
+        elif edges[0]:
+            self.setCursor(Qt.SizeHorCursor)
+        elif edges[1]:
+            self.setCursor(Qt.SizeVerCursor)
+        else:
+            self.unsetCursor()
+    
+    def keyPressEvent(self, event):
+        """键盘事件：回看模式下 ←/→ 逐帧（按住 Shift 每次 10 帧）移动，Home/End 跳到两端，Esc 返回实时画面"""
+        if self.rewind_time is None:
+            super().keyPressEvent(event)
+            return
+        step = 10 if event.modifiers() & Qt.ShiftModifier else 1
+        key = event.key()
+        if key == Qt.Key_Left:
+            self.step_rewind(-step)
+        elif key == Qt.Key_Right:
+            self.step_rewind(step)
+        elif key == Qt.Key_Home:
+            self.step_rewind(-len(self.history.timestamps()))
+        elif key == Qt.Key_End:
+            self.step_rewind(len(self.history.timestamps()))
+        elif key == Qt.Key_Escape:
+            self.exit_rewind()
+        else:
+            super().keyPressEvent(event)
     
     def mousePressEvent(self, event):
         """鼠标按下事件"""
+        if (event.button() == Qt.LeftButton and self.rewind_time is not None
+                and self.scrub_rect().contains(event.pos())):
+            # 在回看进度条上按下：拖动回看位置
+            self.scrubbing = True
+            self.scrub_to(event.pos().x())
+            event.accept()
+            return
         if event.button() == Qt.LeftButton:
-            import time
+            edges = self.hit_edges(event.pos())
+            if any(edges):
+                # 开始调整大小
+                self.resizing = True
+                self.resize_edges = edges
+                self.resize_origin = event.globalPos()
+                self.resize_start_size = self.size()
+                event.accept()
+                return
+            
             current_time = int(time.time() * 1000)
             
             # 检查是否为双击
@@ -118,18 +1077,47 @@ class FloatingWindow(QLabel):
     
     def mouseMoveEvent(self, event):
         """鼠标移动事件"""
-        if event.buttons() == Qt.LeftButton and self.dragging:
+        if event.buttons() == Qt.LeftButton and self.scrubbing:
+            self.scrub_to(event.pos().x())
+            event.accept()
+        elif event.buttons() == Qt.LeftButton and self.resizing:
+            # 保持宽高比调整大小，以变化较大的方向为准
+            delta = event.globalPos() - self.resize_origin
+            start_width = self.resize_start_size.width()
+            start_height = self.resize_start_size.height()
+            right, bottom = self.resize_edges
+            width_from_x = start_width + delta.x()
+            width_from_y = (start_height + delta.y()) * self.aspect_ratio
+            if right and bottom:
+                width = width_from_x if abs(delta.x()) >= abs(delta.y() * self.aspect_ratio) else width_from_y
+            elif right:
+                width = width_from_x
+            else:
+                width = width_from_y
+            width = max(self.minimumWidth(), int(round(width)))
+            self.resize(width, max(self.minimumHeight(), int(round(width / self.aspect_ratio))))
+            event.accept()
+        elif event.buttons() == Qt.LeftButton and self.dragging:
             self.move(event.globalPos() - self.drag_position)
             event.accept()
+        elif event.buttons() == Qt.NoButton:
+            self.update_cursor(self.hit_edges(event.pos()))
     
     def mouseReleaseEvent(self, event):
         """鼠标释放事件"""
         if event.button() == Qt.LeftButton:
             self.dragging = False
+            self.resizing = False
+            self.scrubbing = False
             event.accept()
     
     def closeEvent(self, event):
         """关闭事件"""
-        # 停止定时器
-        self.timer.stop()
+        # 停止定时器和截图
+        self.overlay_timer.stop()
+        self.stop_capture()
+        self.stop_recording()
+        self.stop_export()
+        self.stop_history()
+        self.closed.emit(self)
         event.accept()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 帧变化检测模块
+在 QImage 转换之前对原始 mss 缓冲区做廉价的变化检测，
+画面未变化时跳过转换、缩放和重绘；画面变化时按图块定位脏区域，
+只重绘变化的部分
+"""
+
+import numpy as np
+
+
+class FrameChangeDetector:
+    def __init__(self, row_step=4, tile_size=32, full_threshold=0.5):
+        """初始化帧变化检测器
+
+        每次只比较间隔 row_step 的一组行，组的起始行每帧轮转，
+        因此任何变化最多延迟 row_step 帧就会被发现，而静止画面每帧只读取
+        1/row_step 的数据。采样发现变化后再逐图块比较，得到脏矩形
+
+        Args:
+            row_step: 行采样间隔，为 1 时每帧完整比较
+            tile_size: 图块边长（像素）
+            full_threshold: 脏图块比例超过该值时直接整帧重绘
+        """
+        self.row_step = max(1, row_step)
+        self.tile_size = tile_size
+        self.full_threshold = full_threshold
+        self.phase = 0
+        self.previous = None
+        self.reset_requested = False
+        # accept 上一帧的形状
+        self.accepted_shape = None
+
+        # 统计信息
+        self.changed_frames = 0
+        self.skipped_frames = 0
+        self.dirty_area = 0
+        self.changed_area = 0
+        self.copied_bytes = 0
+
+    def reset(self):
+        """清除历史帧，下一帧必定视为变化
+
+        可在其他线程调用，实际清除在下一次 detect 开始时进行
+        """
+        self.reset_requested = True
+
+    def check(self, frame):
+        """检测帧是否发生变化
+
+        Args:
+            frame: 图像数据（可以是切片视图）
+
+        Returns:
+            bool: 是否发生变化，变化时内部会保存该帧用于下次比较
+        """
+        return bool(self.detect(frame))
+
+    def detect(self, frame):
+        """检测帧的脏区域
+
+        Args:
+            frame: 图像数据（可以是切片视图）
+
+        Returns:
+            list: 脏矩形列表，每项为 (x, y, width, height)，未变化时为空列表
+        """
+        height, width = frame.shape[:2]
+        if self.reset_requested:
+            self.reset_requested = False
+            self.previous = None
+        if self.previous is None or self.previous.shape != frame.shape:
+            self.previous = np.empty(frame.shape, dtype=frame.dtype)
+            np.copyto(self.previous, frame)
+            self.copied_bytes += self.previous.nbytes
+            return self.record([(0, 0, width, height)], width * height)
+
+        phase = self.phase
+        self.phase = (self.phase + 1) % self.row_step
+        if np.array_equal(frame[phase::self.row_step], self.previous[phase::self.row_step]):
+            self.skipped_frames += 1
+            return []
+
+        mask = self.tile_mask(frame)
+        if mask.mean() > self.full_threshold:
+            rects = [(0, 0, width, height)]
+        else:
+            rects = self.mask_to_rects(mask, width, height)
+
+        # 只把变化的图块写回历史帧，使其始终等于最近一次显示的画面
+        for x, y, w, h in rects:
+            np.copyto(self.previous[y:y + h, x:x + w], frame[y:y + h, x:x + w])
+            self.copied_bytes += self.previous[y:y + h, x:x + w].nbytes
+        return self.record(rects, width * height)
+
+    def accept(self, shape, rects):
+        """采用已在别处（如多进程捕获的工作进程）检测出的脏区域，不保存历史帧
+
+        reset 之后或帧尺寸变化后的第一帧仍视为整帧变化
+
+        Args:
+            shape: 帧的形状
+            rects: 脏矩形列表
+
+        Returns:
+            list: 脏矩形列表，未变化时为空列表
+        """
+        height, width = shape[:2]
+        if self.reset_requested or self.accepted_shape != shape:
+            self.reset_requested = False
+            self.previous = None
+            self.accepted_shape = shape
+            return self.record([(0, 0, width, height)], width * height)
+        if not rects:
+            self.skipped_frames += 1
+            return []
+        return self.record(list(rects), width * height)
+
+    def record(self, rects, area):
+        """记录一次变化帧的统计信息"""
+        if rects:
+            self.changed_frames += 1
+            self.dirty_area += sum(w * h for _, _, w, h in rects)
+            self.changed_area += area
+        return rects
+
+    def tile_mask(self, frame):
+        """逐图块比较当前帧与历史帧
+
+        Args:
+            frame: 图像数据
+
+        Returns:
+            np.ndarray: 形状为 (图块行数, 图块列数) 的布尔数组，True 表示图块有变化
+        """
+        height, width = frame.shape[:2]
+        if frame.ndim == 3 and frame.shape[2] == 4:
+            # 每个 BGRA 像素按一个 uint32 比较，避免逐通道比较
+            diff = frame.view(np.uint32)[:, :, 0] != self.previous.view(np.uint32)[:, :, 0]
+        elif frame.ndim == 3:
+            diff = (frame != self.previous).any(axis=2)
+        else:
+            diff = frame != self.previous
+
+        # reduceat 可处理边缘不足一个图块的情况
+        rows = np.logical_or.reduceat(diff, np.arange(0, height, self.tile_size), axis=0)
+        return np.logical_or.reduceat(rows, np.arange(0, width, self.tile_size), axis=1)
+
+    def mask_to_rects(self, mask, width, height):
+        """将脏图块合并为矩形
+
+        先把每行中连续的脏图块合并为一段，再把上下相邻且横向范围相同的段合并
+
+        Args:
+            mask: 图块变化掩码
+            width: 帧宽度
+            height: 帧高度
+
+        Returns:
+            list: 脏矩形列表，每项为 (x, y, width, height)
+        """
+        tile = self.tile_size
+        rects = []
+        open_runs = {}
+        for row in range(mask.shape[0]):
+            padded = np.concatenate(([False], mask[row], [False]))
+            edges = np.flatnonzero(padded[1:] != padded[:-1])
+            runs = set(zip(edges[::2].tolist(), edges[1::2].tolist()))
+
+            # 横向范围与上一行相同的段继续向下延伸
+            next_runs = {}
+            for run in runs:
+                start_row = open_runs.pop(run, row)
+                next_runs[run] = start_row
+            for (start, end), start_row in open_runs.items():
+                rects.append((start, start_row, end, row))
+            open_runs = next_runs
+        for (start, end), start_row in open_runs.items():
+            rects.append((start, start_row, end, mask.shape[0]))
+
+        result = []
+        for start, start_row, end, end_row in rects:
+            x = start * tile
+            y = start_row * tile
+            result.append((x, y, min(end * tile, width) - x, min(end_row * tile, height) - y))
+        return result
+
+    def get_stats(self):
+        """获取统计信息
+
+        Returns:
+            dict: 包含 changed_frames, skipped_frames, skip_ratio,
+                dirty_ratio（变化帧中实际重绘面积的平均比例）
+        """
+        total = self.changed_frames + self.skipped_frames
+        return {
+            "changed_frames": self.changed_frames,
+            "skipped_frames": self.skipped_frames,
+            "skip_ratio": self.skipped_frames / total if total else 0.0,
+            "dirty_ratio": self.dirty_area / self.changed_area if self.changed_area else 0.0
+        }
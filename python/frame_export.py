@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 共享内存帧导出模块
+把悬浮窗截取的画面发布到 multiprocessing.shared_memory 环形缓冲区，
+同一次截图可以供任意数量的本地进程（OCR、告警、日志采集等）零拷贝读取，
+无需各自重复截屏
+
+本模块只依赖 NumPy 和标准库，读取端可以直接使用 FrameReader：
+
+    reader = FrameReader("landscapecutter_1")
+    frame, info = reader.read_latest()     # frame 是共享内存上的 BGRA 视图
+    ...
+    if reader.is_current(info["sequence"]):  # 使用期间未被覆盖
+        ...
+
+内存布局：
+    全局头（64 字节）：magic "LCFX", version, slots, height, width, channels, format, latest_sequence
+    每个槽位：槽位头（64 字节：sequence, timestamp, height, width）+ 一帧像素数据
+    写入槽位时先把槽位序号置 0，写完像素后再写入序号，最后更新 latest_sequence
+"""
+
+import sys
+import time
+import struct
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+MAGIC = b"LCFX"
+VERSION = 1
+HEADER_FORMAT = "<4sIIIII4sQ"
+HEADER_SIZE = 64
+SLOT_HEADER_FORMAT = "<QdII"
+SLOT_HEADER_SIZE = 64
+# latest_sequence 在全局头中的偏移
+LATEST_OFFSET = struct.calcsize("<4sIIIII4s")
+
+
+class FrameExporter:
+    def __init__(self, name, height, width, channels=4, slots=4, pixel_format="BGRA"):
+        """创建共享内存环形缓冲区
+
+        Args:
+            name: 共享内存名称，读取端按此名称连接
+            height: 帧高度
+            width: 帧宽度
+            channels: 每像素通道数
+            slots: 槽位数量，读取端持有的视图在写入端再写 slots - 1 帧之前保持有效
+            pixel_format: 像素格式，最多 4 个字符
+        """
+        self.name = name
+        self.shape = (height, width, channels)
+        self.slots = slots
+        self.frame_size = height * width * channels
+        self.slot_size = SLOT_HEADER_SIZE + self.frame_size
+        self.shm = shared_memory.SharedMemory(name=name, create=True,
+                                              size=HEADER_SIZE + slots * self.slot_size)
+        struct.pack_into(HEADER_FORMAT, self.shm.buf, 0, MAGIC, VERSION, slots, height, width,
+                         channels, pixel_format.encode("ascii")[:4].ljust(4), 0)
+        self.sequence = 0
+        # publish 在捕获线程中调用，close 可能在 GUI 线程中调用
+        self.lock = threading.Lock()
+
+        # 各槽位像素数据的视图
+        self.frames = [
+            np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf,
+                       offset=HEADER_SIZE + index * self.slot_size + SLOT_HEADER_SIZE)
+            for index in range(slots)
+        ]
+
+        # 统计信息
+        self.published = 0
+        self.publish_time = 0.0
+
+    def publish(self, frame, timestamp=None):
+        """发布一帧
+
+        Args:
+            frame: 图像数据，形状必须与创建时一致，可以是切片视图
+            timestamp: 截图时间戳（time.perf_counter），换算为 time.time() 后写入槽位头
+
+        Returns:
+            bool: 是否发布成功
+        """
+        if frame.shape != self.shape:
+            return False
+        start = time.perf_counter()
+        wall_time = time.time() if timestamp is None else time.time() - (start - timestamp)
+
+        with self.lock:
+            if self.shm is None:
+                return False
+            sequence = self.sequence + 1
+            index = sequence % self.slots
+            offset = HEADER_SIZE + index * self.slot_size
+            buf = self.shm.buf
+            struct.pack_into("<Q", buf, offset, 0)
+            np.copyto(self.frames[index], frame)
+            struct.pack_into(SLOT_HEADER_FORMAT, buf, offset, sequence, wall_time,
+                             self.shape[0], self.shape[1])
+            struct.pack_into("<Q", buf, LATEST_OFFSET, sequence)
+            self.sequence = sequence
+
+        self.published += 1
+        self.publish_time += time.perf_counter() - start
+        return True
+
+    def close(self):
+        """关闭并删除共享内存"""
+        with self.lock:
+            if self.shm is None:
+                return
+            shm = self.shm
+            self.shm = None
+            self.frames = []
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    def get_stats(self):
+        """获取导出统计
+
+        Returns:
+            dict: 包含 export_name, export_published, export_ms（平均每帧复制耗时）
+        """
+        return {
+            "export_name": self.name,
+            "export_published": self.published,
+            "export_ms": self.publish_time * 1000.0 / self.published if self.published else 0.0
+        }
+
+
+class FrameReader:
+    def __init__(self, name, track=False):
+        """连接到共享内存环形缓冲区
+
+        Args:
+            name: 共享内存名称
+            track: 是否保留 resource_tracker 对该共享内存的跟踪；与写入端共用
+                resource_tracker 的读取端（如同一进程或其子进程）应为 True
+
+        Raises:
+            FileNotFoundError: 共享内存不存在（导出尚未开始或已停止）
+            ValueError: 不是 LandscapeCutter 的帧缓冲区或版本不兼容
+        """
+        self.shm = shared_memory.SharedMemory(name=name)
+        if not track and sys.version_info < (3, 13):
+            # 旧版本 Python 会在读取端退出时删除它连接的共享内存，这里取消跟踪
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception:
+                pass
+
+        magic, version, slots, height, width, channels, pixel_format, _ = \
+            struct.unpack_from(HEADER_FORMAT, self.shm.buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.shm.close()
+            raise ValueError(f"不兼容的帧缓冲区: {name}")
+        self.name = name
+        self.slots = slots
+        self.shape = (height, width, channels)
+        self.pixel_format = pixel_format.decode("ascii").strip()
+        self.slot_size = SLOT_HEADER_SIZE + height * width * channels
+        self.frames = [
+            np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf,
+                       offset=HEADER_SIZE + index * self.slot_size + SLOT_HEADER_SIZE)
+            for index in range(slots)
+        ]
+
+    def latest_sequence(self):
+        """最新一帧的序号，尚未发布任何帧时为 0"""
+        return struct.unpack_from("<Q", self.shm.buf, LATEST_OFFSET)[0]
+
+    def slot_info(self, sequence):
+        """读取序号所在槽位的槽位头
+
+        Returns:
+            tuple: (sequence, timestamp, height, width)
+        """
+        offset = HEADER_SIZE + (sequence % self.slots) * self.slot_size
+        return struct.unpack_from(SLOT_HEADER_FORMAT, self.shm.buf, offset)
+
+    def read_latest(self, copy=False):
+        """读取最新一帧
+
+        Args:
+            copy: 是否复制像素数据；为 False 时返回共享内存上的视图，
+                使用完后可用 is_current 确认期间未被覆盖
+
+        Returns:
+            tuple: (frame, info)，info 包含 sequence, timestamp（time.time()）, shape, format；
+                尚无帧时返回 (None, None)
+        """
+        for _ in range(self.slots):
+            sequence = self.latest_sequence()
+            if sequence == 0:
+                return None, None
+            frame = self.frames[sequence % self.slots]
+            if copy:
+                frame = frame.copy()
+            slot_sequence, timestamp, _, _ = self.slot_info(sequence)
+            if slot_sequence == sequence:
+                return frame, {
+                    "sequence": sequence,
+                    "timestamp": timestamp,
+                    "shape": self.shape,
+                    "format": self.pixel_format
+                }
+        return None, None
+
+    def is_current(self, sequence):
+        """序号对应的槽位是否仍保存着该帧（未被写入端覆盖）"""
+        return self.slot_info(sequence)[0] == sequence
+
+    def wait_for_frame(self, after_sequence=0, timeout=1.0, interval=0.002):
+        """等待比指定序号更新的帧
+
+        Args:
+            after_sequence: 已处理的最后一帧序号
+            timeout: 最长等待时间（秒）
+            interval: 轮询间隔（秒）
+
+        Returns:
+            tuple: 同 read_latest，超时返回 (None, None)
+        """
+        deadline = time.perf_counter() + timeout
+        while self.latest_sequence() <= after_sequence:
+            if time.perf_counter() >= deadline:
+                return None, None
+            time.sleep(interval)
+        return self.read_latest()
+
+    def close(self):
+        """断开连接（不删除共享内存）
+
+        Returns:
+            bool: 是否已断开；仍有 read_latest 返回的视图在使用时，
+                映射会在这些视图释放后由垃圾回收关闭
+        """
+        self.frames = []
+        try:
+            self.shm.close()
+            return True
+        except BufferError:
+            return False
+
+
+def main():
+    """命令行读取示例：连接到共享内存并输出接收帧率"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="LandscapeCutter 共享内存帧读取示例")
+    parser.add_argument("name", help="共享内存名称，如 landscapecutter_1")
+    parser.add_argument("--duration", type=float, default=10.0, help="读取时间（秒）")
+    args = parser.parse_args()
+
+    reader = FrameReader(args.name)
+    print(f"已连接 {args.name}: {reader.shape[1]}x{reader.shape[0]} {reader.pixel_format}, {reader.slots} 个槽位")
+    sequence = 0
+    received = 0
+    start = time.perf_counter()
+    try:
+        while time.perf_counter() - start < args.duration:
+            frame, info = reader.wait_for_frame(sequence)
+            if frame is None:
+                continue
+            received += 1
+            sequence = info["sequence"]
+            print(f"帧 {sequence}: 延迟 {(time.time() - info['timestamp']) * 1000:.1f}ms, "
+                  f"平均亮度 {float(frame[:, :, :3].mean()):.1f}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+    elapsed = time.perf_counter() - start
+    print(f"共接收 {received} 帧，{received / elapsed:.1f} 帧/秒")
+
+
+if __name__ == "__main__":
+    main()
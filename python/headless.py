@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 无界面捕获模式
+不启动托盘、热键和悬浮窗，按固定帧率截取区域并输出到文件、标准输出或本地套接字，
+用于构建机和监控机。本模块及其依赖都不导入 PySide6，启动快、内存占用小
+
+用法示例:
+    python headless.py --region 0,0,1920,1080 --fps 10 --output files:captures
+    python headless.py --fps 30 --output stdout --format raw | ffmpeg -f rawvideo -pix_fmt bgra -s 599x304 -i - out.mp4
+    python headless.py --region 100,100,640,480 --output tcp:5900 --format png
+    python headless.py --backend synthetic --frames 100 --output null --stats
+
+区域来自 --region 参数（可重复），未指定时使用 config.json 中的 selected_region。
+
+输出格式:
+    stdout + raw：依次写出每帧的 BGRA 原始数据，无分隔（尺寸见启动时的提示）
+    stdout + png：每帧为 4 字节大端长度 + PNG 数据
+    tcp:端口 / unix:路径：本地监听，任意数量的客户端连接后接收帧，
+        每帧为 FRAME_HEADER 帧头 + 数据；读取跟不上的客户端会丢帧，但收到的每帧都是完整的
+    files:目录：每帧保存为 region<序号>_<帧号>.png 或 .npy
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import select
+import socket
+import struct
+import argparse
+import threading
+import collections
+
+import numpy as np
+
+from capture_backends import create_backend, available_backends
+from capture_broker import CaptureBroker
+from frame_diff import FrameChangeDetector
+
+# 套接字输出的帧头：magic, 区域序号, 格式（0 为 BGRA 原始数据，1 为 PNG）, 宽, 高, 时间戳（time.time）, 数据长度
+FRAME_HEADER = "<4sHHIIdI"
+FRAME_MAGIC = b"LCHF"
+FORMATS = {"raw": 0, "png": 1}
+
+# 进程启动（导入本模块）的时间，用于统计启动耗时
+START_TIME = time.perf_counter()
+
+
+def log(message):
+    """输出日志到标准错误，标准输出可能用于帧数据"""
+    print(message, file=sys.stderr, flush=True)
+
+
+def encode_png(frame, level=1):
+    """把 BGRA 帧编码为 PNG
+
+    优先使用 OpenCV，未安装时用 zlib 直接生成 RGBA PNG
+
+    Args:
+        frame: BGRA 图像数据
+        level: 压缩级别（0-9），越低越快
+
+    Returns:
+        bytes: PNG 文件数据
+    """
+    try:
+        import cv2
+        ok, data = cv2.imencode(".png", frame, [cv2.IMWRITE_PNG_COMPRESSION, level])
+        if ok:
+            return data.tobytes()
+    except ImportError:
+        pass
+
+    height, width = frame.shape[:2]
+    rows = np.empty((height, width * 4 + 1), dtype=np.uint8)
+    # 每行以过滤类型 0 开头，像素按 RGBA 排列
+    rows[:, 0] = 0
+    rgba = rows[:, 1:].reshape(height, width, 4)
+    rgba[:, :, :3] = frame[:, :, 2::-1]
+    rgba[:, :, 3] = frame[:, :, 3]
+
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(rows.tobytes(), level)) + chunk(b"IEND", b""))
+
+
+def encode(frame, fmt):
+    """按输出格式编码一帧"""
+    if fmt == "png":
+        return encode_png(frame)
+    return np.ascontiguousarray(frame).tobytes()
+
+
+class NullSink:
+    """丢弃所有帧（用于测量）"""
+
+    def write(self, index, frame, timestamp):
+        pass
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    def __init__(self, directory, fmt):
+        """每帧保存为一个文件
+
+        Args:
+            directory: 输出目录
+            fmt: png 保存为 PNG，raw 保存为 .npy（包含尺寸信息）
+        """
+        self.directory = directory
+        self.fmt = fmt
+        self.counts = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, index, frame, timestamp):
+        count = self.counts.get(index, 0)
+        self.counts[index] = count + 1
+        name = f"region{index}_{count:06d}"
+        if self.fmt == "png":
+            with open(os.path.join(self.directory, name + ".png"), "wb") as f:
+                f.write(encode_png(frame))
+        else:
+            np.save(os.path.join(self.directory, name + ".npy"), np.ascontiguousarray(frame))
+
+    def close(self):
+        pass
+
+
+class StdoutSink:
+    def __init__(self, fmt):
+        """写到标准输出：raw 为连续的原始数据，png 为 4 字节大端长度 + PNG 数据
+
+        标准输出只用于帧数据，其他模块 print 的诊断信息改为写到标准错误，不会破坏帧格式
+        """
+        self.fmt = fmt
+        self.stream = sys.stdout.buffer
+        self.stdout = sys.stdout
+        sys.stdout = sys.stderr
+
+    def write(self, index, frame, timestamp):
+        data = encode(frame, self.fmt)
+        if self.fmt == "png":
+            self.stream.write(struct.pack(">I", len(data)))
+        self.stream.write(data)
+        self.stream.flush()
+
+    def close(self):
+        sys.stdout = self.stdout
+        try:
+            self.stream.flush()
+        except (BrokenPipeError, ValueError):
+            pass
+
+
+class SocketSink:
+    def __init__(self, address, fmt, queue_frames=2, close_timeout=1.0):
+        """在本地监听，把帧发送给所有已连接的客户端
+
+        捕获线程只把编码后的帧放入各客户端的队列，由发送线程用非阻塞套接字发出；
+        客户端跟不上时丢弃其队列中最旧的帧，不会拖慢捕获或其他客户端
+
+        Args:
+            address: ("tcp", 端口) 或 ("unix", 路径)；TCP 只监听 127.0.0.1
+            fmt: 帧格式，raw 或 png
+            queue_frames: 每个客户端最多排队的帧数（不含正在发送的帧）
+            close_timeout: 关闭时等待发送剩余帧的时间（秒）
+        """
+        kind, target = address
+        self.fmt = fmt
+        self.queue_frames = queue_frames
+        self.close_timeout = close_timeout
+        self.path = None
+        if kind == "unix":
+            if os.path.exists(target):
+                os.unlink(target)
+            self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.server.bind(target)
+            self.path = target
+        else:
+            self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.server.bind(("127.0.0.1", int(target)))
+        self.server.listen(8)
+        self.server.setblocking(False)
+        self.address = self.server.getsockname()
+        self.lock = threading.Lock()
+        # 已连接的客户端：socket -> {"queue": 排队的帧, "pending": 正在发送的帧的剩余部分}
+        self.clients = {}
+        self.dropped = 0
+        self.deadline = None
+        # 唤醒发送线程：写入帧或关闭时发送一个字节
+        self.wake_reader, self.wake_writer = socket.socketpair()
+        self.wake_reader.setblocking(False)
+        self.wake_writer.setblocking(False)
+        self.thread = threading.Thread(target=self.send_loop, name="SocketSink", daemon=True)
+        self.thread.start()
+        log(f"在 {kind}:{target} 等待客户端连接")
+
+    def wake(self):
+        """唤醒发送线程"""
+        try:
+            self.wake_writer.send(b"\0")
+        except OSError:
+            # 缓冲区已满时发送线程必然会被唤醒
+            pass
+
+    def write(self, index, frame, timestamp):
+        if not self.clients:
+            return
+        data = encode(frame, self.fmt)
+        header = struct.pack(FRAME_HEADER, FRAME_MAGIC, index, FORMATS[self.fmt],
+                             frame.shape[1], frame.shape[0], timestamp, len(data))
+        with self.lock:
+            for client in self.clients.values():
+                if len(client["queue"]) >= self.queue_frames:
+                    client["queue"].popleft()
+                    self.dropped += 1
+                client["queue"].append((header, data))
+        self.wake()
+
+    def send_loop(self):
+        """发送线程：接受连接，把各客户端队列中的帧发出，检测断开的客户端"""
+        while True:
+            with self.lock:
+                writers = [client for client, state in self.clients.items() if state["pending"] or state["queue"]]
+                readers = [self.server, self.wake_reader] + list(self.clients)
+            if self.deadline is not None and (not writers or time.perf_counter() >= self.deadline):
+                return
+            readable, writable, _ = select.select(readers, writers, [], 0.1 if self.deadline is not None else None)
+            for sock in readable:
+                if sock is self.wake_reader:
+                    try:
+                        while self.wake_reader.recv(4096):
+                            pass
+                    except OSError:
+                        pass
+                elif sock is self.server:
+                    self.accept()
+                else:
+                    # 客户端不发送数据：可读表示已断开（发来的数据直接丢弃）
+                    try:
+                        if not sock.recv(4096):
+                            self.disconnect(sock)
+                    except (BlockingIOError, InterruptedError):
+                        pass
+                    except OSError:
+                        self.disconnect(sock)
+            for sock in writable:
+                self.flush(sock)
+
+    def accept(self):
+        """接受新连接（不阻塞）"""
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            client.setblocking(False)
+            with self.lock:
+                self.clients[client] = {"queue": collections.deque(), "pending": []}
+            log(f"客户端已连接，共 {len(self.clients)} 个")
+
+    def flush(self, sock):
+        """尽量发送客户端排队的帧，发送缓冲区满时返回"""
+        state = self.clients.get(sock)
+        if state is None:
+            return
+        pending = state["pending"]
+        try:
+            while True:
+                if not pending:
+                    with self.lock:
+                        if not state["queue"]:
+                            return
+                        header, data = state["queue"].popleft()
+                    pending.extend((memoryview(header), memoryview(data)))
+                sent = sock.send(pending[0])
+                if sent < len(pending[0]):
+                    pending[0] = pending[0][sent:]
+                else:
+                    pending.pop(0)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self.disconnect(sock)
+
+    def disconnect(self, sock):
+        """断开客户端"""
+        with self.lock:
+            self.clients.pop(sock, None)
+        sock.close()
+        log(f"客户端已断开，剩余 {len(self.clients)} 个")
+
+    def close(self):
+        # 等待发送线程在 close_timeout 内发出剩余的帧
+        self.deadline = time.perf_counter() + self.close_timeout
+        self.wake()
+        self.thread.join()
+        for client in list(self.clients):
+            client.close()
+        self.clients = {}
+        if self.dropped:
+            log(f"客户端跟不上，共丢弃 {self.dropped} 帧")
+        self.wake_reader.close()
+        self.wake_writer.close()
+        self.server.close()
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def create_sink(spec, fmt):
+    """按输出配置创建输出端
+
+    Args:
+        spec: null、stdout、files:目录、tcp:端口 或 unix:路径
+        fmt: raw 或 png
+
+    Raises:
+        ValueError: 未知的输出配置
+    """
+    kind, _, target = spec.partition(":")
+    if kind == "null":
+        return NullSink()
+    if kind == "stdout":
+        return StdoutSink(fmt)
+    if kind == "files" and target:
+        return FileSink(target, fmt)
+    if kind in ("tcp", "unix") and target:
+        return SocketSink((kind, target), fmt)
+    raise ValueError(f"未知的输出: {spec}，可用输出: null, stdout, files:目录, tcp:端口, unix:路径")
+
+
+def parse_region(text):
+    """解析 x,y,width,height 形式的区域"""
+    try:
+        x, y, width, height = (int(value) for value in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"区域格式应为 x,y,width,height: {text}")
+    return {"x": x, "y": y, "width": width, "height": height}
+
+
+def parse_fps(text):
+    """解析帧率，必须为正数"""
+    try:
+        fps = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"帧率应为数字: {text}")
+    if not fps > 0 or fps == float("inf"):
+        raise argparse.ArgumentTypeError(f"帧率必须大于 0: {text}")
+    return fps
+
+
+def load_config_region(path):
+    """读取 config.json 中的 selected_region
+
+    Returns:
+        dict: 区域信息，文件或字段不存在时返回 None
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            region = json.load(f).get("selected_region")
+    except (OSError, ValueError) as e:
+        log(f"读取配置文件错误: {str(e)}")
+        return None
+    if not region:
+        return None
+    return {key: int(region[key]) for key in ("x", "y", "width", "height")}
+
+
+def get_rss_bytes():
+    """当前进程的常驻内存（字节），无法获取时返回 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+    except ImportError:
+        return None
+
+
+def run(broker, regions, sink, fps, frames=0, duration=0.0, changed_only=False):
+    """按固定帧率截取所有区域并写入输出端
+
+    Args:
+        broker: 捕获调度器，所有区域在同一次批量截图中截取
+        regions: 区域列表
+        sink: 输出端
+        fps: 帧率
+        frames: 每个区域输出的帧数上限，0 表示不限
+        duration: 运行时间上限（秒），0 表示不限
+        changed_only: 是否只输出画面变化的帧
+
+    Returns:
+        dict: 运行统计
+    """
+    counts = [0] * len(regions)
+
+    def make_callback(index):
+        detector = FrameChangeDetector() if changed_only else None
+
+        def callback(frame, timestamp):
+            if detector is not None and not detector.detect(frame):
+                return False
+            sink.write(index, frame, time.time() - (time.perf_counter() - timestamp))
+            counts[index] += 1
+            return True
+        return callback
+
+    for index, region in enumerate(regions):
+        broker.register(region, make_callback(index), target_fps=fps)
+
+    interval = 1.0 / fps
+    start = time.perf_counter()
+    first_frame = None
+    ticks = 0
+    next_due = start
+    try:
+        while True:
+            broker.tick()
+            ticks += 1
+            if first_frame is None:
+                first_frame = time.perf_counter()
+            now = time.perf_counter()
+            if frames and min(counts) >= frames:
+                break
+            if duration and now - start >= duration:
+                break
+            # 落后时跳过错过的周期，不连续补帧
+            next_due = max(next_due + interval, now)
+            time.sleep(max(0.0, next_due - now))
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    elapsed = time.perf_counter() - start
+    rss = get_rss_bytes()
+    return {
+        "ticks": ticks,
+        "frames": counts,
+        "elapsed": elapsed,
+        "fps": ticks / elapsed if elapsed > 0 else 0.0,
+        "startup_ms": (first_frame - START_TIME) * 1000.0 if first_frame else None,
+        "rss_mb": rss / 1048576 if rss else None
+    }
+
+
+def main(argv=None):
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="LandscapeCutter 无界面捕获")
+    parser.add_argument("--region", action="append", type=parse_region, default=[],
+                        help="截取区域 x,y,width,height（物理像素），可重复；未指定时使用配置文件中的 selected_region")
+    parser.add_argument("--config", default=os.path.join(base_dir, "config.json"), help="配置文件路径")
+    parser.add_argument("--backend", default="mss", help=f"捕获后端名称（{', '.join(available_backends())}）")
+    parser.add_argument("--fps", type=parse_fps, default=10.0, help="帧率（大于 0）")
+    parser.add_argument("--output", default="stdout", help="输出：null, stdout, files:目录, tcp:端口, unix:路径")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="raw", help="帧格式")
+    parser.add_argument("--frames", type=int, default=0, help="每个区域输出的帧数，0 表示不限")
+    parser.add_argument("--duration", type=float, default=0.0, help="运行时间（秒），0 表示不限")
+    parser.add_argument("--changed-only", action="store_true", help="只输出画面变化的帧")
+    parser.add_argument("--stats", action="store_true", help="结束时输出启动耗时、帧率和内存占用")
+    args = parser.parse_args(argv)
+
+    regions = args.region
+    if not regions:
+        region = load_config_region(args.config)
+        if region is None:
+            parser.error("没有指定 --region，配置文件中也没有 selected_region")
+        regions = [region]
+
+    try:
+        sink = create_sink(args.output, args.format)
+    except (ValueError, OSError) as e:
+        parser.error(str(e))
+    capture = create_backend(args.backend)
+    broker = CaptureBroker(capture)
+    for index, region in enumerate(regions):
+        log(f"区域 {index}: {region['width']}x{region['height']} @ ({region['x']}, {region['y']}), "
+            f"BGRA, {args.fps:g} FPS -> {args.output} ({args.format})")
+
+    try:
+        stats = run(broker, regions, sink, args.fps, args.frames, args.duration, args.changed_only)
+    finally:
+        sink.close()
+        capture.close()
+
+    if args.stats:
+        startup = f"{stats['startup_ms']:.1f}ms" if stats["startup_ms"] is not None else "-"
+        rss = f"{stats['rss_mb']:.1f}MB" if stats["rss_mb"] is not None else "-"
+        log(f"运行 {stats['elapsed']:.1f}s，{stats['ticks']} 次截图（{stats['fps']:.1f} 次/秒），"
+            f"各区域输出 {stats['frames']} 帧，启动到首帧 {startup}，内存 {rss}，"
+            f"PySide6 已加载: {'PySide6' in sys.modules}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 回放缓存模块
+为悬浮窗保存最近一段时间的画面，用于回看一闪而过的内容（错误提示、曲线尖峰等）。
+
+历史按段保存：每段以一个关键帧开始，之后每帧只保存变化检测得到的脏矩形，
+内容为与上一帧的异或差分（未变化的像素为 0，压缩率高）。
+捕获线程中只做复制和异或，zlib 压缩在后台线程进行；
+占用超过上限时整段淘汰最旧的历史，内存占用有硬上限：
+大于上限的帧不保存，当前段的差分链放不下时结束当前段，下一帧从新的关键帧开始
+"""
+
+import time
+import zlib
+import queue
+import bisect
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class FrameHistory:
+    def __init__(self, max_mb=64, keyframe_interval=10.0, keyframe_frames=300, level=1):
+        """初始化回放缓存
+
+        Args:
+            max_mb: 历史数据占用的内存上限（MB），超过时淘汰最旧的段
+            keyframe_interval: 关键帧间隔（秒），决定淘汰粒度和回看时重建一帧的最长耗时
+            keyframe_frames: 每段最多的帧数，差分链达到该长度时开始新段
+            level: zlib 压缩级别，0 表示不压缩
+        """
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.keyframe_interval = keyframe_interval
+        self.keyframe_frames = keyframe_frames
+        self.level = level
+
+        # 段列表，每段为 {"shape", "entries", "bytes", "evicted"}，
+        # 每项为 {"time", "key", "tiles", "bytes"}，tiles 为 [(x, y, width, height), 数据] 列表，
+        # 数据为未压缩的 ndarray 或 zlib 压缩后的 bytes
+        self.segments = deque()
+        self.bytes = 0
+        self.lock = threading.Lock()
+        # 最新一帧的完整画面，用于计算异或差分；开始新段时原地更新，不重新分配
+        self.current = None
+        # 为 True 时下一帧开始新段（当前段的差分链已放不下）
+        self.split = False
+
+        # 回看时重建帧的缓存：(段, 序号, 帧)，向后拖动时从缓存继续应用差分
+        self.cache = None
+
+        # 待压缩的历史项
+        self.pending = queue.Queue()
+        self.stop_event = threading.Event()
+        self.compressor = None
+        if level > 0:
+            self.compressor = threading.Thread(target=self.run, name="HistoryCompressor", daemon=True)
+            self.compressor.start()
+
+        # 统计信息
+        self.appended = 0
+        self.evicted = 0
+        self.rejected = 0
+        self.append_time = 0.0
+        self.compress_time = 0.0
+        self.frame_bytes = 0
+
+    def append(self, frame, rects, timestamp):
+        """追加一帧（在捕获线程调用）
+
+        Args:
+            frame: BGRA 图像数据，可以是切片视图
+            rects: 变化检测得到的脏矩形列表，每项为 (x, y, width, height)
+            timestamp: 截图时间戳（time.perf_counter）
+        """
+        if not rects:
+            return
+        if frame.nbytes > self.max_bytes:
+            # 一个关键帧就超过上限，不保存；之后的差分也无从计算，下一帧重新开始
+            self.rejected += 1
+            self.current = None
+            return
+        start = time.perf_counter()
+        height, width = frame.shape[:2]
+        segment = self.segments[-1] if self.segments else None
+        if (segment is None or self.split or self.current is None or self.current.shape != frame.shape
+                or timestamp - segment["entries"][0]["time"] >= self.keyframe_interval
+                or len(segment["entries"]) >= self.keyframe_frames):
+            # 开始新段：关键帧只从源帧复制一次，差分基准在原有缓冲区中原地更新
+            keyframe = np.array(frame)
+            if self.current is None or self.current.shape != frame.shape:
+                self.current = keyframe.copy()
+            else:
+                np.copyto(self.current, keyframe)
+            entry = {"time": timestamp, "key": True, "bytes": keyframe.nbytes,
+                     "tiles": [[(0, 0, width, height), keyframe]]}
+            segment = {"shape": frame.shape, "entries": [entry], "bytes": 0, "evicted": False}
+            new_segment = True
+            self.split = False
+        else:
+            tiles = []
+            for x, y, w, h in rects:
+                previous = self.current[y:y + h, x:x + w]
+                tile = frame[y:y + h, x:x + w]
+                tiles.append([(x, y, w, h), np.bitwise_xor(tile, previous)])
+                np.copyto(previous, tile)
+            entry = {"time": timestamp, "key": False, "tiles": tiles,
+                     "bytes": sum(data.nbytes for _, data in tiles)}
+            new_segment = False
+
+        with self.lock:
+            if new_segment:
+                self.segments.append(segment)
+            else:
+                segment["entries"].append(entry)
+            segment["bytes"] += entry["bytes"]
+            self.bytes += entry["bytes"]
+            # 当前段之外的旧段按时间顺序淘汰
+            while self.bytes > self.max_bytes and len(self.segments) > 1:
+                evicted = self.segments.popleft()
+                evicted["evicted"] = True
+                self.bytes -= evicted["bytes"]
+                self.evicted += len(evicted["entries"])
+            if self.bytes > self.max_bytes:
+                # 只剩当前段仍超过上限：丢弃这一帧的差分并结束当前段，下一帧从关键帧开始
+                segment["entries"].pop()
+                segment["bytes"] -= entry["bytes"]
+                self.bytes -= entry["bytes"]
+                self.evicted += 1
+                self.split = True
+                entry = None
+            self.appended += 1
+            self.frame_bytes = frame.shape[0] * frame.shape[1] * frame.shape[2]
+
+        if self.compressor is not None and entry is not None:
+            self.pending.put((segment, entry))
+        self.append_time += time.perf_counter() - start
+
+    def run(self):
+        """压缩线程主循环"""
+        while True:
+            try:
+                segment, entry = self.pending.get(timeout=0.1)
+            except queue.Empty:
+                if self.stop_event.is_set():
+                    break
+                continue
+            if segment["evicted"]:
+                continue
+            start = time.perf_counter()
+            compressed = []
+            for _, data in entry["tiles"]:
+                packed = zlib.compress(data, self.level)
+                # 不可压缩的数据（如噪声）保留原样
+                compressed.append(packed if len(packed) < data.nbytes else data)
+            with self.lock:
+                if not segment["evicted"]:
+                    size = 0
+                    for tile, data in zip(entry["tiles"], compressed):
+                        tile[1] = data
+                        size += len(data) if isinstance(data, bytes) else data.nbytes
+                    segment["bytes"] += size - entry["bytes"]
+                    self.bytes += size - entry["bytes"]
+                    entry["bytes"] = size
+            self.compress_time += time.perf_counter() - start
+
+    @staticmethod
+    def decode(data, rect, channels):
+        """把一个图块的数据还原为数组"""
+        if isinstance(data, bytes):
+            _, _, width, height = rect
+            return np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(height, width, channels)
+        return data
+
+    def timestamps(self):
+        """所有历史帧的时间戳（从旧到新）"""
+        with self.lock:
+            return [entry["time"] for segment in self.segments for entry in segment["entries"]]
+
+    def time_range(self):
+        """最旧和最新一帧的时间戳，没有历史时返回 None"""
+        with self.lock:
+            if not self.segments:
+                return None
+            return self.segments[0]["entries"][0]["time"], self.segments[-1]["entries"][-1]["time"]
+
+    def frame_at(self, timestamp):
+        """重建不晚于指定时间的最新一帧（在 GUI 线程调用）
+
+        Args:
+            timestamp: 时间戳（time.perf_counter），早于最旧的历史时返回最旧一帧
+
+        Returns:
+            tuple: (帧, 帧的时间戳)，帧在下一次调用前有效；没有历史时返回 (None, None)
+        """
+        with self.lock:
+            if not self.segments:
+                return None, None
+            starts = [segment["entries"][0]["time"] for segment in self.segments]
+            segment = self.segments[max(0, bisect.bisect_right(starts, timestamp) - 1)]
+            times = [entry["time"] for entry in segment["entries"]]
+            index = max(0, bisect.bisect_right(times, timestamp) - 1)
+            entries = segment["entries"][:index + 1]
+            tiles = [[(rect, data) for rect, data in entry["tiles"]] for entry in entries]
+
+        channels = segment["shape"][2]
+        cache = self.cache
+        if cache is not None and cache[0] is segment and cache[1] <= index:
+            frame = cache[2]
+            first = cache[1] + 1
+        else:
+            rect, data = tiles[0][0]
+            frame = np.array(self.decode(data, rect, channels)).reshape(segment["shape"])
+            first = 1
+        for entry_tiles in tiles[first:]:
+            for rect, data in entry_tiles:
+                x, y, width, height = rect
+                np.bitwise_xor(frame[y:y + height, x:x + width], self.decode(data, rect, channels),
+                               out=frame[y:y + height, x:x + width])
+        self.cache = (segment, index, frame)
+        return frame, entries[-1]["time"]
+
+    def close(self):
+        """停止压缩线程并释放历史"""
+        self.stop_event.set()
+        if self.compressor is not None and self.compressor.is_alive():
+            self.compressor.join(1.0)
+        with self.lock:
+            for segment in self.segments:
+                segment["evicted"] = True
+            self.segments.clear()
+            self.bytes = 0
+        self.current = None
+        self.cache = None
+
+    def get_stats(self):
+        """获取回放缓存统计
+
+        Returns:
+            dict: 包含 history_frames, history_seconds, history_bytes, history_max_bytes,
+                history_seconds_per_mb（每 MB 能保存的历史秒数）, history_ratio（相对保存原始帧的占用比例）,
+                history_evicted, history_rejected（超过上限未保存的帧数）,
+                history_pending（等待压缩的帧数）, history_append_ms
+        """
+        with self.lock:
+            frames = sum(len(segment["entries"]) for segment in self.segments)
+            seconds = (self.segments[-1]["entries"][-1]["time"] - self.segments[0]["entries"][0]["time"]
+                       if self.segments else 0.0)
+            stored = self.bytes
+        megabytes = stored / (1024 * 1024)
+        return {
+            "history_frames": frames,
+            "history_seconds": seconds,
+            "history_bytes": stored,
+            "history_max_bytes": self.max_bytes,
+            "history_seconds_per_mb": seconds / megabytes if megabytes else 0.0,
+            "history_ratio": stored / (frames * self.frame_bytes) if frames and self.frame_bytes else 0.0,
+            "history_evicted": self.evicted,
+            "history_rejected": self.rejected,
+            "history_pending": self.pending.qsize(),
+            "history_append_ms": self.append_time * 1000.0 / self.appended if self.appended else 0.0
+        }
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 全局热键模块
+定义可替换的热键后端：热键消息由 Qt 事件循环分发时通过原生事件过滤器直接处理，
+不再用定时器轮询消息队列，空闲时不会周期性唤醒
+
+- windows：RegisterHotKey + QAbstractNativeEventFilter 接收 WM_HOTKEY
+- fake：不注册系统热键，由 trigger() 模拟按下，用于测试、基准测试和非 Windows 平台
+"""
+
+import sys
+import time
+import ctypes
+import importlib
+
+from PySide6.QtCore import QObject, Signal, QAbstractNativeEventFilter, QCoreApplication
+
+# Windows API常量
+WM_HOTKEY = 0x0312
+MOD_ALT = 0x0001
+MOD_CONTROL = 0x0002
+MOD_SHIFT = 0x0004
+MOD_WIN = 0x0008
+MOD_NOREPEAT = 0x4000
+VK_X = 0x58  # X键的虚拟键码
+
+# 热键被其他程序占用时 RegisterHotKey 的错误码
+ERROR_HOTKEY_ALREADY_REGISTERED = 1409
+
+
+class HotkeyBackend(QObject):
+    """热键后端基类
+
+    子类实现 register 和 unregister；热键按下时发出 activated(hotkey_id, timestamp)，
+    timestamp 为收到热键消息时的 time.perf_counter()，用于测量热键到界面响应的延迟
+    """
+
+    activated = Signal(int, float)
+
+    # 后端名称
+    name = ""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # 已注册的热键：hotkey_id -> (modifiers, key)
+        self.hotkeys = {}
+
+    def register(self, hotkey_id, modifiers, key):
+        """注册全局热键
+
+        Args:
+            hotkey_id: 热键ID，activated 信号中原样返回
+            modifiers: 修饰键组合，如 MOD_ALT
+            key: 虚拟键码，如 VK_X
+
+        Returns:
+            bool: 是否注册成功
+        """
+        raise NotImplementedError
+
+    def unregister(self, hotkey_id):
+        """注销热键"""
+        raise NotImplementedError
+
+    def close(self):
+        """注销所有热键并释放资源"""
+        for hotkey_id in list(self.hotkeys):
+            self.unregister(hotkey_id)
+
+
+class FakeHotkeyBackend(HotkeyBackend):
+    name = "fake"
+
+    def register(self, hotkey_id, modifiers, key):
+        self.hotkeys[hotkey_id] = (modifiers, key)
+        return True
+
+    def unregister(self, hotkey_id):
+        self.hotkeys.pop(hotkey_id, None)
+
+    def trigger(self, hotkey_id=1):
+        """模拟按下已注册的热键
+
+        Returns:
+            bool: 热键是否已注册
+        """
+        if hotkey_id not in self.hotkeys:
+            return False
+        self.activated.emit(hotkey_id, time.perf_counter())
+        return True
+
+
+class WindowsNativeFilter(QAbstractNativeEventFilter):
+    """在 Qt 分发 Windows 消息之前检查 WM_HOTKEY"""
+
+    def __init__(self, backend):
+        super().__init__()
+        self.backend = backend
+
+    def nativeEventFilter(self, event_type, message):
+        if event_type == b"windows_generic_MSG":
+            from ctypes import wintypes
+            msg = wintypes.MSG.from_address(int(message))
+            if msg.message == WM_HOTKEY and msg.wParam in self.backend.hotkeys:
+                self.backend.activated.emit(int(msg.wParam), time.perf_counter())
+                return True, 0
+        return False, 0
+
+
+class WindowsHotkeyBackend(HotkeyBackend):
+    name = "windows"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.user32 = ctypes.windll.user32
+        self.kernel32 = ctypes.windll.kernel32
+        # 不指定窗口时 WM_HOTKEY 投递到注册线程（GUI 线程）的消息队列，
+        # Qt 的事件分发器在取出消息时交给原生事件过滤器
+        self.filter = WindowsNativeFilter(self)
+        QCoreApplication.instance().installNativeEventFilter(self.filter)
+
+    def register(self, hotkey_id, modifiers, key):
+        try:
+            if not self.user32.RegisterHotKey(None, hotkey_id, modifiers | MOD_NOREPEAT, key):
+                error_code = self.kernel32.GetLastError()
+                print(f"注册全局热键失败，错误码: {error_code}")
+                if error_code == ERROR_HOTKEY_ALREADY_REGISTERED:
+                    print("热键已被其他程序占用")
+                return False
+        except Exception as e:
+            print(f"注册热键错误: {str(e)}")
+            return False
+        self.hotkeys[hotkey_id] = (modifiers, key)
+        return True
+
+    def unregister(self, hotkey_id):
+        if self.hotkeys.pop(hotkey_id, None) is None:
+            return
+        try:
+            self.user32.UnregisterHotKey(None, hotkey_id)
+        except Exception as e:
+            print(f"注销热键错误: {str(e)}")
+
+    def close(self):
+        super().close()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.removeNativeEventFilter(self.filter)
+
+
+# 内置后端：名称 -> "模块:类名"
+HOTKEY_BACKENDS = {
+    "windows": "hotkeys:WindowsHotkeyBackend",
+    "fake": "hotkeys:FakeHotkeyBackend",
+}
+
+
+def default_hotkey_backend():
+    """当前平台的默认热键后端名称"""
+    return "windows" if sys.platform == "win32" else "fake"
+
+
+def create_hotkey_backend(name=None, parent=None):
+    """按名称创建热键后端
+
+    Args:
+        name: 后端名称，为 None 时使用当前平台的默认后端
+        parent: 父对象
+
+    Returns:
+        HotkeyBackend: 热键后端实例
+
+    Raises:
+        ValueError: 后端未注册
+    """
+    name = name or default_hotkey_backend()
+    if name not in HOTKEY_BACKENDS:
+        raise ValueError(f"未知的热键后端: {name}，可用后端: {', '.join(sorted(HOTKEY_BACKENDS))}")
+    backend = HOTKEY_BACKENDS[name]
+    if isinstance(backend, str):
+        module_name, class_name = backend.split(":")
+        backend = getattr(importlib.import_module(module_name), class_name)
+    return backend(parent)
@@ -6,105 +6,159 @@ LandscapeCutter 主程序
 实现Alt+X快捷键截图和悬浮窗实时显示功能
 """
 
+import time
+
+# 启动计时起点：在导入 Qt 和 numpy 之前记录
+START_TIME = time.perf_counter()
+
 import sys
 import os
-import ctypes
-from ctypes import wintypes
-from PySide6.QtWidgets import QApplication, QWidget, QSystemTrayIcon, QMenu
-from PySide6.QtCore import Qt, QTimer, Signal, QObject
-from PySide6.QtGui import QAction, QIcon
+import json
+from PySide6.QtWidgets import QApplication, QSystemTrayIcon, QMenu
+from PySide6.QtCore import QTimer, Signal
+from PySide6.QtGui import QAction, QActionGroup, QIcon
 
 from screen_selector import ScreenSelector
 from floating_window import FloatingWindow
-from capture_mss import Capture
+from capture_backends import create_backend
+from capture_broker import CaptureBroker
+from capture_thread import CaptureWorker
+from scheduler import Scheduler
+from stats import StatsLogger, HotPathProfiler, LatencyHistogram
+from hotkeys import create_hotkey_backend, MOD_ALT, VK_X
+from config_manager import ConfigManager
 
-# Windows API常量
-WM_HOTKEY = 0x0312
-MOD_ALT = 0x0001
-MOD_CONTROL = 0x0002
-MOD_SHIFT = 0x0004
-MOD_WIN = 0x0008
-VK_X = 0x58  # X键的虚拟键码
-
-class HotkeyWindow(QWidget):
-    """专门用于接收热键消息的窗口"""
-    hotkey_pressed = Signal()
-    
-    def __init__(self):
-        super().__init__()
-        self.setWindowTitle("LandscapeCutter Hotkey")
-        self.setGeometry(0, 0, 1, 1)
-        self.setWindowFlags(Qt.Tool | Qt.FramelessWindowHint)
-        self.hide()
-        
-        # 热键ID
-        self.hotkey_id = 1
-        
-        # 注册热键
-        self.register_hotkey()
-        
-        # 启动定时器检查热键消息
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.check_hotkey)
-        self.timer.start(50)  # 每50ms检查一次
-    
-    def register_hotkey(self):
-        """注册全局热键 Alt+X"""
-        try:
-            hwnd = int(self.winId())
-            # 注册 Alt+X 热键
-            if not ctypes.windll.user32.RegisterHotKey(hwnd, self.hotkey_id, MOD_ALT, VK_X):
-                error_code = ctypes.windll.kernel32.GetLastError()
-                print(f"注册全局热键失败，错误码: {error_code}")
-                if error_code == 1409:
-                    print("热键已被其他程序占用")
-            else:
-                print("全局 Alt+X 热键注册成功")
-        except Exception as e:
-            print(f"注册热键错误: {str(e)}")
+class MainWindow(QApplication):
+    # Alt+X 热键ID
+    HOTKEY_SCREENSHOT = 1
     
-    def check_hotkey(self):
-        """检查热键消息"""
-        try:
-            hwnd = int(self.winId())
-            msg = wintypes.MSG()
-            
-            # 检查是否有热键消息 (PM_REMOVE = 0x0001)
-            while ctypes.windll.user32.PeekMessageW(ctypes.byref(msg), hwnd, WM_HOTKEY, WM_HOTKEY, 0x0001):
-                if msg.message == WM_HOTKEY and msg.wParam == self.hotkey_id:
-                    self.hotkey_pressed.emit()
-        except Exception as e:
-            pass
+    # 监视区域变化通知（监视线程发出，排队到 GUI 线程显示托盘消息）
+    watch_triggered = Signal(object)
     
-    def unregister_hotkey(self):
-        """注销热键"""
-        try:
-            hwnd = int(self.winId())
-            ctypes.windll.user32.UnregisterHotKey(hwnd, self.hotkey_id)
-            print("全局热键已注销")
-        except:
-            pass
-
-class MainWindow(QApplication):
-    def __init__(self):
-        """初始化主程序"""
+    def __init__(self, backend=None, workers=0, hotkey_backend=None, stream_host="127.0.0.1", stream_port=8765,
+                 config_path=None, exit_after_startup=False, tracker_backend=None):
+        """初始化主程序
+        
+        Args:
+            backend: 捕获后端名称，见 capture_backends.available_backends()，
+                为 None 时使用配置文件中的 capture.method
+            workers: 捕获工作进程数量，大于 0 时使用多进程捕获引擎，
+                截图、缩小和变化检测分散到多个 CPU 核心
+            hotkey_backend: 热键后端名称，见 hotkeys.HOTKEY_BACKENDS，默认按平台选择
+            stream_host: 串流服务的监听地址，向局域网提供时使用 0.0.0.0
+            stream_port: 串流服务的监听端口
+            config_path: 配置文件路径，默认为项目目录下的 config.json
+            exit_after_startup: 恢复的悬浮窗全部显示第一帧后输出启动耗时（JSON）并退出，用于基准测试
+            tracker_backend: 窗口跟踪器后端名称，见 window_tracker.TRACKER_BACKENDS，默认按平台选择
+        """
         super().__init__(sys.argv)
         
-        # 初始化捕获模块
-        self.capture = Capture()
+        # 启动耗时（毫秒）：导入、初始化、恢复会话和恢复的悬浮窗全部显示第一帧
+        self.startup = {"import_ms": (time.perf_counter() - START_TIME) * 1000}
+        self.exit_after_startup = exit_after_startup
         
-        # 当前悬浮窗
-        self.floating_window = None
+        # 读取配置：捕获后端和上次退出时的悬浮窗会话
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.config = ConfigManager(config_path or os.path.join(base_dir, "config.json"))
+        self.backend_name = backend or self.config.backend()
+        self.workers = workers
+        session_windows, session_scale_mode = self.config.load_session()
         
-        # 创建热键窗口
-        self.hotkey_window = HotkeyWindow()
-        self.hotkey_window.hotkey_pressed.connect(self.start_screenshot)
+        # 初始化捕获模块：所有悬浮窗共用同一个捕获后端实例
+        self.capture = create_backend(self.backend_name)
+        
+        # 捕获调度器：所有悬浮窗共用一次截图；固定很多区域时可改用多进程捕获引擎
+        if workers > 0:
+            from capture_pool import ProcessCaptureEngine
+            self.broker = ProcessCaptureEngine(self.backend_name, workers)
+        else:
+            self.broker = CaptureBroker(self.capture)
+        
+        # 调度器：按画面变化情况为每个悬浮窗调整帧率，并限制总截图开销
+        self.scheduler = Scheduler(self.broker)
+        
+        # 后台捕获线程：截图和图像转换不占用 GUI 线程
+        self.capture_worker = CaptureWorker(self.scheduler)
+        self.capture_worker.start()
+        
+        # 当前所有悬浮窗
+        self.floating_windows = []
+        
+        # 悬浮窗缩放模式，见 render_manager.SCALE_MODES
+        self.scale_mode = session_scale_mode or "auto"
+        
+        # 会话保存：窗口移动、缩放时合并为一次写入
+        self.quitting = False
+        self.session_timer = QTimer(self)
+        self.session_timer.setSingleShot(True)
+        self.session_timer.setInterval(1000)
+        self.session_timer.timeout.connect(self.save_session)
+        
+        # 性能统计：JSON Lines 日志与热点路径采样分析（默认关闭）
+        self.stats_logger = StatsLogger(os.path.join(base_dir, "stats.jsonl"))
+        self.stats_log_timer = QTimer(self)
+        self.stats_log_timer.timeout.connect(self.write_stats_log)
+        self.profile_path = os.path.join(base_dir, "profile.folded")
+        self.profiler = None
+        
+        # 录制和快照的输出目录
+        self.record_dir = os.path.join(base_dir, "recordings")
+        
+        # 共享内存导出名称的序号
+        self.export_count = 0
+        
+        # 串流服务（托盘菜单开启时创建）及区域名称的序号
+        self.stream_host = stream_host
+        self.stream_port = stream_port
+        self.stream_server = None
+        self.stream_count = 0
+        
+        # 窗口锚定：第一次让悬浮窗跟随目标窗口时创建窗口跟踪器
+        self.tracker_backend = tracker_backend
+        self.anchors = None
+        
+        # 回放缓存的内存上限（MB），0 表示关闭
+        self.history_mb = 0
+        
+        # 热键到选择器首次绘制完成的延迟
+        self.hotkey_latency = LatencyHistogram()
         
         # 初始化系统托盘
         self.setup_tray()
         
+        # 区域监视：第一次添加监视区域时才创建监视器和线程；配置文件中的 watches 在启动时加载
+        self.watcher = None
+        self.watch_worker = None
+        self.watch_triggered.connect(self.on_watch_triggered)
+        if self.config.get("watches"):
+            from watch import load_watches
+            for options in load_watches(self.config.path):
+                self.add_watch(**options)
+        
+        # 注册全局热键：热键消息由事件循环分发，不再定时轮询
+        self.hotkeys = create_hotkey_backend(hotkey_backend, self)
+        self.hotkeys.activated.connect(self.on_hotkey)
+        if self.hotkeys.register(self.HOTKEY_SCREENSHOT, MOD_ALT, VK_X):
+            print(f"全局 Alt+X 热键注册成功（{self.hotkeys.name}）")
+        
         # 隐藏主窗口
         self.setQuitOnLastWindowClosed(False)
+        self.startup["init_ms"] = (time.perf_counter() - START_TIME) * 1000
+        
+        # 恢复上次退出时的悬浮窗，窗口显示后才开始截图
+        self.restore_session(session_windows)
+        self.startup["restore_ms"] = (time.perf_counter() - START_TIME) * 1000
+        self.startup["windows"] = len(self.floating_windows)
+        
+        # 等待恢复的悬浮窗显示第一帧
+        self.startup_timer = QTimer(self)
+        self.startup_timer.timeout.connect(self.check_startup)
+        self.startup_timer.start(5)
+        
+        # 屏幕选择器在事件循环空闲后再预先创建（冻结模式需要截取全屏），不推迟恢复的悬浮窗
+        self.selector = None
+        QTimer.singleShot(0, self.prepare_selector)
+        self.freeze_action.toggled.connect(lambda checked: self.prepare_selector())
     
     def setup_tray(self):
         """设置系统托盘"""
@@ -125,9 +179,88 @@ class MainWindow(QApplication):
         
         # 添加截图动作
         screenshot_action = QAction("截图 (Alt+X)", self)
-        screenshot_action.triggered.connect(self.start_screenshot)
+        screenshot_action.triggered.connect(lambda: self.start_screenshot(time.perf_counter()))
         tray_menu.addAction(screenshot_action)
         
+        # 添加屏幕选择选项
+        selector_menu = tray_menu.addMenu("屏幕选择")
+        self.freeze_action = QAction("冻结画面", self)
+        self.freeze_action.setCheckable(True)
+        selector_menu.addAction(self.freeze_action)
+        self.loupe_action = QAction("放大镜（冻结画面时可用）", self)
+        self.loupe_action.setCheckable(True)
+        selector_menu.addAction(self.loupe_action)
+        
+        # 添加帧率子菜单，每次打开时刷新
+        self.fps_menu = tray_menu.addMenu("悬浮窗帧率")
+        self.fps_menu.aboutToShow.connect(self.update_fps_menu)
+        
+        # 添加缩放模式子菜单
+        scale_menu = tray_menu.addMenu("缩放模式")
+        scale_group = QActionGroup(self)
+        scale_group.setExclusive(True)
+        for mode, text in (("auto", "自动"), ("nearest", "最近邻（最快）"),
+                           ("smooth", "平滑"), ("area", "区域平均（OpenCV）")):
+            action = QAction(text, self)
+            action.setCheckable(True)
+            action.setChecked(mode == self.scale_mode)
+            action.triggered.connect(lambda checked, mode=mode: self.set_scale_mode(mode))
+            scale_group.addAction(action)
+            scale_menu.addAction(action)
+        
+        # 添加录制子菜单
+        record_menu = tray_menu.addMenu("录制")
+        for fmt, text in (("video", "录制为视频 (mp4)"), ("png", "录制为 PNG 序列"), ("raw", "录制为原始帧")):
+            action = record_menu.addAction(text)
+            action.triggered.connect(lambda checked=False, fmt=fmt: self.start_recording(fmt))
+        record_menu.addAction("停止录制").triggered.connect(self.stop_recording)
+        record_menu.addSeparator()
+        record_menu.addAction("保存快照").triggered.connect(self.save_snapshots)
+        
+        # 添加回放缓存子菜单
+        history_menu = tray_menu.addMenu("回放缓存")
+        history_group = QActionGroup(self)
+        history_group.setExclusive(True)
+        for mb, text in ((0, "关闭"), (32, "32 MB"), (128, "128 MB"), (512, "512 MB")):
+            action = QAction(text, self)
+            action.setCheckable(True)
+            action.setChecked(mb == self.history_mb)
+            action.triggered.connect(lambda checked, mb=mb: self.set_history_mb(mb))
+            history_group.addAction(action)
+            history_menu.addAction(action)
+        
+        # 添加监视区域子菜单，每次打开时刷新
+        self.watch_menu = tray_menu.addMenu("监视区域")
+        self.watch_menu.aboutToShow.connect(self.update_watch_menu)
+        
+        # 添加共享内存导出开关
+        self.export_action = QAction("共享内存导出", self)
+        self.export_action.setCheckable(True)
+        self.export_action.toggled.connect(self.toggle_export)
+        tray_menu.addAction(self.export_action)
+        
+        # 添加串流服务开关
+        self.stream_action = QAction("局域网串流 (MJPEG/WebSocket)", self)
+        self.stream_action.setCheckable(True)
+        self.stream_action.toggled.connect(self.toggle_stream)
+        tray_menu.addAction(self.stream_action)
+        
+        # 添加性能统计子菜单
+        self.stats_menu = tray_menu.addMenu("性能统计")
+        self.stats_menu.aboutToShow.connect(self.update_stats_menu)
+        
+        self.overlay_action = QAction("显示统计浮层", self)
+        self.overlay_action.setCheckable(True)
+        self.overlay_action.toggled.connect(self.toggle_overlay)
+        
+        self.stats_log_action = QAction("写入统计日志 (stats.jsonl)", self)
+        self.stats_log_action.setCheckable(True)
+        self.stats_log_action.toggled.connect(self.toggle_stats_log)
+        
+        self.profiler_action = QAction("热点路径采样分析", self)
+        self.profiler_action.setCheckable(True)
+        self.profiler_action.toggled.connect(self.toggle_profiler)
+        
         tray_menu.addSeparator()
         
         # 添加退出动作
@@ -152,47 +285,599 @@ class MainWindow(QApplication):
             3000
         )
     
+    def update_fps_menu(self):
+        """刷新帧率子菜单，显示每个悬浮窗的当前帧率"""
+        self.fps_menu.clear()
+        if not self.floating_windows:
+            action = self.fps_menu.addAction("没有悬浮窗")
+            action.setEnabled(False)
+            return
+        
+        for index, floating_window in enumerate(self.floating_windows, 1):
+            stats = self.scheduler.get_stats(floating_window.broker_token)
+            if stats is None:
+                continue
+            text = (f"悬浮窗 {index}: {stats['fps']:.1f} FPS "
+                    f"(调度 {stats['rate']:.1f} / 目标 {stats['target_fps']:.0f} / 最低 {stats['min_fps']:.0f}, "
+                    f"耗时 {stats['cost_ms']:.1f}ms)")
+            action = self.fps_menu.addAction(text)
+            action.setEnabled(False)
+    
+    def window_stats(self):
+        """收集所有悬浮窗的统计信息
+        
+        Returns:
+            list: 每个悬浮窗的统计字典，包含区域、帧统计和调度统计
+        """
+        result = []
+        for index, floating_window in enumerate(self.floating_windows, 1):
+            stats = floating_window.get_stats()
+            stats["index"] = index
+            stats["region"] = floating_window.region
+            stats["scheduler"] = self.scheduler.get_stats(floating_window.broker_token)
+            result.append(stats)
+        return result
+    
+    def update_stats_menu(self):
+        """刷新性能统计子菜单"""
+        self.stats_menu.clear()
+        if not self.floating_windows:
+            action = self.stats_menu.addAction("没有悬浮窗")
+            action.setEnabled(False)
+        
+        for stats in self.window_stats():
+            lines = [
+                f"悬浮窗 {stats['index']}: {stats['fps']:.0f} FPS, 帧龄 p50 {stats['age']['p50_ms']:.1f}ms, "
+                f"跳过 {stats['skip_ratio']:.0%}, 丢帧 {stats['dropped']}, 复制 {stats['bytes_copied'] / 1e6:.1f}MB",
+                f"    p50/p95 截图 {stats['capture']['p50_ms']:.1f}/{stats['capture']['p95_ms']:.1f}ms, "
+                f"转换 {stats['convert']['p50_ms']:.1f}/{stats['convert']['p95_ms']:.1f}ms, "
+                f"缩放 {stats['scale']['p50_ms']:.1f}/{stats['scale']['p95_ms']:.1f}ms, "
+                f"绘制 {stats['paint']['p50_ms']:.1f}/{stats['paint']['p95_ms']:.1f}ms"
+            ]
+            if stats["track"]["count"]:
+                lines[1] += f", 跟随 {stats['track']['p50_ms']:.3f}/{stats['track']['p95_ms']:.3f}ms"
+            if stats["filters"]:
+                lines.append("    滤镜 p50/p95 " + ", ".join(
+                    f"{name} {filter_stats['p50_ms']:.1f}/{filter_stats['p95_ms']:.1f}ms"
+                    for name, filter_stats in stats["filters"].items()))
+            if "history_frames" in stats:
+                lines.append(f"    回放 {stats['history_seconds']:.0f}s ({stats['history_frames']} 帧), "
+                             f"{stats['history_bytes'] / 1048576:.1f}/{stats['history_max_bytes'] / 1048576:.0f}MB, "
+                             f"{stats['history_seconds_per_mb']:.1f}s/MB, 原始帧的 {stats['history_ratio']:.1%}")
+            if "stream_clients" in stats:
+                lines.append(f"    串流 {stats['stream_clients']} 个客户端, 编码 {stats['stream_encoded']} 帧 "
+                             f"p50/p95 {stats['stream_encode']['p50_ms']:.1f}/{stats['stream_encode']['p95_ms']:.1f}ms, "
+                             f"限速跳过 {stats['stream_skipped']}, 慢客户端丢帧 {stats['stream_dropped']}")
+            if "record_written" in stats:
+                lines.append(f"    录制 {stats['record_written']} 帧, 排队 {stats['record_queued']}, "
+                             f"丢弃 {stats['record_dropped']}, 写入 {stats['record_encode_ms']:.1f}ms/帧")
+            for line in lines:
+                action = self.stats_menu.addAction(line)
+                action.setEnabled(False)
+        
+        if self.watcher is not None and self.watcher.has_watches():
+            stats = self.watcher.get_stats()
+            action = self.stats_menu.addAction(
+                f"监视 {stats['watch_regions']} 个区域 @ {stats['watch_fps']:.0f} FPS, "
+                f"单次 p50/p95 {stats['watch_tick']['p50_ms']:.1f}/{stats['watch_tick']['p95_ms']:.1f}ms, "
+                f"触发 {stats['watch_events']} 次")
+            action.setEnabled(False)
+        
+        latency = self.hotkey_latency.snapshot()
+        if latency["count"]:
+            action = self.stats_menu.addAction(
+                f"热键到选择器显示 p50/p95 {latency['p50_ms']:.1f}/{latency['p95_ms']:.1f}ms "
+                f"(最大 {latency['max_ms']:.1f}ms, {latency['count']} 次)")
+            action.setEnabled(False)
+        
+        if self.anchors is not None and self.anchors.has_anchors():
+            stats = self.anchors.get_stats()
+            mode = "移动通知" if stats["track_notified"] == stats["track_windows"] else "轮询"
+            action = self.stats_menu.addAction(
+                f"跟随 {stats['track_windows']} 个窗口（{stats['anchor_regions']} 个区域，{mode}，"
+                f"丢失 {stats['anchor_lost']}）: 刷新 p50/p95 {stats['track_refresh']['p50_ms']:.3f}/"
+                f"{stats['track_refresh']['p95_ms']:.3f}ms, 查询 {stats['track_queries']} 次, "
+                f"通知 {stats['track_notifications']} 次, 移动 {stats['track_moves']} 次")
+            action.setEnabled(False)
+        
+        if "first_frame_ms" in self.startup:
+            action = self.stats_menu.addAction(self.startup_text())
+            action.setEnabled(False)
+        
+        self.stats_menu.addSeparator()
+        self.stats_menu.addAction(self.overlay_action)
+        self.stats_menu.addAction(self.stats_log_action)
+        self.stats_menu.addAction(self.profiler_action)
+    
+    def output_path(self, index, extension=""):
+        """生成录制或快照的输出路径
+        
+        Args:
+            index: 悬浮窗序号
+            extension: 扩展名，为空时表示目录
+        """
+        os.makedirs(self.record_dir, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d_%H%M%S')}_{index}{extension}"
+        return os.path.join(self.record_dir, name)
+    
+    def start_recording(self, fmt):
+        """开始录制所有悬浮窗
+        
+        Args:
+            fmt: 输出格式，见 recorder.RECORD_FORMATS
+        """
+        extensions = {"video": ".mp4", "png": "", "raw": ".raw"}
+        for index, floating_window in enumerate(self.floating_windows, 1):
+            path = self.output_path(index, extensions[fmt])
+            if floating_window.start_recording(path, fmt):
+                print(f"开始录制: {path}")
+    
+    def stop_recording(self):
+        """停止所有悬浮窗的录制"""
+        for floating_window in self.floating_windows:
+            floating_window.stop_recording()
+    
+    def save_snapshots(self):
+        """把所有悬浮窗当前的画面保存为 PNG"""
+        for index, floating_window in enumerate(self.floating_windows, 1):
+            path = self.output_path(index, ".png")
+            if floating_window.save_snapshot(path):
+                print(f"快照已保存到: {path}")
+    
+    def start_export(self, floating_window):
+        """为悬浮窗开始共享内存导出"""
+        self.export_count += 1
+        name = f"landscapecutter_{self.export_count}"
+        if floating_window.start_export(name):
+            print(f"共享内存导出: {name}（python frame_export.py {name} 可查看）")
+    
+    def toggle_export(self, checked):
+        """开始或停止所有悬浮窗（包括之后创建的）的共享内存导出"""
+        for floating_window in self.floating_windows:
+            if checked:
+                self.start_export(floating_window)
+            else:
+                floating_window.stop_export()
+    
+    def start_stream(self, floating_window):
+        """为悬浮窗添加串流区域"""
+        self.stream_count += 1
+        name = str(self.stream_count)
+        floating_window.start_stream(self.stream_server.add_source(name))
+        print(f"串流: {self.stream_server.url}stream/{name}（WebSocket: /ws/{name}）")
+    
+    def stop_stream(self, floating_window):
+        """移除悬浮窗的串流区域"""
+        if floating_window.stream is not None and self.stream_server is not None:
+            self.stream_server.remove_source(floating_window.stream.name)
+        floating_window.stop_stream()
+    
+    def toggle_stream(self, checked):
+        """开始或停止串流服务，开启时所有悬浮窗（包括之后创建的）都提供串流"""
+        if checked:
+            try:
+                from stream_server import StreamServer
+                self.stream_server = StreamServer(self.stream_host, self.stream_port)
+                self.stream_server.start()
+            except (OSError, ImportError) as e:
+                print(f"启动串流服务错误: {str(e)}")
+                self.stream_server = None
+                self.stream_action.setChecked(False)
+                return
+            for floating_window in self.floating_windows:
+                self.start_stream(floating_window)
+            self.tray_icon.showMessage("LandscapeCutter", f"串流服务已启动: {self.stream_server.url}",
+                                       QSystemTrayIcon.Information, 3000)
+        elif self.stream_server is not None:
+            for floating_window in self.floating_windows:
+                self.stop_stream(floating_window)
+            self.stream_server.stop()
+            self.stream_server = None
+            print("串流服务已停止")
+    
+    def set_history_mb(self, mb):
+        """设置所有悬浮窗（包括之后创建的）的回放缓存上限，0 表示关闭"""
+        self.history_mb = mb
+        for floating_window in self.floating_windows:
+            if mb > 0:
+                floating_window.start_history(mb)
+            else:
+                floating_window.stop_history()
+    
+    def set_scale_mode(self, mode):
+        """设置所有悬浮窗（包括之后创建的）的缩放模式"""
+        self.scale_mode = mode
+        for floating_window in self.floating_windows:
+            floating_window.set_scale_mode(mode)
+        self.schedule_session_save()
+    
+    def toggle_overlay(self, checked):
+        """显示或隐藏所有悬浮窗的统计浮层"""
+        for floating_window in self.floating_windows:
+            floating_window.set_overlay_visible(checked)
+    
+    def toggle_stats_log(self, checked):
+        """开始或停止定期写入统计日志"""
+        if checked:
+            self.stats_log_timer.start(5000)
+            print(f"统计日志: {self.stats_logger.path}")
+        else:
+            self.stats_log_timer.stop()
+    
+    def write_stats_log(self):
+        """写入一条统计日志"""
+        self.stats_logger.write(self.window_stats())
+    
+    def toggle_profiler(self, checked):
+        """开始或停止热点路径采样分析，停止时输出热点函数并保存折叠栈"""
+        if checked:
+            self.profiler = HotPathProfiler()
+            self.profiler.start()
+            print("热点路径采样分析已开始")
+            return
+        
+        if self.profiler is None:
+            return
+        self.profiler.stop()
+        self.profiler.join(1.0)
+        print(f"热点路径采样分析结束，共 {self.profiler.samples} 次采样:")
+        for name, hits, ratio in self.profiler.top_functions():
+            print(f"  {ratio:6.1%} {hits:6d}  {name}")
+        try:
+            self.profiler.save(self.profile_path)
+            print(f"折叠栈已保存到: {self.profile_path}")
+        except OSError as e:
+            print(f"保存采样结果错误: {str(e)}")
+        self.profiler = None
+    
+    def update_watch_menu(self):
+        """刷新监视区域子菜单，点击某项停止监视"""
+        self.watch_menu.clear()
+        watches = self.watcher.list_watches() if self.watcher is not None else []
+        if not watches:
+            action = self.watch_menu.addAction("没有监视区域（右键悬浮窗选择「改为监视」）")
+            action.setEnabled(False)
+            return
+        
+        for watch in watches:
+            text = (f"{watch['name']}: 变化 {watch['score']:.1%} / 阈值 {watch['threshold']:.1%} "
+                    f"({watch['method']}), 触发 {watch['count']} 次")
+            action = self.watch_menu.addAction(text)
+            action.setCheckable(True)
+            action.setChecked(True)
+            action.triggered.connect(lambda checked=False, watch_id=watch["id"]: self.remove_watch(watch_id))
+    
+    def ensure_watcher(self):
+        """创建区域监视器和监视线程
+        
+        监视器与悬浮窗共用同一个捕获后端实例，在独立的线程中低帧率批量检查所有监视区域；
+        没有监视区域时不创建，启动时不导入监视模块
+        """
+        if self.watcher is not None:
+            return
+        from watch import RegionWatcher
+        # 多进程捕获时主进程的后端只由监视器使用；否则与捕获调度器共用截图锁，两个线程不会同时截图
+        grab_lock = self.broker.grab_lock if self.workers == 0 else None
+        self.watcher = RegionWatcher(self.capture, notifier=self.watch_triggered.emit, grab_lock=grab_lock)
+        self.watch_worker = CaptureWorker(self.watcher)
+        self.watch_worker.start()
+    
+    def add_watch(self, region, **options):
+        """添加监视区域并启动监视线程
+        
+        Args:
+            region: 区域信息（物理像素）
+            options: RegionWatcher.add 的其他参数
+        """
+        self.ensure_watcher()
+        try:
+            watch_id = self.watcher.add(region, **options)
+        except ValueError as e:
+            print(f"添加监视区域错误: {str(e)}")
+            return None
+        self.watch_worker.resume()
+        return watch_id
+    
+    def remove_watch(self, watch_id):
+        """停止监视区域，没有监视区域时暂停监视线程"""
+        if self.watcher is None:
+            return
+        self.watcher.remove(watch_id)
+        if not self.watcher.has_watches():
+            self.watch_worker.pause()
+    
+    def watch_floating_window(self, floating_window):
+        """把悬浮窗改为监视：关闭悬浮窗，区域变化时显示托盘通知"""
+        index = self.floating_windows.index(floating_window) + 1 if floating_window in self.floating_windows else 0
+        if self.add_watch(floating_window.current_region(), name=f"悬浮窗 {index}", notify=True) is not None:
+            floating_window.close()
+    
+    def ensure_anchors(self):
+        """创建窗口跟踪器和窗口锚定
+        
+        在 GUI 线程中创建，窗口移动通知由 GUI 线程的事件循环接收；
+        捕获线程每次截图前通过调度器移动跟随目标窗口的区域
+        
+        Returns:
+            bool: 是否创建成功
+        """
+        if self.anchors is not None:
+            return True
+        from window_tracker import WindowAnchors, create_window_tracker
+        try:
+            tracker = create_window_tracker(self.tracker_backend)
+        except (ValueError, OSError, AttributeError) as e:
+            print(f"创建窗口跟踪器错误: {str(e)}")
+            return False
+        self.anchors = WindowAnchors(tracker, self.broker)
+        self.scheduler.anchors = self.anchors
+        return True
+    
+    def anchor_floating_window(self, floating_window, enabled):
+        """让悬浮窗的区域跟随下方的目标窗口，或取消跟随
+        
+        Args:
+            floating_window: 悬浮窗
+            enabled: True 时锚定到区域中心下方最上层的窗口（忽略本程序的悬浮窗）
+        """
+        if not enabled:
+            if floating_window.anchor is not None:
+                floating_window.set_anchor(self.anchors, None)
+                print("已取消跟随目标窗口")
+            return
+        if not self.ensure_anchors():
+            return
+        
+        from window_tracker import make_anchor
+        region = floating_window.current_region()
+        exclude = {int(window.winId()) for window in self.floating_windows}
+        target = self.anchors.tracker.find_window(region["x"] + region["width"] // 2,
+                                                  region["y"] + region["height"] // 2, exclude)
+        if target is None:
+            self.tray_icon.showMessage("LandscapeCutter", "区域下方没有找到可跟随的窗口",
+                                       QSystemTrayIcon.Warning, 3000)
+            return
+        anchor = make_anchor(target, region)
+        floating_window.set_anchor(self.anchors, anchor)
+        self.config.set_target_window(target)
+        self.config.set_selected_region(region, anchor)
+        print(f"跟随目标窗口: {target['title']}（hwnd {target['hwnd']}，"
+              f"偏移 {anchor['relative_x']}, {anchor['relative_y']}）")
+    
+    def restore_anchor(self, floating_window, anchor):
+        """恢复会话中悬浮窗的锚定
+        
+        保存的窗口句柄可能已被其他窗口重用，按标题和进程ID确认或重新查找目标窗口，
+        找不到时取消锚定，区域保持固定
+        """
+        if not self.ensure_anchors():
+            return
+        from window_tracker import resolve_anchor
+        resolved = resolve_anchor(self.anchors.tracker, anchor)
+        if resolved is None:
+            print(f"目标窗口已关闭，区域保持固定: {anchor.get('title') or anchor['hwnd']}")
+            return
+        if resolved["hwnd"] != anchor["hwnd"]:
+            print(f"目标窗口句柄已变化，重新跟随: {resolved['title']}（hwnd {resolved['hwnd']}）")
+        floating_window.set_anchor(self.anchors, resolved)
+    
+    def on_watch_triggered(self, event):
+        """监视区域变化时显示托盘通知"""
+        self.tray_icon.showMessage(
+            "LandscapeCutter 区域变化",
+            f"{event['name']} 变化 {event['score']:.0%}（第 {event['count']} 次）",
+            QSystemTrayIcon.Information,
+            5000
+        )
+    
     def on_tray_activated(self, reason):
         """托盘图标激活事件"""
         if reason in (QSystemTrayIcon.Trigger, QSystemTrayIcon.DoubleClick):
-            self.start_screenshot()
+            self.start_screenshot(time.perf_counter())
     
-    def start_screenshot(self):
-        """开始截图"""
+    def prepare_selector(self):
+        """创建隐藏的屏幕选择器并提前创建其原生窗口
+        
+        冻结画面选项决定窗口是否透明，切换时重新创建
+        """
+        if self.selector is not None:
+            self.selector.unwatch_screens()
+            self.selector.deleteLater()
+        self.selector = ScreenSelector(freeze=self.freeze_action.isChecked())
+        self.selector.watch_screens()
+        self.selector.first_painted.connect(self.on_selector_painted)
+        self.selector.winId()
+    
+    def on_hotkey(self, hotkey_id, timestamp):
+        """热键按下事件
+        
+        Args:
+            hotkey_id: 热键ID
+            timestamp: 收到热键消息的时间（time.perf_counter）
+        """
+        if hotkey_id == self.HOTKEY_SCREENSHOT:
+            self.start_screenshot(timestamp)
+    
+    def on_selector_painted(self, latency):
+        """记录热键到选择器首次绘制完成的延迟"""
+        self.hotkey_latency.record(latency)
+        print(f"热键到选择器显示: {latency * 1000:.1f}ms")
+    
+    def start_screenshot(self, request_time=None):
+        """开始截图
+        
+        Args:
+            request_time: 触发截图的时间（time.perf_counter），用于测量选择器的显示延迟
+        """
+        if self.selector is None:
+            self.prepare_selector()
+        # 选择器已经打开时忽略重复的热键
+        if self.selector.isVisible():
+            return
         try:
-            # 如果已有悬浮窗，先关闭
-            if self.floating_window:
-                self.floating_window.close()
-                self.floating_window = None
-            
-            # 创建屏幕选择器
-            selector = ScreenSelector()
+            self.selector.loupe = self.loupe_action.isChecked()
             
             # 显示选择器并获取选择的区域
-            region, logical_rect = selector.select_region()
+            region, logical_rect = self.selector.select_region(request_time)
             
             if region and logical_rect:
                 print(f"选择的区域（物理像素）: {region}")
                 print(f"选择的区域（逻辑像素）: {logical_rect}")
                 # 创建悬浮窗，传入逻辑矩形以确保窗口大小和位置与选择区域一致
-                self.floating_window = FloatingWindow(self.capture, region, logical_rect)
-                self.floating_window.show()
+                floating_window = FloatingWindow(self.capture, region, logical_rect, self.broker, threaded=True,
+                                                 scale_mode=self.scale_mode)
+                self.add_floating_window(floating_window)
+                self.config.set_selected_region(region)
+                self.schedule_session_save()
         except Exception as e:
             print(f"截图错误: {str(e)}")
             import traceback
             traceback.print_exc()
     
+    def add_floating_window(self, floating_window):
+        """应用当前的全局选项并显示悬浮窗
+        
+        Args:
+            floating_window: 新建或从会话恢复的悬浮窗
+        """
+        floating_window.closed.connect(self.on_floating_window_closed)
+        floating_window.watch_requested.connect(self.watch_floating_window)
+        floating_window.anchor_requested.connect(self.anchor_floating_window)
+        floating_window.state_changed.connect(self.schedule_session_save)
+        floating_window.set_overlay_visible(self.overlay_action.isChecked())
+        if self.export_action.isChecked():
+            self.start_export(floating_window)
+        if self.history_mb > 0:
+            floating_window.start_history(self.history_mb)
+        if self.stream_server is not None:
+            self.start_stream(floating_window)
+        self.floating_windows.append(floating_window)
+        floating_window.show()
+        
+        self.capture_worker.resume()
+    
+    def restore_session(self, windows):
+        """恢复上次退出时的悬浮窗
+        
+        Args:
+            windows: 窗口状态列表，见 FloatingWindow.session_state
+        """
+        for state in windows:
+            try:
+                floating_window = FloatingWindow(self.capture, state["region"], state["logical_rect"], self.broker,
+                                                 threaded=True, target_fps=state.get("target_fps", 60),
+                                                 min_fps=state.get("min_fps", 5), scale_mode=self.scale_mode)
+                if state.get("filters"):
+                    floating_window.set_filters(state["filters"])
+                if state.get("anchor"):
+                    self.restore_anchor(floating_window, state["anchor"])
+                floating_window.move(*state["position"])
+                floating_window.resize(*state["size"])
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"恢复悬浮窗错误: {str(e)}")
+                continue
+            self.add_floating_window(floating_window)
+        if windows:
+            print(f"已恢复 {len(self.floating_windows)} 个悬浮窗")
+    
+    def schedule_session_save(self):
+        """稍后保存会话，连续的移动和缩放只写入一次"""
+        if not self.quitting:
+            self.session_timer.start()
+    
+    def save_session(self):
+        """把当前所有悬浮窗保存到会话文件，捕获后端等配置项变化时才写入配置文件"""
+        self.session_timer.stop()
+        self.config.save_session([floating_window.session_state() for floating_window in self.floating_windows],
+                                 self.scale_mode)
+        self.config.set_backend(self.backend_name)
+        if self.config.dirty:
+            self.config.save()
+    
+    def check_startup(self):
+        """恢复的悬浮窗全部显示第一帧后记录启动耗时"""
+        elapsed = (time.perf_counter() - START_TIME) * 1000
+        painted = all(floating_window.frame_stats.painted_frames > 0 for floating_window in self.floating_windows)
+        if not painted and elapsed < 5000:
+            return
+        self.startup_timer.stop()
+        self.startup["first_frame_ms"] = elapsed
+        self.startup["complete"] = painted
+        print(self.startup_text())
+        if self.exit_after_startup:
+            print(json.dumps(self.startup))
+            sys.stdout.flush()
+            self.quit_app()
+    
+    def startup_text(self):
+        """启动耗时的说明文字"""
+        startup = self.startup
+        text = (f"启动耗时: 导入 {startup['import_ms']:.0f}ms, 初始化 {startup['init_ms']:.0f}ms, "
+                f"恢复 {startup['windows']} 个悬浮窗 {startup['restore_ms']:.0f}ms, "
+                f"第一帧 {startup['first_frame_ms']:.0f}ms")
+        return text if startup["complete"] else text + "（超时）"
+    
+    def on_floating_window_closed(self, floating_window):
+        """悬浮窗关闭事件"""
+        if floating_window in self.floating_windows:
+            self.floating_windows.remove(floating_window)
+        self.stop_stream(floating_window)
+        self.schedule_session_save()
+        
+        # 没有悬浮窗时暂停捕获线程
+        if not self.floating_windows:
+            self.capture_worker.pause()
+    
     def quit_app(self):
         """退出程序"""
+        # 保存会话后再关闭悬浮窗，下次启动时恢复
+        self.save_session()
+        self.quitting = True
+        
         # 注销热键
-        if self.hotkey_window:
-            self.hotkey_window.unregister_hotkey()
-            self.hotkey_window.close()
+        self.hotkeys.close()
+        print("全局热键已注销")
         
-        if self.floating_window:
-            self.floating_window.close()
+        for floating_window in list(self.floating_windows):
+            floating_window.close()
+        
+        # 停止采样分析和捕获线程
+        if self.profiler is not None:
+            self.profiler_action.setChecked(False)
+        self.capture_worker.stop()
+        self.capture_worker.join(1.0)
+        if self.watcher is not None:
+            self.watch_worker.stop()
+            self.watch_worker.join(1.0)
+            self.watcher.close()
+        if self.stream_server is not None:
+            self.stream_server.stop()
+        if self.anchors is not None:
+            self.anchors.tracker.close()
+        if self.workers > 0:
+            self.broker.close()
+        # 录制的写入线程是守护线程，退出前等待其写完剩余的帧并关闭文件
+        from recorder import wait_for_recorders
+        if not wait_for_recorders():
+            print("录制文件未能在退出前写完")
         self.quit()
 
 if __name__ == "__main__":
-    app = MainWindow()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="LandscapeCutter")
+    parser.add_argument("--backend", default=None, help="捕获后端名称，默认使用配置文件中的 capture.method")
+    parser.add_argument("--workers", type=int, default=0, help="捕获工作进程数量，0 表示在捕获线程中截图")
+    parser.add_argument("--hotkeys", default=None, help="热键后端名称（windows 或 fake），默认按平台选择")
+    parser.add_argument("--stream-host", default="127.0.0.1",
+                        help="串流服务的监听地址，向局域网提供时使用 0.0.0.0")
+    parser.add_argument("--stream-port", type=int, default=8765, help="串流服务的监听端口")
+    parser.add_argument("--tracker", default=None, help="窗口跟踪器后端名称（windows 或 fake），默认按平台选择")
+    parser.add_argument("--config", default=None, help="配置文件路径，默认为项目目录下的 config.json")
+    parser.add_argument("--exit-after-startup", action="store_true",
+                        help="恢复的悬浮窗全部显示第一帧后输出启动耗时（JSON）并退出")
+    args, _ = parser.parse_known_args()
+    
+    app = MainWindow(args.backend, args.workers, args.hotkeys, args.stream_host, args.stream_port,
+                     args.config, args.exit_after_startup, args.tracker)
     sys.exit(app.exec())
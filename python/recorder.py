@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 录制模块
+把悬浮窗截取的画面写入磁盘（视频、PNG 序列或原始帧序列），
+编码和压缩在后台线程中进行，与捕获线程之间通过有界队列连接，
+队列满时按丢帧策略丢弃，录制不会拖慢悬浮窗的显示
+"""
+
+import os
+import json
+import time
+import queue
+import threading
+
+import numpy as np
+
+# 输出格式：video 使用 OpenCV VideoWriter 写入 mp4，png 写入 PNG 序列，
+# raw 把 BGRA 帧依次追加到同一个 .raw 文件并在 .json 中记录尺寸和时间戳
+RECORD_FORMATS = ("video", "png", "raw")
+# 丢帧策略：队列满时 drop_newest 丢弃新到的帧，drop_oldest 丢弃队列中最旧的帧
+DROP_POLICIES = ("drop_newest", "drop_oldest")
+
+# 已停止但仍在写入剩余帧的录制器，程序退出前由 wait_for_recorders 等待
+stopping = set()
+stopping_lock = threading.Lock()
+
+
+class FrameRecorder(threading.Thread):
+    def __init__(self, path, fmt="video", fps=30, queue_size=8, drop_policy="drop_newest"):
+        """初始化录制器
+
+        Args:
+            path: 输出路径，video 为 .mp4 文件，png 为目录，raw 为 .raw 文件
+            fmt: 输出格式，见 RECORD_FORMATS
+            fps: 视频帧率；未变化而被跳过的时间段以重复上一帧补齐
+            queue_size: 待写入帧队列的最大长度，决定录制最多占用的内存
+            drop_policy: 队列满时的丢帧策略，见 DROP_POLICIES
+        """
+        super().__init__(name="FrameRecorder", daemon=True)
+        if fmt not in RECORD_FORMATS:
+            raise ValueError(f"未知的录制格式: {fmt}")
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"未知的丢帧策略: {drop_policy}")
+        self.path = path
+        self.fmt = fmt
+        self.fps = fps
+        self.drop_policy = drop_policy
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stop_event = threading.Event()
+        self.cv2 = None
+        if fmt in ("video", "png"):
+            import cv2
+            self.cv2 = cv2
+
+        # 写入状态
+        self.writer = None
+        self.raw_file = None
+        self.raw_index = []
+        self.start_time = None
+        self.last_frame = None
+        self.video_frames = 0
+
+        # 统计信息
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.duplicated = 0
+        self.bytes_written = 0
+        self.encode_time = 0.0
+
+    def submit(self, frame, timestamp):
+        """提交一帧（在捕获线程调用，不会阻塞）
+
+        帧只在回调期间有效，入队前会复制一份；队列已满且策略为 drop_newest 时不复制
+
+        Args:
+            frame: BGRA 图像数据
+            timestamp: 截图时间戳（time.perf_counter）
+
+        Returns:
+            bool: 是否已入队，False 表示按策略丢弃
+        """
+        if self.stop_event.is_set():
+            return False
+        self.submitted += 1
+        if self.queue.full():
+            if self.drop_policy == "drop_newest":
+                self.dropped += 1
+                return False
+            try:
+                self.queue.get_nowait()
+                self.dropped += 1
+            except queue.Empty:
+                pass
+        try:
+            self.queue.put_nowait((np.array(frame, order="C", copy=True), timestamp))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def run(self):
+        """写入线程主循环"""
+        while True:
+            try:
+                frame, timestamp = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                if self.stop_event.is_set():
+                    break
+                continue
+            start = time.perf_counter()
+            try:
+                self.write(frame, timestamp)
+                self.written += 1
+            except Exception as e:
+                print(f"录制写入错误: {str(e)}")
+            self.encode_time += time.perf_counter() - start
+        self.finish()
+        with stopping_lock:
+            stopping.discard(self)
+        print(f"录制结束: {self.path}，写入 {self.written} 帧，丢弃 {self.dropped} 帧")
+
+    def write(self, frame, timestamp):
+        """按输出格式写入一帧"""
+        if self.start_time is None:
+            self.start_time = timestamp
+        elapsed = timestamp - self.start_time
+
+        if self.fmt == "video":
+            bgr = self.cv2.cvtColor(frame, self.cv2.COLOR_BGRA2BGR)
+            if self.writer is None:
+                fourcc = self.cv2.VideoWriter_fourcc(*"mp4v")
+                self.writer = self.cv2.VideoWriter(self.path, fourcc, self.fps,
+                                                   (bgr.shape[1], bgr.shape[0]))
+                if not self.writer.isOpened():
+                    raise OSError(f"无法创建视频文件: {self.path}")
+            # 跳过的未变化帧以重复上一帧补齐，保持视频时间轴与实际时间一致
+            index = int(round(elapsed * self.fps))
+            while self.last_frame is not None and self.video_frames < index:
+                self.writer.write(self.last_frame)
+                self.video_frames += 1
+                self.duplicated += 1
+            self.writer.write(bgr)
+            self.video_frames += 1
+            self.last_frame = bgr
+            self.bytes_written += bgr.nbytes
+        elif self.fmt == "png":
+            os.makedirs(self.path, exist_ok=True)
+            file_path = os.path.join(self.path, f"frame_{self.written:06d}_{int(elapsed * 1000):09d}.png")
+            if not self.cv2.imwrite(file_path, frame):
+                raise OSError(f"无法写入文件: {file_path}")
+            self.bytes_written += os.path.getsize(file_path)
+        else:
+            if self.raw_file is None:
+                self.raw_file = open(self.path, "wb")
+            self.raw_file.write(frame.data)
+            self.raw_index.append({"shape": list(frame.shape), "time": elapsed})
+            self.bytes_written += frame.nbytes
+
+    def finish(self):
+        """关闭输出文件"""
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+        if self.raw_file is not None:
+            self.raw_file.close()
+            self.raw_file = None
+            index_path = os.path.splitext(self.path)[0] + ".json"
+            try:
+                with open(index_path, "w", encoding="utf-8") as f:
+                    json.dump({"dtype": "uint8", "format": "BGRA", "frames": self.raw_index}, f)
+            except OSError as e:
+                print(f"写入原始帧索引错误: {str(e)}")
+
+    def stop(self, wait=True, timeout=5.0):
+        """停止录制，写入线程写完队列中剩余的帧后关闭文件
+
+        Args:
+            wait: 是否等待写入线程结束；GUI 线程中传 False，编码剩余帧不会阻塞界面
+            timeout: 等待写入线程结束的最长时间（秒）
+        """
+        if self.is_alive():
+            with stopping_lock:
+                stopping.add(self)
+        self.stop_event.set()
+        if wait and self.is_alive():
+            self.join(timeout)
+
+    def get_stats(self):
+        """获取录制统计
+
+        Returns:
+            dict: 包含 record_submitted, record_written, record_dropped, record_duplicated,
+                record_queued, record_bytes, record_encode_ms（平均每帧写入耗时）
+        """
+        return {
+            "record_submitted": self.submitted,
+            "record_written": self.written,
+            "record_dropped": self.dropped,
+            "record_duplicated": self.duplicated,
+            "record_queued": self.queue.qsize(),
+            "record_bytes": self.bytes_written,
+            "record_encode_ms": self.encode_time * 1000.0 / self.written if self.written else 0.0
+        }
+
+
+def wait_for_recorders(timeout=5.0):
+    """等待所有已停止的录制器写完剩余的帧（程序退出前调用）
+
+    Args:
+        timeout: 总的最长等待时间（秒）
+
+    Returns:
+        bool: 是否全部写完
+    """
+    end = time.perf_counter() + timeout
+    with stopping_lock:
+        recorders = list(stopping)
+    for recorder in recorders:
+        recorder.join(max(0.0, end - time.perf_counter()))
+    return not any(recorder.is_alive() for recorder in recorders)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 渲染管理模块
+负责把捕获的帧转换为 QImage，优先直接包装 mss 的 BGRA 缓冲区（零拷贝），
+只有在需要 RGB 或数据布局无法直接包装时才复制到预分配的缓冲池
+"""
+
+from PySide6.QtGui import QImage
+from PySide6.QtCore import Qt
+
+import math
+
+import numpy as np
+
+# 缩放模式：auto 同尺寸直通、缩小时平滑缩放；nearest 最近邻；smooth 平滑；
+# area 使用 OpenCV 区域插值（需要 opencv-python，缺失时按 smooth 处理）
+SCALE_MODES = ("auto", "nearest", "smooth", "area")
+# 图块对齐的缩放网格的最大步长（帧像素），超过时图块不对齐
+TILE_GRID_LIMIT = 64
+
+
+class FramePool:
+    def __init__(self, count=3):
+        """初始化帧缓冲池
+
+        Args:
+            count: 轮转使用的缓冲区数量
+        """
+        self.count = count
+        self.shape = None
+        self.buffers = []
+        self.index = 0
+
+    def acquire(self, shape):
+        """获取下一个可用缓冲区
+
+        形状变化时重新分配，否则循环复用已分配的缓冲区
+
+        Args:
+            shape: 缓冲区形状，如 (height, width, 4)
+
+        Returns:
+            np.ndarray: 预分配的 uint8 缓冲区
+        """
+        shape = tuple(shape)
+        if shape != self.shape:
+            self.shape = shape
+            self.buffers = [np.empty(shape, dtype=np.uint8) for _ in range(self.count)]
+            self.index = 0
+        buffer = self.buffers[self.index]
+        self.index = (self.index + 1) % self.count
+        return buffer
+
+
+def bgra_to_rgb(frame):
+    """将 BGRA 帧转换为 RGB 视图（不复制数据）
+
+    Args:
+        frame: BGRA 图像数据，形状为 (height, width, 4)
+
+    Returns:
+        np.ndarray: RGB 视图，形状为 (height, width, 3)
+    """
+    return frame[:, :, 2::-1]
+
+
+def wrap_rows(frame):
+    """获取可直接交给 QImage 的行缓冲区
+
+    支持 C 连续数组，以及从更大的连续 BGRA 截图中切出的行跨步视图
+
+    Args:
+        frame: BGRA 图像数据，形状为 (height, width, 4)
+
+    Returns:
+        tuple: (buffer, bytes_per_line)，无法零拷贝包装时返回 (None, 0)
+    """
+    if frame.flags.c_contiguous:
+        return frame, frame.strides[0]
+
+    height, width, channels = frame.shape
+    if frame.strides[1] != channels or frame.strides[2] != 1:
+        return None, 0
+
+    # 找到切片所属的连续底层数组
+    base = frame
+    while isinstance(base.base, np.ndarray):
+        base = base.base
+    if not base.flags.c_contiguous or base.dtype != np.uint8:
+        return None, 0
+
+    offset = frame.__array_interface__["data"][0] - base.__array_interface__["data"][0]
+    bytes_per_line = frame.strides[0]
+    length = (height - 1) * bytes_per_line + width * channels
+    return base.reshape(-1)[offset:offset + length], bytes_per_line
+
+
+class RenderMgr:
+    def __init__(self, pool_size=4):
+        """初始化渲染管理器
+
+        Args:
+            pool_size: 每个窗口预分配的缓冲区数量
+        """
+        self.pool = FramePool(pool_size)
+        # 保持当前 QImage 所引用的内存不被释放
+        self.image_buffer = None
+        # 累计复制到缓冲池的字节数
+        self.copied_bytes = 0
+
+    def convert_to_qimage(self, frame, copy=False):
+        """将捕获的帧转换为 QImage
+
+        BGRA 帧直接包装为 Format_RGB32（小端下内存布局即 BGRA），
+        RGB 帧回退到 Format_RGB888
+
+        Args:
+            frame: BGRA (height, width, 4) 或 RGB (height, width, 3) 图像数据
+            copy: 是否强制复制到缓冲池，帧数据在转换后会失效（如跨线程传递）时使用
+
+        Returns:
+            QImage: 转换后的 QImage，引用的内存在缓冲池轮转一圈之前保持有效
+        """
+        height, width, channels = frame.shape
+        if copy:
+            image_format = QImage.Format_RGB32 if channels == 4 else QImage.Format_RGB888
+            buffer, bytes_per_line = None, 0
+        elif channels == 4:
+            image_format = QImage.Format_RGB32
+            buffer, bytes_per_line = wrap_rows(frame)
+        else:
+            image_format = QImage.Format_RGB888
+            buffer, bytes_per_line = None, 0
+            if frame.flags.c_contiguous:
+                buffer, bytes_per_line = frame, frame.strides[0]
+
+        if buffer is None:
+            # 布局无法直接包装，复制到缓冲池中（不产生新的内存分配）
+            buffer = self.pool.acquire(frame.shape)
+            np.copyto(buffer, frame)
+            self.copied_bytes += buffer.nbytes
+            bytes_per_line = buffer.strides[0]
+
+        self.image_buffer = buffer
+        return QImage(buffer.data, width, height, bytes_per_line, image_format)
+
+
+class FrameScaler:
+    def __init__(self, mode="auto"):
+        """初始化帧缩放器
+
+        Args:
+            mode: 缩放模式，见 SCALE_MODES
+        """
+        if mode not in SCALE_MODES:
+            raise ValueError(f"未知的缩放模式: {mode}")
+        self.mode = mode
+        # area 模式的输出缓冲区
+        self.pool = FramePool(2)
+        self.cv2 = None
+        if mode == "area":
+            try:
+                import cv2
+                self.cv2 = cv2
+            except ImportError:
+                print("未安装 opencv-python，area 缩放模式回退为 smooth")
+
+    def reduce(self, frame, width, height):
+        """在管线最前端缩小帧，使后续的变化检测和转换只处理显示所需的像素
+
+        area 模式直接用 OpenCV 缩放到显示尺寸（写入预分配缓冲区）；
+        其他模式按整数倍隔行隔列取样（不复制数据的视图），
+        smooth 和 auto 保留 2 倍余量交给后续的平滑缩放，减少锯齿
+
+        Args:
+            frame: 原始图像数据
+            width: 显示宽度
+            height: 显示高度
+
+        Returns:
+            np.ndarray: 缩小后的图像数据（可能是视图），无需缩小时返回原帧
+        """
+        source_height, source_width = frame.shape[:2]
+        if width >= source_width and height >= source_height:
+            return frame
+
+        if self.cv2 is not None:
+            out = self.pool.acquire((height, width) + frame.shape[2:])
+            return self.cv2.resize(frame, (width, height), dst=out, interpolation=self.cv2.INTER_AREA)
+
+        factor = min(source_width // max(width, 1), source_height // max(height, 1))
+        if self.mode != "nearest":
+            factor //= 2
+        if factor >= 2:
+            return frame[::factor, ::factor]
+        return frame
+
+    def transformation(self):
+        """剩余缩放使用的 Qt 变换模式"""
+        return Qt.FastTransformation if self.mode == "nearest" else Qt.SmoothTransformation
+
+    @staticmethod
+    def tile_grid(source_size, display_size):
+        """缩放网格的步长：每 step 个帧像素恰好对应整数个显示像素
+
+        对齐到网格的图块单独缩放后与整帧缩放的对应部分相同
+
+        Args:
+            source_size: 帧的宽度或高度
+            display_size: 显示宽度或高度
+
+        Returns:
+            int: 网格步长（帧像素），超过 TILE_GRID_LIMIT 时返回 None（显示尺寸与帧尺寸之比没有简单的分数形式）
+        """
+        step = source_size // math.gcd(source_size, display_size)
+        return step if step <= TILE_GRID_LIMIT else None
+
+    def tile_span(self, start, length, source_size, display_size):
+        """计算单独缩放一个图块时在一个方向上的范围
+
+        图块向外对齐到缩放网格（见 tile_grid）。平滑缩放时变化的帧像素还会影响滤波半径内的显示像素，
+        更新范围因此向外扩展一个滤波半径，缩放时再多取一个滤波半径的帧像素，缩放后只使用更新范围：
+        拼接处的像素与整帧缩放时相同，不会出现接缝。没有缩放网格时不对齐，只扩展滤波半径
+
+        Args:
+            start: 图块在帧中的起点
+            length: 图块长度
+            source_size: 帧的宽度或高度
+            display_size: 显示宽度或高度
+
+        Returns:
+            tuple: (source_start, source_end, scaled_start, scaled_end, target_start, target_end)，
+                依次为参与缩放的帧像素范围、其缩放后对应的显示像素范围和图块实际更新的显示像素范围
+        """
+        step = self.tile_grid(source_size, display_size) or 1
+        aligned_start = start // step * step
+        aligned_end = min(source_size, -(-(start + length) // step) * step)
+        # 滤波半径：最近邻取样时边缘的显示像素可能取到图块外相邻的 1 个帧像素；
+        # 平滑缩放在放大时双线性插值需要相邻的帧像素，缩小时为每个显示像素覆盖的帧像素数
+        pad = 1
+        if self.transformation() == Qt.SmoothTransformation:
+            pad = -(-source_size // display_size) + 1
+        pad = -(-pad // step) * step
+        update_start = max(0, aligned_start - pad)
+        update_end = min(source_size, aligned_end + pad)
+        source_start = max(0, aligned_start - 2 * pad)
+        source_end = min(source_size, aligned_end + 2 * pad)
+        return (source_start, source_end,
+                source_start * display_size // source_size, -(-source_end * display_size // source_size),
+                update_start * display_size // source_size,
+                min(display_size, -(-update_end * display_size // source_size)))
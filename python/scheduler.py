@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 调度器模块
+替代每个悬浮窗固定 16ms 的定时器，集中决定每个区域何时截图：
+画面静止时逐步降低帧率，画面变化时立即恢复到目标帧率，
+并根据实测的截图耗时把所有区域的总开销限制在预算之内
+"""
+
+import time
+
+
+class Scheduler:
+    def __init__(self, broker, budget=0.25, backoff=0.85, smoothing=0.2):
+        """初始化调度器
+
+        Args:
+            broker: 捕获调度器（CaptureBroker）
+            budget: 截图总耗时预算，即每秒允许花在截图和转换上的秒数
+            backoff: 画面未变化时每帧的帧率衰减系数
+            smoothing: 耗时与帧率统计的指数平滑系数
+        """
+        self.broker = broker
+        self.budget = budget
+        self.backoff = backoff
+        self.smoothing = smoothing
+
+        # 每个区域的调度状态：token -> dict
+        self.states = {}
+        # 预算不足时的统一降速系数
+        self.budget_scale = 1.0
+        # 窗口锚定（window_tracker.WindowAnchors），设置后每次截图前移动跟随目标窗口的区域
+        self.anchors = None
+
+    def sync_states(self, now):
+        """与捕获调度器中的订阅者同步调度状态"""
+        rates = self.broker.get_rates()
+        for token in list(self.states):
+            if token not in rates:
+                del self.states[token]
+        for token, (target_fps, min_fps) in rates.items():
+            state = self.states.get(token)
+            if state is None:
+                state = {
+                    "rate": float(target_fps),
+                    "interval": 1.0 / target_fps,
+                    "next_due": now,
+                    "last_capture": None,
+                    "cost": 0.0,
+                    "fps": 0.0
+                }
+                self.states[token] = state
+            state["target_fps"] = float(target_fps)
+            state["min_fps"] = float(min(min_fps, target_fps))
+
+    def step(self):
+        """执行一次调度：截取所有到期的区域并计算下次截图时间
+
+        Returns:
+            float: 距离下一个区域到期的秒数，没有区域时返回 None
+        """
+        now = time.perf_counter()
+        self.sync_states(now)
+        if not self.states:
+            return None
+
+        due = {token for token, state in self.states.items() if state["next_due"] <= now}
+        if due:
+            if self.anchors is not None:
+                self.anchors.update(due)
+            results = self.broker.tick(due)
+            for token, (changed, cost) in results.items():
+                state = self.states.get(token)
+                if state is not None:
+                    self.update_state(state, changed, cost, now)
+            self.apply_budget()
+            for token in due:
+                state = self.states.get(token)
+                if state is not None:
+                    state["next_due"] = max(state["next_due"] + state["interval"], now)
+
+        next_due = min(state["next_due"] for state in self.states.values())
+        return max(0.0, next_due - time.perf_counter())
+
+    def update_state(self, state, changed, cost, now):
+        """根据一次截图结果更新区域的帧率和耗时统计"""
+        if changed:
+            # 画面开始变化，立即恢复到目标帧率
+            state["rate"] = state["target_fps"]
+        else:
+            state["rate"] = max(state["min_fps"], state["rate"] * self.backoff)
+
+        alpha = self.smoothing
+        state["cost"] = cost if state["cost"] == 0.0 else (1 - alpha) * state["cost"] + alpha * cost
+        if state["last_capture"] is not None and now > state["last_capture"]:
+            fps = 1.0 / (now - state["last_capture"])
+            state["fps"] = fps if state["fps"] == 0.0 else (1 - alpha) * state["fps"] + alpha * fps
+        state["last_capture"] = now
+
+    def apply_budget(self):
+        """按总耗时预算统一降低各区域帧率（不低于各自的最低帧率）"""
+        demand = sum(state["rate"] * state["cost"] for state in self.states.values())
+        self.budget_scale = min(1.0, self.budget / demand) if demand > 0 else 1.0
+        for state in self.states.values():
+            rate = max(state["min_fps"], state["rate"] * self.budget_scale)
+            state["interval"] = 1.0 / rate
+
+    def get_stats(self, token):
+        """获取区域的调度统计
+
+        Args:
+            token: 订阅标识
+
+        Returns:
+            dict: 包含 fps（实测）, rate（当前调度帧率）, target_fps, min_fps,
+                cost_ms（单次截图与转换耗时）, budget_scale；区域不存在时返回 None
+        """
+        state = self.states.get(token)
+        if state is None:
+            return None
+        return {
+            "fps": state["fps"],
+            "rate": 1.0 / state["interval"],
+            "target_fps": state["target_fps"],
+            "min_fps": state["min_fps"],
+            "cost_ms": state["cost"] * 1000.0,
+            "budget_scale": self.budget_scale
+        }
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 屏幕映射模块
+预先计算各显示器逻辑坐标到物理像素的映射，把逻辑选择区域换算为截图用的物理区域。
+
+跨越多个显示器（可能是不同的 DPI 缩放比例）的区域被拆分为各显示器上的物理子矩形，
+截图时与其他区域一起批量截取，再拼接到预分配的缓冲区中。
+区域信息仍是包含 x, y, width, height 的字典，跨显示器的区域额外带有 parts，
+width 和 height 是拼接后的帧尺寸。
+
+本模块不依赖 Qt，可以在捕获工作进程中使用
+"""
+
+import numpy as np
+
+
+class ScreenMap:
+    def __init__(self, screens):
+        """根据各显示器的几何信息建立映射
+
+        坐标约定与 Qt 在 Windows 上的高 DPI 缩放一致：显示器左上角的逻辑坐标等于其物理坐标，
+        显示器内部的逻辑坐标按该显示器的设备像素比缩放
+
+        Args:
+            screens: 显示器列表，每项包含 x, y, width, height（逻辑像素）和 dpr（设备像素比），
+                第一项为主显示器
+        """
+        self.screens = [dict(screen) for screen in screens]
+
+    @classmethod
+    def from_qt(cls, screens):
+        """从 QScreen 列表建立映射
+
+        Args:
+            screens: QScreen 列表，第一项应为主显示器
+        """
+        result = []
+        for screen in screens:
+            geometry = screen.geometry()
+            result.append({
+                "x": geometry.x(),
+                "y": geometry.y(),
+                "width": geometry.width(),
+                "height": geometry.height(),
+                "dpr": screen.devicePixelRatio()
+            })
+        return cls(result)
+
+    def screen_at(self, x, y):
+        """查找包含逻辑坐标点的显示器索引，找不到时返回 -1"""
+        for index, screen in enumerate(self.screens):
+            if (screen["x"] <= x < screen["x"] + screen["width"]
+                    and screen["y"] <= y < screen["y"] + screen["height"]):
+                return index
+        return -1
+
+    def to_physical(self, index, x, y):
+        """把显示器内的逻辑坐标转换为物理像素坐标
+
+        Args:
+            index: 显示器索引
+            x: 逻辑 x 坐标
+            y: 逻辑 y 坐标
+
+        Returns:
+            tuple: (物理 x, 物理 y)
+        """
+        screen = self.screens[index]
+        return (int(round(screen["x"] + (x - screen["x"]) * screen["dpr"])),
+                int(round(screen["y"] + (y - screen["y"]) * screen["dpr"])))
+
+    def split(self, rect):
+        """把逻辑矩形按显示器拆分
+
+        Args:
+            rect: 逻辑矩形，包含 x, y, width, height
+
+        Returns:
+            list: (显示器索引, 逻辑子矩形) 列表，不在任何显示器上的部分被丢弃
+        """
+        pieces = []
+        for index, screen in enumerate(self.screens):
+            left = max(rect["x"], screen["x"])
+            top = max(rect["y"], screen["y"])
+            right = min(rect["x"] + rect["width"], screen["x"] + screen["width"])
+            bottom = min(rect["y"] + rect["height"], screen["y"] + screen["height"])
+            if right > left and bottom > top:
+                pieces.append((index, {"x": left, "y": top, "width": right - left, "height": bottom - top}))
+        return pieces
+
+    def map_rect(self, rect):
+        """把逻辑选择区域换算为截图用的物理区域
+
+        Args:
+            rect: 逻辑矩形，包含 x, y, width, height
+
+        Returns:
+            dict: 物理区域，包含 x, y, width, height；跨越多个显示器时额外包含
+                parts（各显示器上的物理子矩形及其在拼接帧中的位置）和 scale（拼接帧的缩放比例）
+        """
+        pieces = self.split(rect)
+        if len(pieces) <= 1:
+            # 在单个显示器上（或完全不在任何显示器上时按主显示器）整体换算
+            index = pieces[0][0] if pieces else 0
+            x, y = self.to_physical(index, rect["x"], rect["y"])
+            dpr = self.screens[index]["dpr"]
+            return {
+                "x": x,
+                "y": y,
+                "width": int(rect["width"] * dpr),
+                "height": int(rect["height"] * dpr)
+            }
+
+        # 拼接帧按涉及的显示器中最大的设备像素比输出，高 DPI 部分不损失分辨率
+        scale = max(self.screens[index]["dpr"] for index, _ in pieces)
+        parts = []
+        for index, piece in pieces:
+            x, y = self.to_physical(index, piece["x"], piece["y"])
+            right, bottom = self.to_physical(index, piece["x"] + piece["width"], piece["y"] + piece["height"])
+            # 目标位置按起止点分别取整，相邻子矩形在拼接帧中无缝衔接
+            dest_x = int(round((piece["x"] - rect["x"]) * scale))
+            dest_y = int(round((piece["y"] - rect["y"]) * scale))
+            dest_right = int(round((piece["x"] + piece["width"] - rect["x"]) * scale))
+            dest_bottom = int(round((piece["y"] + piece["height"] - rect["y"]) * scale))
+            parts.append({
+                "x": x,
+                "y": y,
+                "width": right - x,
+                "height": bottom - y,
+                "dest": (dest_x, dest_y, dest_right - dest_x, dest_bottom - dest_y)
+            })
+        return {
+            "x": min(part["x"] for part in parts),
+            "y": min(part["y"] for part in parts),
+            "width": int(round(rect["width"] * scale)),
+            "height": int(round(rect["height"] * scale)),
+            "parts": parts,
+            "scale": scale
+        }
+
+
+def region_rects(region):
+    """区域需要截取的物理矩形列表（跨显示器区域为各子矩形，否则为区域本身）"""
+    if "parts" not in region:
+        return [region]
+    return [{key: part[key] for key in ("x", "y", "width", "height")} for part in region["parts"]]
+
+
+class RegionStitcher:
+    def __init__(self, region):
+        """为跨显示器区域预分配拼接缓冲区并预先计算各子矩形的采样索引
+
+        Args:
+            region: ScreenMap.map_rect 返回的带有 parts 的区域
+        """
+        self.rects = region_rects(region)
+        self.buffer = np.zeros((region["height"], region["width"], 4), dtype=np.uint8)
+        # 不在任何显示器上的部分保持为不透明黑色
+        self.buffer[:, :, 3] = 255
+        # 每个子矩形：(目标视图, 行索引, 列索引)，尺寸与目标一致时索引为 None，直接复制；
+        # 需要缩放时目标视图按 uint32 解释，每个 BGRA 像素作为一个元素取样
+        pixels = self.buffer.view(np.uint32)[:, :, 0]
+        self.targets = []
+        for part in region["parts"]:
+            dest_x, dest_y, dest_width, dest_height = part["dest"]
+            if (part["width"], part["height"]) == (dest_width, dest_height):
+                target = self.buffer[dest_y:dest_y + dest_height, dest_x:dest_x + dest_width]
+                self.targets.append((target, None, None))
+                continue
+            target = pixels[dest_y:dest_y + dest_height, dest_x:dest_x + dest_width]
+            # 低 DPI 部分按最近邻放大到拼接帧的比例
+            rows = np.minimum((np.arange(dest_height) + 0.5) * part["height"] / dest_height,
+                              part["height"] - 1).astype(np.intp)
+            columns = np.minimum((np.arange(dest_width) + 0.5) * part["width"] / dest_width,
+                                 part["width"] - 1).astype(np.intp)
+            self.targets.append((target, rows, columns))
+
+    def stitch(self, images):
+        """把各子矩形的截图拼接到缓冲区
+
+        Args:
+            images: 与 rects 一一对应的 BGRA 图像数据
+
+        Returns:
+            np.ndarray: 拼接后的帧（复用同一缓冲区，下次拼接时被覆盖）
+        """
+        for (target, rows, columns), image in zip(self.targets, images):
+            if rows is None:
+                np.copyto(target, image[:target.shape[0], :target.shape[1]])
+            else:
+                # 先按列、再按行取样，按行取样直接写入目标视图
+                pixels = np.ascontiguousarray(image).view(np.uint32)[:, :, 0]
+                np.take(np.take(pixels, columns, axis=1), rows, axis=0, out=target)
+        return self.buffer
+
+    def grab(self, capture):
+        """一次批量截取所有子矩形并拼接"""
+        return self.stitch(capture.grab_batch(self.rects))
@@ -4,30 +4,88 @@
 """
 LandscapeCutter 屏幕选择器模块
 类似Snipaste的桌面截取窗口
+
+拖动选择时只重绘选择框变化的部分（新旧选择区域的对称差、边框、标签和放大镜），
+重绘开销与选择框的变化量成正比，与虚拟桌面的总尺寸无关
 """
 
+import time
+
 from PySide6.QtWidgets import QDialog, QApplication
-from PySide6.QtCore import Qt, QPoint, QRect
-from PySide6.QtGui import QPainter, QPen, QColor, QBrush, QFont, QScreen
+from PySide6.QtCore import Qt, QPoint, QRect, Signal
+from PySide6.QtGui import QPainter, QPen, QColor, QBrush, QFont, QScreen, QPixmap, QRegion, QCursor
+
+from screen_map import ScreenMap
 
 class ScreenSelector(QDialog):
-    def __init__(self, parent=None):
+    # 遮罩颜色
+    OVERLAY_COLOR = QColor(0, 0, 0, 128)
+    # 边框宽度和重绘时的边距
+    BORDER_WIDTH = 2
+    BORDER_MARGIN = 2
+    # 放大镜：采样半径（逻辑像素）、放大倍数和与鼠标的距离
+    LOUPE_RADIUS = 8
+    LOUPE_ZOOM = 8
+    LOUPE_OFFSET = 24
+    
+    # 首次绘制完成时发出，参数为从 select_region 的 request_time 到绘制完成的延迟（秒）
+    first_painted = Signal(float)
+    
+    def __init__(self, parent=None, freeze=False, loupe=False):
         """初始化屏幕选择器
         
+        选择器可以预先创建并反复使用：屏幕几何信息只在创建时和
+        watch_screens 监听到屏幕增减或几何变化时计算，打开时不再枚举屏幕
+        
         Args:
             parent: 父窗口
+            freeze: 是否在打开时截取一次全屏并在其变暗的副本上选择（画面冻结）
+            loupe: 是否显示放大镜，便于精确到像素地对齐边缘（需要 freeze）
         """
         super().__init__(parent)
         
         # 设置窗口属性
         self.setWindowTitle("选择区域")
         self.setWindowFlags(Qt.Window | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
-        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.freeze = freeze
+        self.loupe = loupe
+        if not freeze:
+            self.setAttribute(Qt.WA_TranslucentBackground)
         
         # 获取所有屏幕的几何信息
         app = QApplication.instance()
         if not app:
             app = QApplication([])
+        self.update_screens()
+        
+        # 选择区域相关
+        self.start_point = QPoint()
+        self.end_point = QPoint()
+        self.selecting = False
+        self.selected_region = None
+        self.logical_rect = None
+        
+        # 鼠标位置
+        self.current_mouse_pos = QPoint()
+        
+        # 冻结画面：原始截图和预先变暗的副本，每次打开时生成一次
+        self.frozen_pixmap = None
+        self.dimmed_pixmap = None
+        self.show_loupe = False
+        
+        # 上次绘制的选择框装饰区域（选择区域、边框、标签、放大镜）
+        self.selection_rect = QRect()
+        self.decoration = QRegion()
+        self.label_font = QFont("Arial", 12)
+        self.label_font.setBold(True)
+        
+        # 热键到首次绘制的计时起点（time.perf_counter），为 None 时不计时
+        self.request_time = None
+        self.last_latency = None
+    
+    def update_screens(self):
+        """重新计算所有屏幕的总边界，并把选择器设置为覆盖整个虚拟桌面"""
+        app = QApplication.instance()
         
         # 计算所有屏幕的总边界
         total_rect = QRect()
@@ -35,64 +93,218 @@ class ScreenSelector(QDialog):
             total_rect = total_rect.united(screen.geometry())
         
         # 设置窗口大小为所有屏幕的总边界
+        self.total_rect = total_rect
         self.setGeometry(total_rect)
         
-        # 保存屏幕信息用于坐标转换
+        # 保存屏幕信息和逻辑坐标到物理像素的映射，用于坐标转换
         self.screens = app.screens()
         self.device_pixel_ratio = app.primaryScreen().devicePixelRatio()
+        primary = app.primaryScreen()
+        self.screen_map = ScreenMap.from_qt([primary] + [screen for screen in self.screens if screen is not primary])
         
         print(f"屏幕选择器几何信息: {self.geometry()}")
         print(f"设备像素比: {self.device_pixel_ratio}")
+    
+    def watch_screens(self):
+        """在屏幕增减或几何变化时更新屏幕信息（用于预先创建、反复使用的选择器）
         
-        # 选择区域相关
+        只连接本对象的方法，选择器销毁时 Qt 自动断开；替换选择器前也可调用 unwatch_screens 主动断开
+        """
+        app = QApplication.instance()
+        app.screenAdded.connect(self.on_screen_added)
+        app.screenRemoved.connect(self.on_screen_removed)
+        for screen in app.screens():
+            screen.geometryChanged.connect(self.on_screen_geometry_changed)
+    
+    def unwatch_screens(self):
+        """停止监听屏幕变化"""
+        app = QApplication.instance()
+        for signal, slot in ([(app.screenAdded, self.on_screen_added), (app.screenRemoved, self.on_screen_removed)]
+                             + [(screen.geometryChanged, self.on_screen_geometry_changed)
+                                for screen in app.screens()]):
+            try:
+                signal.disconnect(slot)
+            except (RuntimeError, TypeError):
+                # 未连接
+                pass
+    
+    def on_screen_added(self, screen):
+        """新增屏幕：监听其几何变化并更新屏幕信息"""
+        screen.geometryChanged.connect(self.on_screen_geometry_changed)
+        self.update_screens()
+    
+    def on_screen_removed(self, screen):
+        """移除屏幕：更新屏幕信息"""
+        self.update_screens()
+    
+    def on_screen_geometry_changed(self, geometry):
+        """屏幕几何变化：更新屏幕信息"""
+        self.update_screens()
+    
+    def reset(self):
+        """清除上一次选择的状态"""
         self.start_point = QPoint()
         self.end_point = QPoint()
         self.selecting = False
         self.selected_region = None
         self.logical_rect = None
+        self.current_mouse_pos = self.mapFromGlobal(QCursor.pos())
+        self.selection_rect = QRect()
+        self.decoration = QRegion()
+    
+    def grab_screens(self, total_rect):
+        """截取所有屏幕并拼接为一幅覆盖虚拟桌面的位图
         
-        # 鼠标位置
-        self.current_mouse_pos = QPoint()
+        Args:
+            total_rect: 所有屏幕的总边界（逻辑坐标）
+            
+        Returns:
+            QPixmap: 按最大设备像素比保存的整幅桌面
+        """
+        dpr = max(screen.devicePixelRatio() for screen in self.screens)
+        pixmap = QPixmap(total_rect.size() * dpr)
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(Qt.black)
+        painter = QPainter(pixmap)
+        for screen in self.screens:
+            target = screen.geometry().translated(-total_rect.topLeft())
+            painter.drawPixmap(target, screen.grabWindow(0))
+        painter.end()
+        return pixmap
+    
+    def set_frozen(self, pixmap):
+        """设置冻结画面并生成变暗的副本
+        
+        Args:
+            pixmap: 覆盖整个选择器的位图
+        """
+        self.frozen_pixmap = pixmap
+        self.dimmed_pixmap = QPixmap(pixmap)
+        painter = QPainter(self.dimmed_pixmap)
+        painter.fillRect(self.dimmed_pixmap.rect(), self.OVERLAY_COLOR)
+        painter.end()
+    
+    def label_rects(self, rect):
+        """选择区域的尺寸标签和坐标标签位置"""
+        return (QRect(rect.x(), rect.y() - 30, 200, 30),
+                QRect(rect.x(), rect.bottom() + 5, 200, 30))
+    
+    def loupe_rect(self, pos):
+        """放大镜的位置，位于鼠标右下方，靠近窗口边缘时翻到另一侧"""
+        size = (2 * self.LOUPE_RADIUS + 1) * self.LOUPE_ZOOM
+        height = size + 20
+        x = pos.x() + self.LOUPE_OFFSET
+        y = pos.y() + self.LOUPE_OFFSET
+        if x + size > self.width():
+            x = pos.x() - self.LOUPE_OFFSET - size
+        if y + height > self.height():
+            y = pos.y() - self.LOUPE_OFFSET - height
+        return QRect(x, y, size, height)
+    
+    def decoration_region(self):
+        """当前需要绘制装饰的区域：边框、标签和放大镜"""
+        region = QRegion()
+        if self.selecting:
+            rect = self.get_selection_rect()
+            margin = self.BORDER_MARGIN
+            outer = QRegion(rect.adjusted(-margin, -margin, margin + 1, margin + 1))
+            region = outer.subtracted(QRegion(rect.adjusted(margin, margin, -margin, -margin)))
+            for label_rect in self.label_rects(rect):
+                region = region.united(label_rect)
+        if self.show_loupe:
+            region = region.united(self.loupe_rect(self.current_mouse_pos).adjusted(-1, -1, 1, 1))
+        return region
+    
+    def refresh_selection(self):
+        """只重绘选择框变化的部分
+        
+        新旧选择区域的对称差（遮罩与透明区域互换的部分）加上新旧装饰区域
+        """
+        rect = self.get_selection_rect() if self.selecting else QRect()
+        decoration = self.decoration_region()
+        dirty = QRegion(rect).xored(QRegion(self.selection_rect))
+        dirty = dirty.united(self.decoration).united(decoration)
+        self.selection_rect = rect
+        self.decoration = decoration
+        if not dirty.isEmpty():
+            self.update(dirty)
+    
+    def showEvent(self, event):
+        """显示事件：首次整窗绘制时放大镜也会画出，记录其区域以便之后擦除"""
+        self.decoration = self.decoration_region()
+        super().showEvent(event)
     
     def paintEvent(self, event):
-        """绘制事件"""
+        """绘制事件，只绘制需要更新的区域"""
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+        dirty = event.region()
+        rect = self.selection_rect
         
-        # 绘制半透明背景
-        overlay_color = QColor(0, 0, 0, 128)
-        painter.fillRect(self.rect(), overlay_color)
+        # 绘制遮罩和选择区域：冻结模式从缓存位图复制，否则填充半透明遮罩并清除选择区域
+        if self.dimmed_pixmap is not None:
+            painter.drawPixmap(0, 0, self.dimmed_pixmap)
+            if not rect.isEmpty() and dirty.intersects(rect):
+                painter.setClipRegion(dirty.intersected(rect))
+                painter.drawPixmap(0, 0, self.frozen_pixmap)
+                painter.setClipping(False)
+        else:
+            painter.setCompositionMode(QPainter.CompositionMode_Source)
+            painter.fillRect(dirty.boundingRect(), self.OVERLAY_COLOR)
+            if not rect.isEmpty():
+                painter.fillRect(rect.intersected(dirty.boundingRect()), Qt.transparent)
+            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
         
         # 绘制选择区域
         if self.selecting:
-            # 计算选择区域
-            rect = self.get_selection_rect()
-            
-            # 清除选择区域的背景（使其透明）
-            painter.setCompositionMode(QPainter.CompositionMode_Clear)
-            painter.fillRect(rect, Qt.transparent)
-            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
-            
             # 绘制选择区域的边框
-            pen = QPen(QColor(255, 0, 0), 2, Qt.SolidLine)
+            pen = QPen(QColor(255, 0, 0), self.BORDER_WIDTH, Qt.SolidLine)
             painter.setPen(pen)
             painter.drawRect(rect)
             
-            # 绘制选择区域的尺寸信息
-            size_text = f"{rect.width()} x {rect.height()}"
-            font = QFont("Arial", 12)
-            font.setBold(True)
-            painter.setFont(font)
-            
-            # 计算文本位置
-            text_rect = QRect(rect.x(), rect.y() - 30, 200, 30)
+            # 绘制选择区域的尺寸信息和坐标信息
+            painter.setFont(self.label_font)
+            text_rect, coord_rect = self.label_rects(rect)
             painter.setPen(QPen(QColor(255, 255, 255)))
-            painter.drawText(text_rect, Qt.AlignLeft, size_text)
-            
-            # 绘制坐标信息
-            coord_text = f"({rect.x()}, {rect.y()})"
-            coord_rect = QRect(rect.x(), rect.bottom() + 5, 200, 30)
-            painter.drawText(coord_rect, Qt.AlignLeft, coord_text)
+            painter.drawText(text_rect, Qt.AlignLeft, f"{rect.width()} x {rect.height()}")
+            painter.drawText(coord_rect, Qt.AlignLeft, f"({rect.x()}, {rect.y()})")
+        
+        if self.show_loupe and dirty.intersects(self.loupe_rect(self.current_mouse_pos)):
+            self.draw_loupe(painter)
+        
+        if self.request_time is not None:
+            painter.end()
+            self.last_latency = time.perf_counter() - self.request_time
+            self.request_time = None
+            self.first_painted.emit(self.last_latency)
+    
+    def draw_loupe(self, painter):
+        """绘制放大镜：鼠标周围的冻结画面按像素放大，并显示坐标和颜色"""
+        pos = self.current_mouse_pos
+        target = self.loupe_rect(pos)
+        radius = self.LOUPE_RADIUS
+        dpr = self.frozen_pixmap.devicePixelRatio()
+        
+        # 以设备像素为单位采样，放大时不插值，保证像素边缘清晰
+        source = QRect(int((pos.x() - radius) * dpr), int((pos.y() - radius) * dpr),
+                       int((2 * radius + 1) * dpr), int((2 * radius + 1) * dpr))
+        image_rect = QRect(target.x(), target.y(), target.width(), target.width())
+        painter.fillRect(target, Qt.black)
+        painter.drawPixmap(image_rect, self.frozen_pixmap, source)
+        
+        # 十字线指示当前像素
+        cell = self.LOUPE_ZOOM
+        center = QRect(image_rect.x() + radius * cell, image_rect.y() + radius * cell, cell, cell)
+        painter.setPen(QPen(QColor(0, 170, 255), 1))
+        painter.drawLine(image_rect.left(), center.center().y(), image_rect.right(), center.center().y())
+        painter.drawLine(center.center().x(), image_rect.top(), center.center().x(), image_rect.bottom())
+        painter.setPen(QPen(QColor(255, 255, 255), 1))
+        painter.drawRect(image_rect.adjusted(0, 0, -1, -1))
+        
+        color = self.frozen_pixmap.copy(int(pos.x() * dpr), int(pos.y() * dpr), 1, 1).toImage().pixelColor(0, 0)
+        painter.setFont(QFont("Arial", 8))
+        painter.drawText(QRect(target.x() + 4, image_rect.bottom(), target.width() - 8, 20),
+                         Qt.AlignLeft | Qt.AlignVCenter,
+                         f"({pos.x()}, {pos.y()})  #{color.red():02X}{color.green():02X}{color.blue():02X}")
     
     def mousePressEvent(self, event):
         """鼠标按下事件"""
@@ -100,14 +312,16 @@ class ScreenSelector(QDialog):
             self.selecting = True
             self.start_point = event.pos()
             self.end_point = event.pos()
-            self.update()
+            self.current_mouse_pos = event.pos()
+            self.refresh_selection()
     
     def mouseMoveEvent(self, event):
         """鼠标移动事件"""
-        if self.selecting:
-            self.end_point = event.pos()
+        if self.selecting or self.show_loupe:
+            if self.selecting:
+                self.end_point = event.pos()
             self.current_mouse_pos = event.pos()
-            self.update()
+            self.refresh_selection()
     
     def mouseReleaseEvent(self, event):
         """鼠标释放事件"""
@@ -132,48 +346,19 @@ class ScreenSelector(QDialog):
                     "height": rect.height()
                 }
                 
-                # 考虑DPI缩放，转换为物理像素坐标
-                # 获取当前鼠标所在屏幕的DPI缩放比例
-                app = QApplication.instance()
-                cursor_pos = event.globalPos()
-                
-                # 找到鼠标所在的屏幕
-                target_screen = None
-                for screen in app.screens():
-                    if screen.geometry().contains(cursor_pos):
-                        target_screen = screen
-                        break
-                
-                if target_screen is None:
-                    target_screen = app.primaryScreen()
-                
-                # 获取该屏幕的DPI缩放比例
-                dpr = target_screen.devicePixelRatio()
-                
-                # 计算物理像素坐标
-                screen_geometry = target_screen.geometry()
-                
-                # 计算相对于屏幕的坐标
-                rel_x = global_x - screen_geometry.x()
-                rel_y = global_y - screen_geometry.y()
-                
-                # 转换为物理像素
-                phys_x = int(screen_geometry.x() + rel_x * dpr)
-                phys_y = int(screen_geometry.y() + rel_y * dpr)
-                phys_width = int(rect.width() * dpr)
-                phys_height = int(rect.height() * dpr)
-                
-                # 初始化区域信息（使用物理像素坐标）
-                self.selected_region = {
-                    "x": phys_x,
-                    "y": phys_y,
-                    "width": phys_width,
-                    "height": phys_height
-                }
+                # 按预先计算的屏幕映射转换为物理像素坐标，
+                # 跨越多个显示器时按各显示器的 DPI 分别换算并拆分为子矩形
+                self.selected_region = self.screen_map.map_rect(self.logical_rect)
+                phys_x = self.selected_region["x"]
+                phys_y = self.selected_region["y"]
+                phys_width = self.selected_region["width"]
+                phys_height = self.selected_region["height"]
                 
                 print(f"选择的区域（逻辑像素）: x={global_x}, y={global_y}, w={rect.width()}, h={rect.height()}")
                 print(f"选择的区域（物理像素）: x={phys_x}, y={phys_y}, w={phys_width}, h={phys_height}")
-                print(f"屏幕DPI缩放比例: {dpr}")
+                for part in self.selected_region.get("parts", []):
+                    print(f"  显示器子区域（物理像素）: x={part['x']}, y={part['y']}, "
+                          f"w={part['width']}, h={part['height']} -> {part['dest']}")
                 
                 self.accept()
             else:
@@ -203,16 +388,31 @@ class ScreenSelector(QDialog):
         
         return QRect(x1, y1, x2 - x1, y2 - y1)
     
-    def select_region(self):
+    def select_region(self, request_time=None):
         """选择区域
         
+        Args:
+            request_time: 触发选择的时间（time.perf_counter，如热键消息到达的时间），
+                提供时在首次绘制完成后发出 first_painted 信号
+        
         Returns:
             tuple: (region, logical_rect)
                 region: 物理像素坐标，用于截图
                 logical_rect: 逻辑像素坐标和尺寸，用于设置悬浮窗位置和大小
         """
+        self.reset()
+        self.request_time = request_time
+        if self.freeze:
+            self.set_frozen(self.grab_screens(self.total_rect))
+        self.show_loupe = self.loupe and self.frozen_pixmap is not None
+        self.setMouseTracking(self.show_loupe)
+        
         # 显示选择器
-        if self.exec() == QDialog.Accepted:
-            return self.selected_region, self.logical_rect
-        else:
+        try:
+            if self.exec() == QDialog.Accepted:
+                return self.selected_region, self.logical_rect
             return None, None
+        finally:
+            # 冻结画面只在本次选择中使用，关闭后释放
+            self.frozen_pixmap = None
+            self.dimmed_pixmap = None
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 性能统计模块
+为每个悬浮窗记录截图、转换、缩放、绘制耗时直方图和帧计数，
+并提供 JSON Lines 统计日志和热点路径采样分析
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from collections import Counter, deque
+
+import numpy as np
+
+
+class LatencyHistogram:
+    # 桶上界（毫秒），0.01ms 到 1000ms 按对数均匀分布
+    BOUNDS_MS = np.logspace(-2, 3, 51)
+
+    def __init__(self):
+        """初始化耗时直方图"""
+        self.counts = np.zeros(len(self.BOUNDS_MS) + 1, dtype=np.int64)
+        self.total = 0.0
+        self.maximum = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        """记录一次耗时
+
+        Args:
+            seconds: 耗时（秒）
+        """
+        ms = seconds * 1000.0
+        index = int(np.searchsorted(self.BOUNDS_MS, ms))
+        with self.lock:
+            self.counts[index] += 1
+            self.total += ms
+            if ms > self.maximum:
+                self.maximum = ms
+
+    def percentile(self, p):
+        """估算百分位数（取所在桶的上界）
+
+        Args:
+            p: 百分位，0-100
+
+        Returns:
+            float: 耗时（毫秒），没有样本时返回 0
+        """
+        count = int(self.counts.sum())
+        if count == 0:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.counts), count * p / 100.0))
+        if index >= len(self.BOUNDS_MS):
+            return self.maximum
+        return min(float(self.BOUNDS_MS[index]), self.maximum)
+
+    def snapshot(self):
+        """获取统计摘要
+
+        Returns:
+            dict: 包含 count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms
+        """
+        with self.lock:
+            count = int(self.counts.sum())
+            total = self.total
+            maximum = self.maximum
+        return {
+            "count": count,
+            "mean_ms": total / count if count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": maximum
+        }
+
+
+class FrameStats:
+    # 记录的阶段：capture 截图，convert 转换为 QImage 并复制脏区域，
+    # scale 缩放，paint 绘制到后备位图，age 帧从截图到绘制的时间，
+    # track 锚定到目标窗口的区域每帧分摊的窗口跟随耗时
+    STAGES = ("capture", "convert", "scale", "paint", "age", "track")
+
+    def __init__(self):
+        """初始化单个悬浮窗的统计信息"""
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+        # 各滤镜的耗时直方图：滤镜名称 -> LatencyHistogram
+        self.filter_histograms = {}
+        self.bytes_copied = 0
+        self.painted_frames = 0
+        # 最近一秒内的绘制时间，用于计算实际帧率
+        self.paint_times = deque(maxlen=1000)
+
+    def record(self, stage, seconds):
+        """记录一个阶段的耗时
+
+        Args:
+            stage: 阶段名称，见 STAGES
+            seconds: 耗时（秒）
+        """
+        self.histograms[stage].record(seconds)
+
+    def record_filter(self, name, seconds):
+        """记录一个滤镜的耗时
+
+        Args:
+            name: 滤镜名称
+            seconds: 耗时（秒）
+        """
+        histogram = self.filter_histograms.get(name)
+        if histogram is None:
+            histogram = self.filter_histograms.setdefault(name, LatencyHistogram())
+        histogram.record(seconds)
+
+    def add_bytes(self, count):
+        """累加复制的字节数"""
+        self.bytes_copied += count
+
+    def mark_painted(self, timestamp=None):
+        """记录一次绘制
+
+        Args:
+            timestamp: 截图时间戳（time.perf_counter），提供时同时记录帧龄
+        """
+        now = time.perf_counter()
+        self.painted_frames += 1
+        self.paint_times.append(now)
+        if timestamp is not None:
+            self.record("age", now - timestamp)
+
+    def fps(self):
+        """最近一秒内实际绘制的帧率"""
+        now = time.perf_counter()
+        while self.paint_times and now - self.paint_times[0] > 1.0:
+            self.paint_times.popleft()
+        return float(len(self.paint_times))
+
+    def snapshot(self):
+        """获取统计摘要
+
+        Returns:
+            dict: 包含 fps, painted_frames, bytes_copied, 各阶段的直方图摘要，
+                以及 filters（滤镜名称 -> 直方图摘要）
+        """
+        result = {
+            "fps": self.fps(),
+            "painted_frames": self.painted_frames,
+            "bytes_copied": self.bytes_copied
+        }
+        for stage, histogram in self.histograms.items():
+            result[stage] = histogram.snapshot()
+        result["filters"] = {name: histogram.snapshot()
+                             for name, histogram in list(self.filter_histograms.items())}
+        return result
+
+
+class StatsLogger:
+    def __init__(self, path):
+        """初始化 JSON Lines 统计日志
+
+        Args:
+            path: 日志文件路径，每次写入追加一行 JSON
+        """
+        self.path = path
+
+    def write(self, windows):
+        """追加一条统计记录
+
+        Args:
+            windows: 各悬浮窗的统计字典列表
+        """
+        record = {"time": time.time(), "windows": windows}
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"写入统计日志错误: {str(e)}")
+
+
+class HotPathProfiler(threading.Thread):
+    def __init__(self, interval=0.002):
+        """初始化热点路径采样分析器
+
+        在独立线程中周期性读取其他线程的 Python 调用栈并计数，
+        开销与采样间隔成正比，且不需要修改被分析的代码
+
+        Args:
+            interval: 采样间隔（秒）
+        """
+        super().__init__(name="HotPathProfiler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+
+    def run(self):
+        """采样主循环"""
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self.stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        """停止采样"""
+        self.stop_event.set()
+
+    def top_functions(self, count=20):
+        """按自身采样数排序的热点函数
+
+        Args:
+            count: 返回的函数数量
+
+        Returns:
+            list: (函数, 采样数, 占比) 列表
+        """
+        leaves = Counter()
+        for stack, hits in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += hits
+        total = sum(leaves.values()) or 1
+        return [(name, hits, hits / total) for name, hits in leaves.most_common(count)]
+
+    def save(self, path):
+        """以折叠栈格式保存采样结果，可直接用于生成火焰图
+
+        Args:
+            path: 输出文件路径
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, hits in self.stacks.most_common():
+                f.write(f"{stack} {hits}\n")
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 串流服务模块
+基于 asyncio 的本地 HTTP 服务，把悬浮窗的画面以 MJPEG（浏览器 <img> 直接显示）
+和 WebSocket 二进制帧（每条消息为一张 JPEG）提供给局域网内的看板。
+
+每个区域的每个变化帧只在线程池中编码一次 JPEG，结果分发给该区域的所有客户端；
+客户端总是取最新的一帧发送，慢客户端各自丢帧，不影响其他客户端和捕获线程。
+编码频率不超过 max_fps，没有客户端时不复制也不编码。
+
+路径:
+    /                   所有区域的预览页
+    /stream/<名称>      MJPEG 流（multipart/x-mixed-replace）
+    /ws/<名称>          WebSocket，每条二进制消息为一张 JPEG
+    /snapshot/<名称>    最新一帧 JPEG
+    /stats              JSON 统计
+
+服务在独立线程的事件循环中运行，本模块不依赖 Qt
+"""
+
+import json
+import time
+import base64
+import socket
+import struct
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from stats import LatencyHistogram
+
+# WebSocket 握手使用的固定 GUID（RFC 6455）
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+# MJPEG 分隔符
+BOUNDARY = "landscapecutter"
+
+# 客户端消息的最大长度：只处理控制帧（RFC 6455 规定不超过 125 字节），
+# 其他消息在该长度以内时丢弃，超过时关闭连接
+MAX_CLIENT_PAYLOAD = 4096
+
+# WebSocket 关闭状态码
+CLOSE_GOING_AWAY = 1001
+CLOSE_PROTOCOL_ERROR = 1002
+CLOSE_TOO_BIG = 1009
+
+
+class StreamSource:
+    def __init__(self, server, name):
+        """一个串流区域，由 StreamServer.add_source 创建
+
+        Args:
+            server: 所属的串流服务
+            name: 区域名称，用于 URL 路径
+        """
+        self.server = server
+        self.name = name
+        self.lock = threading.Lock()
+        # 等待编码的最新帧：(帧副本, 时间戳)，编码前被新帧替换即视为丢弃
+        self.pending = None
+        self.scheduled = False
+        self.last_encode = 0.0
+        # 最新的 JPEG 及其序号，new_frame 在序号变化时被设置（只在事件循环中访问）
+        self.jpeg = None
+        self.seq = 0
+        self.new_frame = None
+        self.clients = 0
+        # 区域已被移除，等待中的客户端结束发送并断开
+        self.closed = False
+        # 需要新画面时的回调（如重置变化检测），在事件循环线程中调用
+        self.request_frame = None
+
+        # 统计信息
+        self.published = 0
+        self.skipped = 0
+        self.encoded = 0
+        self.encode_latency = LatencyHistogram()
+        self.sent = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+
+    def publish(self, frame, timestamp):
+        """提交一个变化帧（在捕获线程调用，不阻塞）
+
+        Args:
+            frame: BGRA 图像数据，仅在调用期间有效
+            timestamp: 截图时间戳（time.perf_counter）
+        """
+        self.published += 1
+        if self.clients == 0:
+            return
+        copy = frame.copy()
+        with self.lock:
+            if self.pending is not None:
+                # 上一帧还没来得及编码，由最新帧替换
+                self.skipped += 1
+            self.pending = (copy, timestamp)
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.server.call_soon(self.encode_pending)
+
+    async def encode_pending(self):
+        """编码最新的待编码帧（在事件循环中运行），频率不超过 max_fps"""
+        loop = asyncio.get_running_loop()
+        while True:
+            delay = self.last_encode + self.server.min_interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            with self.lock:
+                item = self.pending
+                self.pending = None
+                if item is None:
+                    self.scheduled = False
+                    return
+            self.last_encode = time.perf_counter()
+            frame, _ = item
+            try:
+                jpeg, cost = await loop.run_in_executor(self.server.pool, self.server.encode, frame)
+            except Exception as e:
+                print(f"JPEG 编码错误: {str(e)}")
+                continue
+            self.encode_latency.record(cost)
+            self.encoded += 1
+            self.jpeg = jpeg
+            self.seq += 1
+            event, self.new_frame = self.new_frame, asyncio.Event()
+            if event is not None:
+                event.set()
+
+    def attach(self):
+        """客户端连接（在事件循环中调用）"""
+        self.clients += 1
+        if self.clients == 1:
+            # 没有客户端时不编码，已有的 JPEG 可能已经过时，请求捕获端提交完整的新画面
+            self.jpeg = None
+            if self.request_frame is not None:
+                self.request_frame()
+
+    def detach(self):
+        """客户端断开（在事件循环中调用）"""
+        self.clients -= 1
+
+    def close(self):
+        """标记区域已移除并唤醒等待新帧的客户端（在事件循环中调用）"""
+        self.closed = True
+        event, self.new_frame = self.new_frame, None
+        if event is not None:
+            event.set()
+
+    async def next_frame(self, seq):
+        """等待序号大于 seq 的帧
+
+        Returns:
+            tuple: (JPEG 数据, 序号)，区域已移除时 JPEG 数据为 None
+        """
+        while not self.closed and (self.seq <= seq or self.jpeg is None):
+            if self.new_frame is None:
+                self.new_frame = asyncio.Event()
+            await self.new_frame.wait()
+        if self.closed:
+            return None, self.seq
+        return self.jpeg, self.seq
+
+    def get_stats(self):
+        """获取区域的串流统计
+
+        Returns:
+            dict: 包含 stream_clients, stream_published, stream_skipped（超过帧率上限被替换的帧）,
+                stream_encoded, stream_sent, stream_dropped（慢客户端跳过的帧）, stream_bytes_sent
+                和 stream_encode（编码耗时直方图摘要）
+        """
+        return {
+            "stream_clients": self.clients,
+            "stream_published": self.published,
+            "stream_skipped": self.skipped,
+            "stream_encoded": self.encoded,
+            "stream_sent": self.sent,
+            "stream_dropped": self.dropped,
+            "stream_bytes_sent": self.bytes_sent,
+            "stream_encode": self.encode_latency.snapshot()
+        }
+
+
+class StreamServer:
+    def __init__(self, host="127.0.0.1", port=8765, max_fps=15, quality=80, workers=2):
+        """初始化串流服务
+
+        Args:
+            host: 监听地址，默认只允许本机访问；向局域网提供时使用 0.0.0.0
+            port: 监听端口，0 表示自动选择
+            max_fps: 每个区域的最大编码帧率
+            quality: JPEG 质量（1-100）
+            workers: 编码线程数量
+        """
+        import cv2
+        self.cv2 = cv2
+        self.host = host
+        self.port = port
+        self.min_interval = 1.0 / max_fps
+        self.quality = quality
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="StreamEncoder")
+        self.sources = {}
+        self.loop = None
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        """在后台线程中启动服务
+
+        Raises:
+            OSError: 端口被占用等监听错误
+        """
+        ready = threading.Event()
+        errors = []
+
+        def run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.server = self.loop.run_until_complete(
+                    asyncio.start_server(self.handle_client, self.host, self.port))
+            except OSError as e:
+                errors.append(e)
+                ready.set()
+                self.loop.close()
+                return
+            self.port = self.server.sockets[0].getsockname()[1]
+            ready.set()
+            self.loop.run_forever()
+            # 停止监听并取消仍在发送的客户端
+            self.server.close()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+        self.thread = threading.Thread(target=run, name="StreamServer", daemon=True)
+        self.thread.start()
+        ready.wait()
+        if errors:
+            raise errors[0]
+
+    def stop(self):
+        """停止服务和编码线程"""
+        if self.loop is not None and self.thread is not None and self.thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(2.0)
+        self.thread = None
+        self.pool.shutdown(wait=False)
+
+    @property
+    def url(self):
+        """服务地址"""
+        host = "127.0.0.1" if self.host in ("", "0.0.0.0") else self.host
+        return f"http://{host}:{self.port}/"
+
+    def call_soon(self, coroutine_function):
+        """在事件循环中启动协程（可在任意线程调用）"""
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(lambda: loop.create_task(coroutine_function()))
+
+    def add_source(self, name):
+        """添加串流区域
+
+        Returns:
+            StreamSource: 区域对象，捕获线程调用其 publish 提交变化帧
+        """
+        source = StreamSource(self, name)
+        self.sources[name] = source
+        return source
+
+    def remove_source(self, name):
+        """移除串流区域，已连接的客户端立即断开（可在任意线程调用）"""
+        source = self.sources.pop(name, None)
+        if source is None:
+            return
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(source.close)
+        else:
+            source.closed = True
+
+    def encode(self, frame):
+        """把 BGRA 帧编码为 JPEG（在编码线程中运行）
+
+        Returns:
+            tuple: (JPEG 数据, 耗时秒数)
+        """
+        start = time.perf_counter()
+        bgr = self.cv2.cvtColor(frame, self.cv2.COLOR_BGRA2BGR)
+        ok, data = self.cv2.imencode(".jpg", bgr, [self.cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("imencode 失败")
+        return data.tobytes(), time.perf_counter() - start
+
+    async def handle_client(self, reader, writer):
+        """处理一个 HTTP 连接"""
+        # 较低的发送缓冲上限：慢客户端尽早在 drain 中等待并丢帧，而不是在内存和内核缓冲区中积压旧帧
+        writer.transport.set_write_buffer_limits(high=1 << 18)
+        connection = writer.get_extra_info("socket")
+        if connection is not None:
+            connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 18)
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            lines = request.decode("latin-1").split("\r\n")
+            method, path = lines[0].split(" ")[:2]
+            headers = {}
+            for line in lines[1:]:
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            route, _, name = path.split("?")[0].strip("/").partition("/")
+            source = self.sources.get(name)
+            if method != "GET":
+                await self.respond(writer, "405 Method Not Allowed", "text/plain", b"")
+            elif route == "":
+                await self.respond(writer, "200 OK", "text/html; charset=utf-8", self.index_page())
+            elif route == "stats":
+                body = json.dumps(self.get_stats(), ensure_ascii=False).encode("utf-8")
+                await self.respond(writer, "200 OK", "application/json", body)
+            elif source is None:
+                await self.respond(writer, "404 Not Found", "text/plain", b"unknown region")
+            elif route == "snapshot":
+                await self.serve_snapshot(writer, source)
+            elif route == "stream":
+                await self.serve_mjpeg(reader, writer, source)
+            elif route == "ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self.serve_websocket(reader, writer, source, headers)
+            else:
+                await self.respond(writer, "404 Not Found", "text/plain", b"not found")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # 服务停止
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, content_type, body):
+        """发送完整的 HTTP 响应"""
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nCache-Control: no-cache\r\n"
+                     f"Connection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+
+    def index_page(self):
+        """所有区域的预览页"""
+        items = "".join(f'<figure><img src="/stream/{name}"><figcaption>{name}</figcaption></figure>'
+                        for name in self.sources)
+        return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>LandscapeCutter</title></head>"
+                f"<body>{items or '没有串流区域'}</body></html>").encode("utf-8")
+
+    async def stream_frames(self, source, send):
+        """向一个客户端持续发送最新的帧
+
+        Args:
+            source: 串流区域
+            send: 协程函数 send(jpeg)，发送一帧，客户端较慢时在其中等待
+        """
+        source.attach()
+        try:
+            seq = 0
+            while not source.closed:
+                jpeg, latest = await source.next_frame(seq)
+                if jpeg is None:
+                    # 区域已移除
+                    break
+                if seq and latest > seq + 1:
+                    # 发送期间产生的中间帧被跳过，只发送最新一帧
+                    source.dropped += latest - seq - 1
+                seq = latest
+                await send(jpeg)
+                source.sent += 1
+                source.bytes_sent += len(jpeg)
+        finally:
+            source.detach()
+
+    async def serve_snapshot(self, writer, source):
+        """发送最新一帧 JPEG"""
+        source.attach()
+        try:
+            jpeg, _ = await asyncio.wait_for(source.next_frame(0), 5.0)
+        except asyncio.TimeoutError:
+            jpeg = None
+        finally:
+            source.detach()
+        if jpeg is None:
+            await self.respond(writer, "503 Service Unavailable", "text/plain", b"no frame")
+        else:
+            await self.respond(writer, "200 OK", "image/jpeg", jpeg)
+
+    async def until_disconnected(self, sender, receiver):
+        """运行发送协程，直到接收协程返回（客户端断开或关闭）或发送出错"""
+        tasks = (asyncio.ensure_future(sender), asyncio.ensure_future(receiver))
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            task.result()
+
+    async def read_until_eof(self, reader):
+        """丢弃客户端发来的数据，连接断开时返回"""
+        try:
+            while await reader.read(4096):
+                pass
+        except ConnectionError:
+            return
+
+    async def serve_mjpeg(self, reader, writer, source):
+        """以 multipart/x-mixed-replace 发送 MJPEG 流"""
+        writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: multipart/x-mixed-replace; boundary={BOUNDARY}\r\n"
+                     f"Cache-Control: no-cache\r\nConnection: close\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+
+        async def send(jpeg):
+            writer.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n"
+                         .encode("latin-1") + jpeg + b"\r\n")
+            await writer.drain()
+
+        await self.until_disconnected(self.stream_frames(source, send), self.read_until_eof(reader))
+
+    async def serve_websocket(self, reader, writer, source, headers):
+        """完成 WebSocket 握手后以二进制消息发送 JPEG"""
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("latin-1")).digest()).decode()
+        writer.write(f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                     f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+
+        async def send(jpeg):
+            writer.write(websocket_header(0x2, len(jpeg)) + jpeg)
+            await writer.drain()
+
+        # 同时读取客户端消息：收到关闭帧或连接断开时结束发送
+        await self.until_disconnected(self.stream_frames(source, send), self.read_websocket(reader, writer))
+        if source.closed:
+            # 区域已移除，通知客户端后断开
+            writer.write(websocket_close_frame(CLOSE_GOING_AWAY))
+            await writer.drain()
+
+    async def read_websocket(self, reader, writer):
+        """读取客户端的 WebSocket 消息，回应 ping，收到关闭帧或连接断开时返回
+
+        客户端的帧必须加掩码，控制帧不超过 125 字节，其他消息不超过 MAX_CLIENT_PAYLOAD 且被丢弃；
+        违反时发送关闭帧并返回
+        """
+        try:
+            while True:
+                first, second = await reader.readexactly(2)
+                opcode = first & 0x0F
+                length = second & 0x7F
+                if not second & 0x80:
+                    writer.write(websocket_close_frame(CLOSE_PROTOCOL_ERROR))
+                    return
+                if opcode & 0x8 and (length > 125 or not first & 0x80):
+                    # 控制帧不能分片，长度不超过 125
+                    writer.write(websocket_close_frame(CLOSE_PROTOCOL_ERROR))
+                    return
+                if length == 126:
+                    length = struct.unpack(">H", await reader.readexactly(2))[0]
+                elif length == 127:
+                    length = struct.unpack(">Q", await reader.readexactly(8))[0]
+                if length > MAX_CLIENT_PAYLOAD:
+                    writer.write(websocket_close_frame(CLOSE_TOO_BIG))
+                    return
+                mask = await reader.readexactly(4)
+                payload = bytearray(await reader.readexactly(length))
+                if opcode == 0x8:
+                    writer.write(websocket_header(0x8, 0))
+                    return
+                if opcode == 0x9:
+                    for index in range(length):
+                        payload[index] ^= mask[index % 4]
+                    writer.write(websocket_header(0xA, length) + bytes(payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+
+    def get_stats(self):
+        """获取串流统计
+
+        Returns:
+            dict: 包含 url, clients（客户端总数）和 sources（区域名称 -> StreamSource.get_stats）
+        """
+        sources = {name: source.get_stats() for name, source in list(self.sources.items())}
+        return {
+            "url": self.url,
+            "clients": sum(stats["stream_clients"] for stats in sources.values()),
+            "sources": sources
+        }
+
+
+def websocket_header(opcode, length):
+    """生成服务端（不加掩码）WebSocket 帧头"""
+    if length < 126:
+        return struct.pack(">BB", 0x80 | opcode, length)
+    if length < 65536:
+        return struct.pack(">BBH", 0x80 | opcode, 126, length)
+    return struct.pack(">BBQ", 0x80 | opcode, 127, length)
+
+
+def websocket_close_frame(code):
+    """生成带状态码的服务端关闭帧"""
+    return websocket_header(0x8, 2) + struct.pack(">H", code)
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+"""测试配置：把 python 目录加入模块搜索路径，Qt 使用 offscreen 平台，并提供共用的 QApplication"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session")
+def app():
+    """整个测试过程共用的 QApplication，只在需要 Qt 的测试中导入 PySide6"""
+    from PySide6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
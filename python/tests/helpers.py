@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+"""测试共用的辅助函数：等待条件成立和从套接字读取定长数据"""
+
+import time
+
+
+def wait_until(condition, timeout=5.0):
+    """等待条件成立"""
+    end = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > end:
+            raise AssertionError("等待超时")
+        time.sleep(0.01)
+
+
+def read_exactly(client, count, buffer=b""):
+    """从已读到的缓冲数据和连接中读取 count 字节
+
+    只向连接请求缺少的字节数，不会多读
+
+    Returns:
+        tuple: (数据, 剩余缓冲)
+    """
+    while len(buffer) < count:
+        chunk = client.recv(count - len(buffer))
+        assert chunk, "连接已断开"
+        buffer += chunk
+    return buffer[:count], buffer[count:]
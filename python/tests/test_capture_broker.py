@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+"""捕获调度测试：每个周期一次批量截图，按显示器合并矩形，再把视图分发给各区域"""
+
+import numpy as np
+
+from capture_backends import create_backend
+from capture_broker import CaptureBroker
+
+
+def rect_tuple(rect):
+    return rect["x"], rect["y"], rect["width"], rect["height"]
+
+
+def test_tick_merges_rects_per_monitor_and_slices_views():
+    # 两个 320x240 的虚拟显示器，静止画面
+    backend = create_backend("synthetic", width=320, height=240, monitor_count=2, change_rate=0.0)
+    batches = []
+    grab_batch = backend.grab_batch
+
+    def recording_grab_batch(rects):
+        batches.append([rect_tuple(rect) for rect in rects])
+        return grab_batch(rects)
+
+    backend.grab_batch = recording_grab_batch
+
+    regions = {
+        # 相互重叠的两个区域合并为一次截图
+        "a": {"x": 10, "y": 10, "width": 100, "height": 80},
+        "b": {"x": 50, "y": 40, "width": 100, "height": 80},
+        # 同一显示器上距离较远的区域单独截图
+        "c": {"x": 270, "y": 180, "width": 40, "height": 40},
+        # 紧挨 c 但位于另一个显示器，不与 c 合并
+        "d": {"x": 322, "y": 180, "width": 40, "height": 40},
+    }
+    received = {}
+
+    def make_callback(name):
+        def callback(frame, timestamp):
+            received.setdefault(name, []).append(frame)
+            return True
+        return callback
+
+    broker = CaptureBroker(backend)
+    tokens = {name: broker.register(region, make_callback(name)) for name, region in regions.items()}
+    results = broker.tick()
+
+    assert len(batches) == 1
+    assert sorted(batches[0]) == [(10, 10, 140, 110), (270, 180, 40, 40), (322, 180, 40, 40)]
+    assert set(results) == set(tokens.values())
+    assert all(changed for changed, _ in results.values())
+    for name, region in regions.items():
+        [frame] = received[name]
+        assert frame.shape == (region["height"], region["width"], 4)
+        x, y = region["x"], region["y"]
+        assert np.array_equal(frame, backend.desktop[y:y + region["height"], x:x + region["width"]])
+    # 合并截图中的区域是批量截图的切片视图，不复制数据
+    assert received["a"][0].base is not None
+
+    # 只刷新部分区域时，合并矩形缩小到到期区域的范围
+    received.clear()
+    broker.tick({tokens["a"]})
+    assert batches[1] == [(10, 10, 100, 80)]
+    assert list(received) == ["a"]
+
+    # 注销后重新计算截图计划
+    broker.unregister(tokens["b"])
+    broker.unregister(tokens["d"])
+    broker.tick()
+    assert sorted(batches[2]) == [(10, 10, 100, 80), (270, 180, 40, 40)]
+    backend.close()
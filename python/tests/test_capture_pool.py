@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+
+"""多进程捕获测试：工作进程交回缩小后的帧和脏区域，且不导入 Qt"""
+
+import os
+import sys
+import subprocess
+
+import numpy as np
+import pytest
+
+from capture_pool import ProcessCaptureEngine
+from capture_worker import reduce_rects
+from frame_diff import FrameChangeDetector
+
+
+def covered(mask, rects):
+    """mask 中为 True 的像素是否都在 rects 内"""
+    remaining = mask.copy()
+    for x, y, w, h in rects:
+        remaining[y:y + h, x:x + w] = False
+    return not remaining.any()
+
+
+def test_reduce_rects():
+    assert reduce_rects([(10, 20, 30, 40)], (100, 100), (100, 100)) == [(10, 20, 30, 40)]
+    # 缩小一半后向外扩展 1 像素，并限制在帧内
+    assert reduce_rects([(10, 20, 30, 40)], (100, 100), (50, 50)) == [(4, 9, 17, 22)]
+    assert reduce_rects([(0, 0, 100, 100)], (100, 100), (33, 25)) == [(0, 0, 33, 25)]
+
+
+def test_workers_return_reduced_frames_and_dirty_rects():
+    pytest.importorskip("cv2")
+    engine = ProcessCaptureEngine("synthetic", 1, {"width": 640, "height": 480, "change_rate": 1.0,
+                                                   "change_size": 24, "changes_per_frame": 2})
+    delivered = []
+    sources = []
+    try:
+        token = engine.register({"x": 0, "y": 0, "width": 640, "height": 480},
+                                lambda frame, timestamp, rects, source: sources.append(source)
+                                or delivered.append((np.array(frame), rects)) or True)
+        engine.set_output_size(token, 320, 240)
+        for _ in range(40):
+            engine.tick()
+    finally:
+        engine.close()
+
+    assert len(delivered) > 10
+    # 未启用输出时不交回原始帧
+    assert sources == [None] * len(delivered)
+    frame, rects = delivered[0]
+    assert frame.shape == (240, 320, 4)
+    assert rects == [(0, 0, 320, 240)]
+    # 每帧中变化的像素都在交回的脏区域内，且脏区域只占画面的一小部分
+    partial = 0
+    for (previous, _), (frame, rects) in zip(delivered, delivered[1:]):
+        assert rects
+        assert covered((frame != previous).any(axis=2), rects)
+        partial += sum(w * h for _, _, w, h in rects) < 320 * 240 // 2
+    assert partial > 0
+
+
+def test_detector_accepts_external_rects():
+    detector = FrameChangeDetector()
+    shape = (240, 320, 4)
+    assert detector.accept(shape, [(0, 0, 8, 8)]) == [(0, 0, 320, 240)]
+    assert detector.accept(shape, [(0, 0, 8, 8)]) == [(0, 0, 8, 8)]
+    assert detector.accept(shape, []) == []
+    detector.reset()
+    assert detector.accept(shape, [(0, 0, 8, 8)]) == [(0, 0, 320, 240)]
+    assert detector.accept((120, 160, 4), [(0, 0, 8, 8)]) == [(0, 0, 160, 120)]
+
+
+SCRIPT = """
+import sys
+sys.path.insert(0, {path!r})
+# 模拟 main.py：主模块导入 Qt，工作进程不应重新导入本模块
+if __name__ == "__mp_main__":
+    open({marker!r}, "w").close()
+import PySide6.QtCore
+
+from capture_pool import ProcessCaptureEngine
+
+if __name__ == "__main__":
+    engine = ProcessCaptureEngine("synthetic", 1, {{"width": 64, "height": 64}})
+    token = engine.register({{"x": 0, "y": 0, "width": 64, "height": 64}}, lambda *args: True)
+    assert engine.tick()[token][0]
+    engine.close()
+    print("ok")
+"""
+
+
+def test_spawned_workers_do_not_import_main_module(tmp_path):
+    pytest.importorskip("PySide6")
+    marker = tmp_path / "imported"
+    script = tmp_path / "fake_main.py"
+    script.write_text(SCRIPT.format(path=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                    marker=str(marker)), encoding="utf-8")
+    result = subprocess.run([sys.executable, str(script)], capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "ok"
+    assert not marker.exists()
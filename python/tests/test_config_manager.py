@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""配置管理测试：会话保存在单独的文件中，不重写 config.json"""
+
+import os
+import json
+
+from config_manager import ConfigManager
+
+
+def window_state(x=0):
+    """一个悬浮窗的会话状态"""
+    region = {"x": x, "y": 0, "width": 100, "height": 80}
+    return {"region": region, "logical_rect": dict(region), "position": [x, 0], "size": [100, 80]}
+
+
+def write(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_session_saved_next_to_config_without_rewriting_it(tmp_path):
+    path = str(tmp_path / "config.json")
+    write(path, {"capture": {"method": "mss"}})
+    before = os.stat(path).st_mtime_ns
+
+    config = ConfigManager(path)
+    assert config.session_path == str(tmp_path / "session.json")
+    assert config.save_session([window_state()], "auto")
+    config.set_backend("mss")
+    assert not config.dirty
+    assert os.stat(path).st_mtime_ns == before
+
+    windows, scale_mode = ConfigManager(path).load_session()
+    assert windows == [window_state()]
+    assert scale_mode == "auto"
+
+
+def test_changed_items_mark_config_dirty(tmp_path):
+    path = str(tmp_path / "config.json")
+    config = ConfigManager(path)
+    region = {"x": 1, "y": 2, "width": 3, "height": 4}
+    config.set_selected_region(region, {"relative_x": 5, "relative_y": 6})
+    assert config.dirty
+    assert config.save()
+    assert not config.dirty
+    assert read(path)["selected_region"] == dict(region, relative_x=5, relative_y=6)
+
+    # 相同的值不需要重新保存
+    config.set_selected_region(region, {"relative_x": 5, "relative_y": 6})
+    assert not config.dirty
+
+
+def test_legacy_session_in_config_is_migrated(tmp_path):
+    path = str(tmp_path / "config.json")
+    write(path, {"capture": {"method": "mss"}, "session": {"windows": [window_state(), {"region": {}}],
+                                                          "scale_mode": "smooth"}})
+    config = ConfigManager(path)
+    windows, scale_mode = config.load_session()
+    assert windows == [window_state()]
+    assert scale_mode == "smooth"
+
+    assert config.save_session([window_state(10)], "smooth")
+    assert config.dirty
+    config.save()
+    assert "session" not in read(path)
+    assert ConfigManager(path).load_session() == ([window_state(10)], "smooth")
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""悬浮窗测试：同步显示路径和图像块生成"""
+
+import time
+
+import numpy as np
+import pytest
+from PySide6.QtGui import QImage
+
+from capture_backends import create_backend
+from floating_window import FloatingWindow
+
+
+@pytest.fixture
+def backend():
+    backend = create_backend("synthetic", width=640, height=480, change_rate=0.0)
+    yield backend
+    backend.close()
+
+
+def make_window(backend, width, height, display_width, display_height):
+    return FloatingWindow(backend, {"x": 0, "y": 0, "width": width, "height": height},
+                          {"x": 0, "y": 0, "width": display_width, "height": display_height})
+
+
+def test_show_frame_skips_changes_outside_crop(app, backend):
+    window = make_window(backend, 640, 480, 640, 480)
+    try:
+        window.set_filters(["crop:0:0:320:240"])
+        window.resize(320, 240)
+        frame = np.full((480, 640, 4), 50, dtype=np.uint8)
+        assert window.show_frame(frame, time.perf_counter())
+        painted = window.frame_stats.painted_frames
+
+        # 变化落在裁剪范围之外：不生成图像块，不计为绘制
+        frame[400:420, 600:620] = 200
+        assert not window.show_frame(frame, time.perf_counter())
+        assert window.frame_stats.painted_frames == painted
+
+        frame[10:20, 10:20] = 200
+        assert window.show_frame(frame, time.perf_counter())
+        assert window.frame_stats.painted_frames == painted + 1
+    finally:
+        window.close()
+
+
+def backing_array(window):
+    """后备位图的像素（BGRA）"""
+    image = window.backing_pixmap.toImage().convertToFormat(QImage.Format_ARGB32)
+    data = np.frombuffer(image.constBits(), dtype=np.uint8)
+    return data.reshape(image.height(), image.bytesPerLine() // 4, 4)[:, :image.width()].copy()
+
+
+@pytest.mark.parametrize("mode", ["smooth", "nearest"])
+@pytest.mark.parametrize("frame_size, display_size", [
+    ((400, 300), (600, 450)),   # 放大 1.5 倍（如 dpr 1.5）
+    ((400, 300), (500, 375)),   # 放大 1.25 倍
+    ((400, 300), (300, 225)),   # 缩小
+    ((401, 300), (617, 461)),   # 调整窗口大小后没有简单比例
+])
+def test_scaled_patches_have_no_seams(app, backend, mode, frame_size, display_size):
+    (frame_width, frame_height), (display_width, display_height) = frame_size, display_size
+    window = make_window(backend, frame_width, frame_height, display_width, display_height)
+    window.set_scale_mode(mode)
+    rng = np.random.default_rng(1)
+    try:
+        first = rng.integers(0, 256, (frame_height, frame_width, 4), dtype=np.uint8)
+        second = first.copy()
+        # 两个相邻的脏图块
+        second[96:160, 128:224] = rng.integers(0, 256, (64, 96, 4), dtype=np.uint8)
+        rects = [(128, 96, 32, 64), (160, 96, 64, 64)]
+        full = [(0, 0, frame_width, frame_height)]
+
+        window.apply_patches(window.make_patches(first, full, display_size))
+        window.apply_patches(window.make_patches(second, rects, display_size))
+        tiled = backing_array(window)
+        window.apply_patches(window.make_patches(second, full, display_size))
+        expected = backing_array(window)
+        # 只更新脏图块的结果与整帧重绘一致（允许舍入误差）
+        assert np.abs(tiled.astype(int) - expected.astype(int)).max() <= 2
+    finally:
+        window.close()
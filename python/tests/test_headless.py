@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+"""无界面捕获测试：参数校验和本地套接字输出"""
+
+import time
+import socket
+import struct
+
+import numpy as np
+import pytest
+
+import headless
+from helpers import wait_until, read_exactly
+
+
+@pytest.mark.parametrize("value", ["0", "-5", "nan", "inf", "abc"])
+def test_invalid_fps_is_rejected(value, capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        headless.main(["--backend", "synthetic", "--region", "0,0,8,8", "--output", "null", "--fps", value])
+    assert excinfo.value.code == 2
+    assert "--fps" in capsys.readouterr().err
+
+
+def test_fractional_fps():
+    assert headless.parse_fps("0.5") == 0.5
+    assert headless.main(["--backend", "synthetic", "--region", "0,0,8,8", "--output", "null",
+                          "--fps", "200", "--frames", "3"]) == 0
+
+
+class BrokenPipeSink:
+    """读取端已关闭的输出端"""
+
+    def write(self, index, frame, timestamp):
+        raise BrokenPipeError(32, "Broken pipe")
+
+
+def test_broken_pipe_stops_run_without_writing_diagnostics(capsys):
+    from capture_backends import create_backend
+    from capture_broker import CaptureBroker
+
+    broker = CaptureBroker(create_backend("synthetic", width=64, height=64))
+    start = time.perf_counter()
+    stats = headless.run(broker, [{"x": 0, "y": 0, "width": 8, "height": 8}], BrokenPipeSink(), 100, duration=5.0)
+    assert time.perf_counter() - start < 1.0
+    assert stats["ticks"] == 0
+    assert capsys.readouterr() == ("", "")
+
+
+def test_stdout_sink_sends_diagnostics_to_stderr(capsysbinary):
+    from capture_backends import create_backend
+    from capture_broker import CaptureBroker
+
+    sink = headless.StdoutSink("raw")
+    frame = np.full((4, 4, 4), 7, dtype=np.uint8)
+    broker = CaptureBroker(create_backend("synthetic", width=64, height=64))
+
+    def callback(frame, timestamp):
+        raise ValueError("回调失败")
+
+    broker.register({"x": 0, "y": 0, "width": 8, "height": 8}, callback)
+    try:
+        sink.write(0, frame, time.time())
+        broker.tick()
+        print("其他诊断信息")
+        sink.write(0, frame, time.time())
+    finally:
+        sink.close()
+    out, err = capsysbinary.readouterr()
+    # 标准输出只有两帧原始数据
+    assert out == frame.tobytes() * 2
+    assert "分发帧错误: 回调失败" in err.decode("utf-8")
+    assert "其他诊断信息" in err.decode("utf-8")
+
+
+def read_frame(client):
+    """读取一帧，返回 (区域序号, 宽, 高, 数据)"""
+    header, _ = read_exactly(client, struct.calcsize(headless.FRAME_HEADER))
+    magic, index, fmt, width, height, timestamp, length = struct.unpack(headless.FRAME_HEADER, header)
+    assert magic == headless.FRAME_MAGIC
+    data, _ = read_exactly(client, length)
+    return index, width, height, data
+
+
+def connect(sink, rcvbuf=None):
+    client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if rcvbuf:
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    client.settimeout(5.0)
+    client.connect(sink.address)
+    return client
+
+
+@pytest.fixture
+def sink():
+    sink = headless.SocketSink(("tcp", 0), "raw")
+    yield sink
+    sink.close()
+
+
+def test_socket_sink_sends_frames(sink):
+    client = connect(sink)
+    wait_until(lambda: len(sink.clients) == 1)
+    frame = np.arange(16 * 8 * 4, dtype=np.uint8).reshape(8, 16, 4)
+    sink.write(3, frame, time.time())
+    assert read_frame(client) == (3, 16, 8, frame.tobytes())
+    client.close()
+    wait_until(lambda: not sink.clients)
+
+
+def test_slow_client_does_not_block_capture(sink):
+    slow = connect(sink, rcvbuf=1 << 14)
+    fast = connect(sink)
+    wait_until(lambda: len(sink.clients) == 2)
+
+    # 1 MB 的帧：慢客户端不读取，发送缓冲区很快填满
+    frame = np.zeros((512, 512, 4), dtype=np.uint8)
+    for count in range(20):
+        frame[0, 0, 0] = count
+        start = time.perf_counter()
+        sink.write(0, frame, time.time())
+        assert time.perf_counter() - start < 0.2
+        _, _, _, data = read_frame(fast)
+        assert data[0] == count
+    assert sink.dropped > 0
+
+    # 慢客户端恢复读取后收到完整的帧，中间的帧被丢弃
+    received = []
+    slow.settimeout(1.0)
+    try:
+        while True:
+            received.append(read_frame(slow)[3][0])
+    except socket.timeout:
+        pass
+    assert 1 <= len(received) < 20
+    assert received == sorted(received)
+    assert received[-1] == 19
+    slow.close()
+    fast.close()
+
+
+def test_close_flushes_queued_frames():
+    sink = headless.SocketSink(("tcp", 0), "png")
+    client = connect(sink)
+    wait_until(lambda: len(sink.clients) == 1)
+    frame = np.full((8, 8, 4), 200, dtype=np.uint8)
+    sink.write(0, frame, time.time())
+    sink.close()
+    index, width, height, data = read_frame(client)
+    assert (index, width, height) == (0, 8, 8)
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    assert client.recv(4096) == b""
+    client.close()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""回放缓存测试"""
+
+import numpy as np
+
+from history import FrameHistory
+
+WIDTH, HEIGHT = 3840, 2160
+
+
+def make_frames(count):
+    """4K BGRA 画面序列，每帧只有一小块变化"""
+    frame = np.zeros((HEIGHT, WIDTH, 4), dtype=np.uint8)
+    for index in range(count):
+        x = (index * 64) % (WIDTH - 64)
+        frame[100:164, x:x + 64] = index + 1
+        yield frame, [(x, 100, 64, 64)] if index else [(0, 0, WIDTH, HEIGHT)], float(index)
+
+
+def test_4k_sequence_keeps_history_within_cap():
+    history = FrameHistory(32, level=0)
+    for frame, rects, timestamp in make_frames(10):
+        history.append(frame, rects, timestamp)
+        assert history.bytes <= history.max_bytes
+    stats = history.get_stats()
+    assert stats["history_frames"] > 1
+    assert stats["history_evicted"] == 0
+    rebuilt, rebuilt_time = history.frame_at(9.0)
+    assert rebuilt_time == 9.0
+    assert np.array_equal(rebuilt, frame)
+    history.close()
+
+
+def test_segments_split_by_frame_count():
+    history = FrameHistory(128, keyframe_frames=4, level=0)
+    frames = list(make_frames(10))
+    for frame, rects, timestamp in frames:
+        history.append(frame, rects, timestamp)
+    assert [len(segment["entries"]) for segment in history.segments] == [4, 4, 2]
+    assert history.bytes <= history.max_bytes
+    history.close()
+
+
+def test_frame_larger_than_cap_is_rejected():
+    history = FrameHistory(16, level=0)
+    for frame, rects, timestamp in make_frames(3):
+        history.append(frame, rects, timestamp)
+    stats = history.get_stats()
+    assert stats["history_frames"] == 0
+    assert stats["history_rejected"] == 3
+    assert history.bytes == 0
+    history.close()
+
+
+def test_delta_chain_over_cap_starts_new_segment():
+    # 每帧整帧变化：差分链很快超过上限，旧段被淘汰，占用始终不超过上限
+    history = FrameHistory(2, level=0)
+    frame = np.zeros((480, 640, 4), dtype=np.uint8)
+    for index in range(20):
+        frame[:] = index
+        history.append(frame, [(0, 0, 640, 480)], float(index))
+        assert history.bytes <= history.max_bytes
+    rebuilt, _ = history.frame_at(19.0)
+    assert rebuilt is not None
+    assert history.get_stats()["history_frames"] >= 1
+    history.close()
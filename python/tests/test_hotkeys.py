@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""热键测试：用 fake 后端模拟按下热键，不注册系统热键"""
+
+import time
+
+import pytest
+from PySide6.QtCore import QTimer
+
+from hotkeys import create_hotkey_backend, FakeHotkeyBackend, MOD_ALT, VK_X
+from screen_selector import ScreenSelector
+
+
+def test_create_fake_backend(app):
+    backend = create_hotkey_backend("fake")
+    assert isinstance(backend, FakeHotkeyBackend)
+    assert backend.name == "fake"
+    with pytest.raises(ValueError):
+        create_hotkey_backend("missing")
+
+
+def test_trigger_emits_registered_hotkey(app):
+    backend = create_hotkey_backend("fake")
+    received = []
+    backend.activated.connect(lambda hotkey_id, timestamp: received.append((hotkey_id, timestamp)))
+
+    # 未注册的热键不会触发
+    assert not backend.trigger(1)
+    assert backend.register(1, MOD_ALT, VK_X)
+    before = time.perf_counter()
+    assert backend.trigger(1)
+    assert len(received) == 1
+    assert received[0][0] == 1
+    assert before <= received[0][1] <= time.perf_counter()
+
+    backend.unregister(1)
+    assert not backend.trigger(1)
+    backend.register(1, MOD_ALT, VK_X)
+    backend.register(2, MOD_ALT, VK_X)
+    backend.close()
+    assert backend.hotkeys == {}
+    assert len(received) == 1
+
+
+def test_hotkey_opens_selector_and_measures_latency(app):
+    backend = create_hotkey_backend("fake")
+    backend.register(1, MOD_ALT, VK_X)
+    selector = ScreenSelector()
+    selector.watch_screens()
+    latencies = []
+    results = []
+    # 首次绘制后关闭选择器（相当于按 Esc）
+    selector.first_painted.connect(lambda latency: (latencies.append(latency), QTimer.singleShot(0, selector.reject)))
+    backend.activated.connect(lambda hotkey_id, timestamp: results.append(selector.select_region(timestamp)))
+    # 超时保护：没有绘制时也不会一直阻塞
+    QTimer.singleShot(5000, selector.reject)
+
+    assert backend.trigger(1)
+    assert results == [(None, None)]
+    assert len(latencies) == 1
+    assert 0 <= latencies[0] < 5.0
+    selector.unwatch_screens()
+    selector.deleteLater()
+    backend.close()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+"""录制测试：入队复制、不阻塞的停止，以及按原始帧判断输出"""
+
+import json
+import time
+
+import numpy as np
+import pytest
+
+from recorder import FrameRecorder, wait_for_recorders
+
+
+def test_raw_recording_copies_views_and_stops_without_waiting(tmp_path):
+    path = tmp_path / "out.raw"
+    recorder = FrameRecorder(str(path), "raw", queue_size=16)
+    recorder.start()
+    screen = np.zeros((100, 200, 4), dtype=np.uint8)
+    frames = []
+    for index in range(5):
+        screen[:] = index
+        # 不连续的切片视图，入队时复制为连续数组
+        view = screen[10:60, 20:100]
+        assert not view.flags["C_CONTIGUOUS"]
+        recorder.submit(view, time.perf_counter())
+        frames.append(view.copy())
+
+    start = time.perf_counter()
+    recorder.stop(wait=False)
+    assert time.perf_counter() - start < 0.05
+    assert wait_for_recorders(5.0)
+    assert not recorder.is_alive()
+    assert not recorder.submit(view, time.perf_counter())
+
+    data = np.fromfile(path, dtype=np.uint8).reshape(5, 50, 80, 4)
+    assert np.array_equal(data, np.stack(frames))
+    with open(tmp_path / "out.json", encoding="utf-8") as f:
+        index = json.load(f)
+    assert [frame["shape"] for frame in index["frames"]] == [[50, 80, 4]] * 5
+    assert recorder.get_stats()["record_written"] == 5
+
+
+class RecordingSink:
+    """记录 submit/publish 调用的录制器和串流区域"""
+
+    def __init__(self):
+        self.frames = []
+
+    def submit(self, frame, timestamp):
+        self.frames.append(np.array(frame))
+
+    publish = submit
+
+
+def test_outputs_follow_source_frame_changes(app):
+    from capture_backends import create_backend
+    from floating_window import FloatingWindow
+
+    backend = create_backend("synthetic", width=640, height=480, change_rate=0.0)
+    window = FloatingWindow(backend, {"x": 0, "y": 0, "width": 640, "height": 480},
+                            {"x": 0, "y": 0, "width": 64, "height": 48})
+    recorder = RecordingSink()
+    stream = RecordingSink()
+    window.recorder = recorder
+    window.stream = stream
+    try:
+        frame = np.full((480, 640, 4), 100, dtype=np.uint8)
+        assert window.show_frame(frame, time.perf_counter())
+        # 只改变一个像素：缩小到显示尺寸后看不出，但录制和串流仍收到新帧
+        frame[5, 7, 0] = 101
+        displayed = window.show_frame(frame, time.perf_counter())
+        # 未变化的帧不会输出
+        window.show_frame(frame, time.perf_counter())
+        assert len(recorder.frames) == 2
+        assert len(stream.frames) == 2
+        assert recorder.frames[1][5, 7, 0] == 101
+        assert recorder.frames[1].shape == (480, 640, 4)
+        assert isinstance(displayed, bool)
+    finally:
+        window.recorder = None
+        window.stream = None
+        window.close()
+        backend.close()
+
+
+def test_process_engine_records_source_resolution(app, tmp_path):
+    pytest.importorskip("cv2")
+    from capture_backends import create_backend
+    from capture_pool import ProcessCaptureEngine
+    from floating_window import FloatingWindow
+
+    engine = ProcessCaptureEngine("synthetic", 1, {"width": 640, "height": 480, "change_rate": 1.0})
+    backend = create_backend("synthetic", width=640, height=480)
+    window = FloatingWindow(backend, {"x": 0, "y": 0, "width": 640, "height": 480},
+                            {"x": 0, "y": 0, "width": 64, "height": 48}, engine)
+    path = tmp_path / "out.raw"
+    try:
+        window.show()
+        for _ in range(3):
+            engine.tick()
+        assert window.start_recording(str(path), "raw", queue_size=64)
+        for _ in range(10):
+            engine.tick()
+        window.stop_recording()
+        assert wait_for_recorders(5.0)
+        # 停止输出后工作进程不再交回原始帧
+        for _ in range(3):
+            engine.tick()
+    finally:
+        window.close()
+        engine.close()
+        backend.close()
+
+    with open(tmp_path / "out.json", encoding="utf-8") as f:
+        index = json.load(f)
+    # 悬浮窗显示的是缩小后的帧，录制的仍是原始分辨率
+    assert len(index["frames"]) >= 5
+    assert all(frame["shape"] == [480, 640, 4] for frame in index["frames"])
+    assert window.display_width < 640
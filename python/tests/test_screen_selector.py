@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+"""屏幕选择器测试：替换选择器后屏幕信号不再访问已销毁的对象"""
+
+import sys
+
+import pytest
+from PySide6.QtCore import QCoreApplication, QEvent
+
+from screen_selector import ScreenSelector
+
+
+@pytest.fixture
+def slot_errors(monkeypatch):
+    """收集 Qt 槽函数中抛出的异常（PySide6 交给 sys.excepthook 处理）"""
+    errors = []
+    monkeypatch.setattr(sys, "excepthook", lambda kind, value, traceback: errors.append(value))
+    return errors
+
+
+def emit_screen_signals(app):
+    screen = app.primaryScreen()
+    app.screenRemoved.emit(screen)
+    screen.geometryChanged.emit(screen.geometry())
+
+
+def test_screen_changes_update_selector(app, slot_errors):
+    selector = ScreenSelector()
+    selector.watch_screens()
+    selector.total_rect = None
+    emit_screen_signals(app)
+    assert selector.total_rect is not None
+    selector.unwatch_screens()
+    selector.total_rect = None
+    emit_screen_signals(app)
+    assert selector.total_rect is None
+    selector.deleteLater()
+    assert slot_errors == []
+
+
+def test_replaced_selectors_do_not_receive_screen_signals(app, slot_errors):
+    # 与 MainWindow.prepare_selector 相同：每次切换冻结画面都替换选择器
+    selector = None
+    for freeze in (False, True, False):
+        if selector is not None:
+            selector.unwatch_screens()
+            selector.deleteLater()
+        selector = ScreenSelector(freeze=freeze)
+        selector.watch_screens()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+    emit_screen_signals(app)
+    assert slot_errors == []
+    selector.unwatch_screens()
+    selector.deleteLater()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    emit_screen_signals(app)
+    assert slot_errors == []
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+"""串流服务测试：在 127.0.0.1 上连接 MJPEG 和 WebSocket 客户端"""
+
+import os
+import time
+import base64
+import socket
+import struct
+import hashlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from helpers import wait_until, read_exactly
+from stream_server import StreamServer, BOUNDARY, WEBSOCKET_GUID, CLOSE_PROTOCOL_ERROR, CLOSE_TOO_BIG
+
+
+@pytest.fixture
+def server():
+    server = StreamServer(port=0, max_fps=1000)
+    server.start()
+    yield server
+    server.stop()
+
+
+def publish(source, width=64, height=48, noise=False):
+    """提交一帧 BGRA 画面"""
+    if noise:
+        frame = np.frombuffer(os.urandom(width * height * 4), dtype=np.uint8).reshape(height, width, 4)
+    else:
+        frame = np.full((height, width, 4), 128, dtype=np.uint8)
+    source.publish(frame, time.perf_counter())
+
+
+def connect(server, path, headers="", rcvbuf=None):
+    """连接服务并发送 GET 请求"""
+    client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if rcvbuf:
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    client.settimeout(5.0)
+    client.connect(("127.0.0.1", server.port))
+    client.sendall(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n{headers}\r\n".encode("latin-1"))
+    return client
+
+
+def read_headers(client):
+    """读取 HTTP 响应头，返回 (状态行, 头部之后已读到的数据)"""
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = client.recv(4096)
+        assert chunk, "连接已断开"
+        data += chunk
+    head, _, rest = data.partition(b"\r\n\r\n")
+    return head.decode("latin-1").split("\r\n")[0], rest
+
+
+def read_mjpeg_frame(client, buffer):
+    """读取一帧 MJPEG，返回 (JPEG, 剩余缓冲)"""
+    while b"\r\n\r\n" not in buffer:
+        chunk = client.recv(65536)
+        assert chunk, "连接已断开"
+        buffer += chunk
+    head, _, buffer = buffer.partition(b"\r\n\r\n")
+    assert head.startswith(f"--{BOUNDARY}".encode("latin-1"))
+    length = int(head.decode("latin-1").split("Content-Length:")[1].split("\r\n")[0])
+    jpeg, buffer = read_exactly(client, length + 2, buffer)
+    return jpeg[:-2], buffer
+
+
+def read_websocket_frame(client, buffer):
+    """读取一个服务端 WebSocket 帧，返回 (opcode, 数据, 剩余缓冲)"""
+    header, buffer = read_exactly(client, 2, buffer)
+    assert not header[1] & 0x80, "服务端帧不能加掩码"
+    length = header[1] & 0x7F
+    if length == 126:
+        extended, buffer = read_exactly(client, 2, buffer)
+        length = struct.unpack(">H", extended)[0]
+    elif length == 127:
+        extended, buffer = read_exactly(client, 8, buffer)
+        length = struct.unpack(">Q", extended)[0]
+    payload, buffer = read_exactly(client, length, buffer)
+    return header[0] & 0x0F, payload, buffer
+
+
+def client_frame(opcode, payload, masked=True):
+    """生成客户端 WebSocket 帧"""
+    mask = b"\x01\x02\x03\x04"
+    header = struct.pack(">BB", 0x80 | opcode, (0x80 if masked else 0) | len(payload))
+    if not masked:
+        return header + payload
+    return header + mask + bytes(byte ^ mask[index % 4] for index, byte in enumerate(payload))
+
+
+def websocket_connect(server, name):
+    """完成 WebSocket 握手，返回 (连接, 状态行, Sec-WebSocket-Accept 是否正确, 剩余缓冲)"""
+    key = base64.b64encode(os.urandom(16)).decode()
+    client = connect(server, f"/ws/{name}", "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                                             f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n")
+    data = b""
+    while b"\r\n\r\n" not in data:
+        data += client.recv(4096)
+    head, _, rest = data.partition(b"\r\n\r\n")
+    expected = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("latin-1")).digest()).decode()
+    text = head.decode("latin-1")
+    return client, text.split("\r\n")[0], f"Sec-WebSocket-Accept: {expected}" in text, rest
+
+
+def test_mjpeg_client_receives_frames(server):
+    source = server.add_source("a")
+    client = connect(server, "/stream/a")
+    status, buffer = read_headers(client)
+    assert status == "HTTP/1.1 200 OK"
+    wait_until(lambda: source.clients == 1)
+    publish(source)
+    jpeg, buffer = read_mjpeg_frame(client, buffer)
+    assert jpeg[:2] == b"\xff\xd8"
+    publish(source)
+    jpeg, buffer = read_mjpeg_frame(client, buffer)
+    assert jpeg[:2] == b"\xff\xd8"
+    client.close()
+    wait_until(lambda: source.clients == 0)
+    assert source.sent >= 2
+
+
+def test_websocket_handshake_and_frames(server):
+    source = server.add_source("a")
+    client, status, accepted, buffer = websocket_connect(server, "a")
+    assert status == "HTTP/1.1 101 Switching Protocols"
+    assert accepted
+    wait_until(lambda: source.clients == 1)
+    publish(source)
+    opcode, payload, buffer = read_websocket_frame(client, buffer)
+    assert opcode == 0x2
+    assert payload[:2] == b"\xff\xd8"
+
+    # ping 得到相同内容的 pong
+    client.sendall(client_frame(0x9, b"hello"))
+    opcode, payload, buffer = read_websocket_frame(client, buffer)
+    while opcode == 0x2:
+        opcode, payload, buffer = read_websocket_frame(client, buffer)
+    assert (opcode, payload) == (0xA, b"hello")
+
+    client.sendall(client_frame(0x8, b""))
+    opcode, _, buffer = read_websocket_frame(client, buffer)
+    assert opcode == 0x8
+    wait_until(lambda: source.clients == 0)
+    client.close()
+
+
+@pytest.mark.parametrize("frame, code", [
+    (client_frame(0x9, b"ping", masked=False), CLOSE_PROTOCOL_ERROR),
+    (struct.pack(">BBQ", 0x82, 0x80 | 127, 1 << 40) + b"\x00" * 4, CLOSE_TOO_BIG),
+    (struct.pack(">BBH", 0x89, 0x80 | 126, 200) + b"\x00" * 4, CLOSE_PROTOCOL_ERROR),
+])
+def test_websocket_rejects_invalid_client_frames(server, frame, code):
+    source = server.add_source("a")
+    client, status, _, buffer = websocket_connect(server, "a")
+    assert status == "HTTP/1.1 101 Switching Protocols"
+    wait_until(lambda: source.clients == 1)
+    client.sendall(frame)
+    opcode, payload, buffer = read_websocket_frame(client, buffer)
+    assert opcode == 0x8
+    assert struct.unpack(">H", payload)[0] == code
+    wait_until(lambda: source.clients == 0)
+    client.close()
+
+
+def test_slow_client_drops_frames_without_blocking_fast_client(server):
+    source = server.add_source("a")
+    slow = connect(server, "/stream/a", rcvbuf=1 << 14)
+    _, slow_buffer = read_headers(slow)
+    fast = connect(server, "/stream/a")
+    _, fast_buffer = read_headers(fast)
+    wait_until(lambda: source.clients == 2)
+
+    # 不可压缩的大帧：慢客户端不读取，发送缓冲区很快填满
+    received = 0
+    for _ in range(12):
+        publish(source, 640, 480, noise=True)
+        _, fast_buffer = read_mjpeg_frame(fast, fast_buffer)
+        received += 1
+    assert received == 12
+
+    # 慢客户端恢复读取后只收到最新的帧，中间的帧被丢弃
+    frames = 0
+    slow.settimeout(1.0)
+    try:
+        while True:
+            _, slow_buffer = read_mjpeg_frame(slow, slow_buffer)
+            frames += 1
+    except socket.timeout:
+        pass
+    assert 1 <= frames < 12
+    assert source.dropped > 0
+    slow.close()
+    fast.close()
+
+
+def test_remove_source_disconnects_clients(server):
+    source = server.add_source("a")
+    mjpeg = connect(server, "/stream/a")
+    read_headers(mjpeg)
+    websocket, _, _, buffer = websocket_connect(server, "a")
+    wait_until(lambda: source.clients == 2)
+
+    server.remove_source("a")
+    wait_until(lambda: source.clients == 0)
+    # MJPEG 连接被关闭，WebSocket 收到关闭帧
+    assert mjpeg.recv(4096) == b""
+    opcode, _, _ = read_websocket_frame(websocket, buffer)
+    assert opcode == 0x8
+    mjpeg.close()
+    websocket.close()
+
+    # 已移除的区域返回 404
+    client = connect(server, "/stream/a")
+    status, _ = read_headers(client)
+    assert status == "HTTP/1.1 404 Not Found"
+    client.close()
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""区域监视测试：在合成后端上检查阈值、冷却时间、两种变化程度和移除后的行号"""
+
+import json
+
+import pytest
+
+from capture_backends import create_backend
+from watch import RegionWatcher, load_watches
+
+
+@pytest.fixture
+def backend():
+    backend = create_backend("synthetic", width=320, height=120, change_rate=0.0)
+    backend.desktop[:, :, :3] = 0
+    yield backend
+    backend.close()
+
+
+def region(x, size=32):
+    return {"x": x, "y": 0, "width": size, "height": size}
+
+
+def paint(backend, x, value, size=32):
+    """把区域涂成纯色"""
+    backend.desktop[0:size, x:x + size, :3] = value
+
+
+def step(watcher):
+    """立即执行一次监视，忽略帧率限制"""
+    watcher.next_due = 0.0
+    watcher.step()
+
+
+def test_threshold_and_cooldown(backend):
+    events = []
+    watcher = RegionWatcher(backend, sample_size=8, supersample=2)
+    first = watcher.add(region(0), name="a", callback=events.append)
+    second = watcher.add(region(100), name="b", callback=events.append, cooldown=60.0)
+    step(watcher)
+    assert events == []
+
+    # 低于阈值的变化只更新变化程度
+    backend.desktop[3, 5, :3] = 255
+    step(watcher)
+    assert events == []
+    score = watcher.list_watches()[0]["score"]
+    assert 0.0 < score < 0.02
+
+    paint(backend, 0, 200)
+    step(watcher)
+    assert [event["name"] for event in events] == ["a"]
+    assert events[0]["score"] >= events[0]["threshold"]
+    assert events[0]["thumbnail"].shape == (8, 8)
+
+    # 触发后以当前画面为新的基准，同一次变化只触发一次
+    step(watcher)
+    assert len(events) == 1
+
+    # 冷却时间内的变化不触发
+    paint(backend, 100, 200)
+    step(watcher)
+    paint(backend, 100, 50)
+    step(watcher)
+    assert [event["name"] for event in events] == ["a", "b"]
+    assert {watch["id"]: watch["count"] for watch in watcher.list_watches()} == {first: 1, second: 1}
+    assert watcher.get_stats()["watch_events"] == 2
+    watcher.close()
+    assert not watcher.has_watches()
+
+
+def test_mad_and_hash_scores(backend):
+    watcher = RegionWatcher(backend, sample_size=8, supersample=2)
+    watcher.add(region(0), method="mad")
+    backend.desktop[0:32, 0:16, :3] = 50
+    backend.desktop[0:32, 16:32, :3] = 150
+    step(watcher)
+
+    # 整体变亮：平均绝对差反映亮度变化，平均哈希不变
+    backend.desktop[0:32, 0:32, :3] += 40
+    watcher.broker.tick()
+    scores, _ = watcher.score()
+    assert scores["mad"][0] == pytest.approx(40 / 255, abs=0.01)
+    assert scores["hash"][0] == 0.0
+
+    # 与基准画面左右互换：两种方法都反映图案变化
+    backend.desktop[0:32, 0:16, :3] = 150
+    backend.desktop[0:32, 16:32, :3] = 50
+    watcher.broker.tick()
+    scores, _ = watcher.score()
+    assert scores["mad"][0] == pytest.approx(100 / 255, abs=0.01)
+    assert scores["hash"][0] == 1.0
+
+
+def test_remove_reindexes_remaining_rows(backend):
+    events = []
+    watcher = RegionWatcher(backend, sample_size=8, supersample=2)
+    for index, x in enumerate((0, 100, 200)):
+        paint(backend, x, 60 * (index + 1))
+    ids = [watcher.add(region(x), name=name, callback=events.append)
+           for x, name in ((0, "a"), (100, "b"), (200, "c"))]
+    step(watcher)
+
+    watcher.remove(ids[1])
+    assert [watcher.watches[watch_id]["row"] for watch_id in (ids[0], ids[2])] == [0, 1]
+    assert len(watcher.pixels) == len(watcher.references) == len(watcher.primed) == 2
+    # 剩余监视项的基准画面随行一起移动
+    assert watcher.references[1].mean() == pytest.approx(180, abs=1)
+
+    # 未变化的区域不触发，变化的区域按自己的行比较
+    step(watcher)
+    assert events == []
+    paint(backend, 200, 0)
+    step(watcher)
+    assert [event["name"] for event in events] == ["c"]
+
+    # 新增的监视项使用下一行
+    added = watcher.add(region(100), name="d")
+    assert watcher.watches[added]["row"] == 2
+    assert len(watcher.primed) == 3
+    watcher.remove(ids[0])
+    assert [watcher.watches[watch_id]["row"] for watch_id in (ids[2], added)] == [0, 1]
+    watcher.close()
+
+
+def test_unknown_method_is_rejected(backend):
+    watcher = RegionWatcher(backend)
+    with pytest.raises(ValueError):
+        watcher.add(region(0), method="ssim")
+    assert not watcher.has_watches()
+
+
+def test_load_watches_skips_invalid_entries(tmp_path, capsys):
+    path = tmp_path / "config.json"
+    assert load_watches(str(path)) == []
+
+    path.write_text(json.dumps({"watches": [
+        {"x": 1, "y": 2, "width": 30, "height": 40, "name": "灯", "method": "hash", "cooldown": 5},
+        {"x": 1, "y": 2, "width": 30},
+        {"x": "left", "y": 2, "width": 30, "height": 40},
+        None,
+        {"x": "3", "y": 4, "width": 5, "height": 6}
+    ]}), encoding="utf-8")
+    watches = load_watches(str(path))
+    assert watches == [
+        {"region": {"x": 1, "y": 2, "width": 30, "height": 40}, "name": "灯", "threshold": None,
+         "method": "hash", "command": None, "notify": True, "cooldown": 5},
+        {"region": {"x": 3, "y": 4, "width": 5, "height": 6}, "name": None, "threshold": None,
+         "method": "mad", "command": None, "notify": True, "cooldown": 0.0}
+    ]
+    assert capsys.readouterr().out.count("忽略无效的监视配置") == 3
+
+    path.write_text("{", encoding="utf-8")
+    assert load_watches(str(path)) == []
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""窗口跟随测试：用 fake 跟踪器模拟目标窗口的移动、关闭和句柄重用"""
+
+import pytest
+
+from window_tracker import FakeWindowTracker, WindowAnchors, create_window_tracker, make_anchor, resolve_anchor
+
+
+class RecordingBroker:
+    """只记录 update_region 调用的捕获调度器"""
+
+    def __init__(self):
+        self.regions = {}
+
+    def update_region(self, token, region):
+        self.regions[token] = dict(region)
+
+
+@pytest.fixture
+def tracker():
+    # poll_interval 为 0：每次 update 都刷新全部窗口
+    return FakeWindowTracker(poll_interval=0.0, notified_poll_interval=0.0)
+
+
+def anchored(tracker, rect=(100, 100, 400, 300), region_offset=(20, 30)):
+    """添加目标窗口并把一个 50x40 的区域锚定到它"""
+    hwnd = tracker.add_window(rect, title="编辑器", process_id=42)
+    region = {"x": rect[0] + region_offset[0], "y": rect[1] + region_offset[1], "width": 50, "height": 40}
+    target = tracker.find_window(region["x"], region["y"])
+    assert target["hwnd"] == hwnd
+    broker = RecordingBroker()
+    anchors = WindowAnchors(tracker, broker)
+    anchors.add(1, make_anchor(target, region), region)
+    return hwnd, anchors, broker
+
+
+def test_create_fake_tracker():
+    assert isinstance(create_window_tracker("fake"), FakeWindowTracker)
+    with pytest.raises(ValueError):
+        create_window_tracker("missing")
+
+
+def test_region_follows_moved_window(tracker):
+    hwnd, anchors, broker = anchored(tracker)
+    tracker.move_window(hwnd, 500, 200)
+    anchors.update()
+    assert broker.regions[1] == {"x": 520, "y": 230, "width": 50, "height": 40}
+    assert anchors.region(1) == broker.regions[1]
+
+    # 改变大小不影响相对左上角的偏移和区域尺寸
+    tracker.move_window(hwnd, 10, 20, 800, 600)
+    anchors.update()
+    assert broker.regions[1] == {"x": 30, "y": 50, "width": 50, "height": 40}
+
+
+def test_region_stays_when_window_closed(tracker):
+    hwnd, anchors, broker = anchored(tracker)
+    tracker.move_window(hwnd, 500, 200)
+    anchors.update()
+    tracker.close_window(hwnd)
+    anchors.update()
+    assert anchors.region(1)["x"] == 520
+    assert anchors.get_stats()["anchor_lost"] == 1
+    anchors.remove(1)
+    assert not anchors.has_anchors()
+    assert tracker.geometry(hwnd) is None
+
+
+def test_resolve_anchor_keeps_matching_window(tracker):
+    hwnd = tracker.add_window((0, 0, 100, 100), title="编辑器", process_id=42)
+    anchor = make_anchor(tracker.find_window(10, 10), {"x": 5, "y": 5, "width": 10, "height": 10})
+    assert resolve_anchor(tracker, anchor) is anchor
+    assert anchor["hwnd"] == hwnd
+
+
+def test_resolve_anchor_refinds_window_for_stale_hwnd(tracker):
+    old = tracker.add_window((0, 0, 100, 100), title="编辑器", process_id=42)
+    anchor = make_anchor(tracker.find_window(10, 10), {"x": 5, "y": 5, "width": 10, "height": 10})
+    tracker.close_window(old)
+    # 模拟句柄被其他程序的窗口重用，目标程序重启后以新句柄、新进程打开
+    tracker.fake_windows[old] = {"rect": (0, 0, 50, 50), "title": "其他程序", "process_id": 7}
+    new = tracker.add_window((300, 300, 100, 100), title="编辑器", process_id=43)
+
+    resolved = resolve_anchor(tracker, anchor)
+    assert resolved["hwnd"] == new
+    assert resolved["process_id"] == 43
+    assert (resolved["relative_x"], resolved["relative_y"]) == (5, 5)
+    # 原锚定信息不变
+    assert anchor["hwnd"] == old
+
+    # 重新锚定后跟随新窗口
+    broker = RecordingBroker()
+    anchors = WindowAnchors(tracker, broker)
+    anchors.add(1, resolved, {"x": 5, "y": 5, "width": 10, "height": 10})
+    assert broker.regions[1]["x"] == 305
+
+
+def test_resolve_anchor_prefers_same_process(tracker):
+    anchor = {"hwnd": 0x9999, "title": "编辑器", "process_id": 42, "relative_x": 0, "relative_y": 0}
+    tracker.add_window((0, 0, 100, 100), title="编辑器", process_id=43)
+    same_process = tracker.add_window((0, 0, 100, 100), title="编辑器", process_id=42)
+    tracker.add_window((0, 0, 100, 100), title="编辑器", process_id=44)
+    assert resolve_anchor(tracker, anchor)["hwnd"] == same_process
+
+
+def test_resolve_anchor_drops_missing_window(tracker):
+    old = tracker.add_window((0, 0, 100, 100), title="编辑器", process_id=42)
+    anchor = make_anchor(tracker.find_window(10, 10), {"x": 5, "y": 5, "width": 10, "height": 10})
+    tracker.close_window(old)
+    assert resolve_anchor(tracker, anchor) is None
+    # 句柄被无关窗口重用时同样取消锚定
+    tracker.fake_windows[old] = {"rect": (0, 0, 50, 50), "title": "其他程序", "process_id": 7}
+    assert resolve_anchor(tracker, anchor) is None
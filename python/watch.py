@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 区域监视模块
+以较低帧率监视大量区域（状态灯、队列计数、进度条等），画面变化超过阈值时触发动作。
+
+所有区域通过同一个捕获调度器批量截图，每个区域只取样为很小的灰度缩略图，
+之后在一次向量化计算中得到所有区域相对基准画面的变化程度：
+- mad：平均绝对差（0-1），对颜色和亮度变化敏感，适合状态灯和进度条
+- hash：平均哈希中不同位的比例（0-1），忽略整体亮度和噪声，适合文字和图标
+
+变化超过阈值时调用 Python 回调、执行 shell 命令或交给通知函数（如托盘消息），
+并以当前画面作为新的基准，因此每次变化只触发一次。
+
+本模块不依赖 Qt，由 CaptureWorker 线程循环调用 step
+"""
+
+import os
+import json
+import time
+import threading
+import subprocess
+
+import numpy as np
+
+from capture_broker import CaptureBroker
+from stats import LatencyHistogram
+
+# 变化程度的计算方法及默认阈值
+METHODS = {"mad": 0.02, "hash": 0.1}
+
+# 灰度转换权重（B, G, R）
+GRAY_WEIGHTS = (np.float32(0.114), np.float32(0.587), np.float32(0.299))
+
+
+class RegionWatcher:
+    def __init__(self, capture, fps=2.0, sample_size=16, supersample=4, notifier=None, grab_lock=None):
+        """初始化区域监视器
+
+        Args:
+            capture: 捕获对象，监视器在 CaptureWorker 线程中使用，可与悬浮窗共用同一个后端实例
+            fps: 监视帧率
+            sample_size: 缩略图边长，所有区域缩小为 sample_size x sample_size 的灰度图比较
+            supersample: 每个缩略图像素由 supersample x supersample 个取样点平均得到，
+                细小的变化（如一位数字）也会反映到缩略图中
+            notifier: 通知函数 notifier(event)，用于 notify 为 True 的监视，在监视线程中调用
+            grab_lock: 截图锁，与其他线程共用捕获后端时传入对方调度器的 grab_lock
+        """
+        self.broker = CaptureBroker(capture, grab_lock=grab_lock)
+        self.interval = 1.0 / fps
+        self.sample_size = sample_size
+        self.supersample = supersample
+        self.notifier = notifier
+        self.lock = threading.Lock()
+        self.next_id = 1
+        self.next_due = 0.0
+
+        # 监视项：watch_id -> dict，row 为在取样数组中的行号
+        self.watches = {}
+        # 各监视项的取样（每个 BGRA 像素按 uint32 保存）、基准灰度缩略图和是否已有基准，
+        # 行号与 watches 中的 row 对应
+        points = sample_size * supersample
+        self.pixels = np.zeros((0, points, points), dtype=np.uint32)
+        self.references = np.zeros((0, sample_size, sample_size), dtype=np.float32)
+        self.primed = np.zeros(0, dtype=bool)
+
+        # 统计信息
+        self.tick_latency = LatencyHistogram()
+        self.ticks = 0
+        self.events = 0
+
+    def add(self, region, name=None, threshold=None, method="mad", callback=None, command=None,
+            notify=False, cooldown=0.0):
+        """添加监视区域
+
+        Args:
+            region: 区域信息，包含 x, y, width, height（物理像素）
+            name: 名称，用于通知和 shell 命令
+            threshold: 变化阈值（0-1），为 None 时使用该方法的默认阈值
+            method: 变化程度的计算方法，见 METHODS
+            callback: 回调函数 callback(event)，在监视线程中调用
+            command: 变化时执行的 shell 命令，事件信息通过 LC_WATCH_* 环境变量传入
+            notify: 是否交给 notifier 显示通知
+            cooldown: 两次触发之间的最短间隔（秒）
+
+        Returns:
+            int: 监视ID
+
+        Raises:
+            ValueError: 未知的计算方法
+        """
+        if method not in METHODS:
+            raise ValueError(f"未知的变化计算方法: {method}，可用方法: {', '.join(sorted(METHODS))}")
+        points = self.sample_size * self.supersample
+        watch = {
+            "name": name or f"区域 {self.next_id}",
+            "region": region,
+            "threshold": METHODS[method] if threshold is None else threshold,
+            "method": method,
+            "callback": callback,
+            "command": command,
+            "notify": notify,
+            "cooldown": cooldown,
+            # 取样点位于各子格的中心
+            "rows": ((np.arange(points) + 0.5) * region["height"] / points).astype(np.intp),
+            "columns": ((np.arange(points) + 0.5) * region["width"] / points).astype(np.intp),
+            "score": 0.0,
+            "count": 0,
+            "last_event": None,
+            "process": None
+        }
+        with self.lock:
+            watch_id = self.next_id
+            self.next_id += 1
+            watch["id"] = watch_id
+            watch["row"] = len(self.watches)
+            watch["token"] = self.broker.register(region, self.make_sampler(watch), 1, 1)
+            self.watches[watch_id] = watch
+            self.pixels = np.concatenate([self.pixels, np.zeros((1,) + self.pixels.shape[1:], np.uint32)])
+            self.references = np.concatenate([self.references,
+                                              np.zeros((1,) + self.references.shape[1:], np.float32)])
+            self.primed = np.append(self.primed, False)
+        return watch_id
+
+    def remove(self, watch_id):
+        """移除监视区域"""
+        with self.lock:
+            watch = self.watches.pop(watch_id, None)
+            if watch is None:
+                return
+            self.broker.unregister(watch["token"])
+            keep = [row for row in range(len(self.primed)) if row != watch["row"]]
+            self.pixels = self.pixels[keep]
+            self.references = self.references[keep]
+            self.primed = self.primed[keep]
+            for other in self.watches.values():
+                if other["row"] > watch["row"]:
+                    other["row"] -= 1
+
+    def make_sampler(self, watch):
+        """生成捕获回调：把区域画面取样到该监视项的行中"""
+        def sample(frame, timestamp):
+            # 按 uint32 解释 BGRA 像素，先取行、再取列，直接写入取样数组
+            pixels = np.ascontiguousarray(frame).view(np.uint32)[:, :, 0]
+            np.take(np.take(pixels, watch["rows"], axis=0), watch["columns"], axis=1,
+                    out=self.pixels[watch["row"]])
+            return True
+        return sample
+
+    def has_watches(self):
+        """是否有监视区域"""
+        return bool(self.watches)
+
+    def step(self):
+        """执行一次监视：批量截图、向量化比较并触发动作（由 CaptureWorker 调用）
+
+        Returns:
+            float: 距离下次监视的秒数，没有监视区域时返回 None
+        """
+        now = time.perf_counter()
+        if not self.watches:
+            return None
+        if now < self.next_due:
+            return self.next_due - now
+
+        events = []
+        with self.lock:
+            self.broker.tick()
+            scores, gray = self.score()
+            wall_time = time.time()
+            for watch in self.watches.values():
+                row = watch["row"]
+                if not self.primed[row]:
+                    # 第一帧作为基准
+                    self.references[row] = gray[row]
+                    self.primed[row] = True
+                    continue
+                watch["score"] = float(scores[watch["method"]][row])
+                if watch["score"] < watch["threshold"]:
+                    continue
+                if watch["last_event"] is not None and now - watch["last_event"] < watch["cooldown"]:
+                    continue
+                # 以当前画面作为新的基准，同一次变化只触发一次
+                self.references[row] = gray[row]
+                watch["last_event"] = now
+                watch["count"] += 1
+                events.append((watch, {
+                    "id": watch["id"],
+                    "name": watch["name"],
+                    "region": watch["region"],
+                    "score": watch["score"],
+                    "threshold": watch["threshold"],
+                    "method": watch["method"],
+                    "count": watch["count"],
+                    "time": wall_time,
+                    "thumbnail": gray[row].copy()
+                }))
+        self.ticks += 1
+        self.events += len(events)
+
+        for watch, event in events:
+            self.dispatch(watch, event)
+
+        elapsed = time.perf_counter() - now
+        self.tick_latency.record(elapsed)
+        self.next_due = max(self.next_due + self.interval, now)
+        return max(0.0, self.next_due - time.perf_counter())
+
+    def score(self):
+        """在一次向量化计算中得到所有区域的变化程度
+
+        Returns:
+            tuple: ({方法: 各行的变化程度数组}, 各行当前的灰度缩略图)
+        """
+        count = len(self.primed)
+        size, factor = self.sample_size, self.supersample
+        channels = self.pixels.view(np.uint8).reshape(self.pixels.shape + (4,))
+        blue, green, red = GRAY_WEIGHTS
+        gray = channels[..., 0] * blue + channels[..., 1] * green + channels[..., 2] * red
+        # 每 supersample x supersample 个取样点平均为缩略图的一个像素
+        gray = gray.reshape(count, size, factor, size, factor).sum(axis=4).sum(axis=2) / (factor * factor)
+        mad = np.abs(gray - self.references).mean(axis=(1, 2)) / 255.0
+        bits = gray > gray.mean(axis=(1, 2), keepdims=True)
+        reference_bits = self.references > self.references.mean(axis=(1, 2), keepdims=True)
+        hashed = (bits != reference_bits).mean(axis=(1, 2))
+        return {"mad": mad, "hash": hashed}, gray
+
+    def dispatch(self, watch, event):
+        """执行监视项的动作"""
+        if watch["callback"] is not None:
+            try:
+                watch["callback"](event)
+            except Exception as e:
+                print(f"监视回调错误: {str(e)}")
+
+        if watch["command"]:
+            process = watch["process"]
+            if process is not None and process.poll() is None:
+                # 上一次的命令还在运行，不重复启动
+                print(f"监视命令仍在运行，跳过: {watch['name']}")
+            else:
+                region = watch["region"]
+                env = dict(os.environ,
+                           LC_WATCH_NAME=watch["name"],
+                           LC_WATCH_SCORE=f"{event['score']:.4f}",
+                           LC_WATCH_COUNT=str(event["count"]),
+                           LC_WATCH_REGION=f"{region['x']},{region['y']},{region['width']},{region['height']}")
+                try:
+                    watch["process"] = subprocess.Popen(watch["command"], shell=True, env=env)
+                except OSError as e:
+                    print(f"执行监视命令错误: {str(e)}")
+
+        if watch["notify"] and self.notifier is not None:
+            try:
+                self.notifier(event)
+            except Exception as e:
+                print(f"监视通知错误: {str(e)}")
+
+    def list_watches(self):
+        """所有监视项的当前状态
+
+        Returns:
+            list: 每项包含 id, name, region, method, threshold, score, count
+        """
+        with self.lock:
+            return [{key: watch[key] for key in ("id", "name", "region", "method", "threshold", "score", "count")}
+                    for watch in self.watches.values()]
+
+    def close(self):
+        """移除所有监视区域"""
+        for watch_id in list(self.watches):
+            self.remove(watch_id)
+
+    def get_stats(self):
+        """获取监视统计
+
+        Returns:
+            dict: 包含 watch_regions, watch_ticks, watch_events, watch_fps（设定帧率）
+                和 watch_tick（单次监视耗时的直方图摘要）
+        """
+        return {
+            "watch_regions": len(self.watches),
+            "watch_ticks": self.ticks,
+            "watch_events": self.events,
+            "watch_fps": 1.0 / self.interval,
+            "watch_tick": self.tick_latency.snapshot()
+        }
+
+
+def load_watches(path):
+    """读取配置文件中的 watches 列表
+
+    每项包含 x, y, width, height（物理像素），可选 name, threshold, method, command, notify, cooldown
+
+    Returns:
+        list: RegionWatcher.add 的关键字参数列表，文件或字段不存在时为空列表
+    """
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, encoding="utf-8") as f:
+            items = json.load(f).get("watches") or []
+    except (OSError, ValueError) as e:
+        print(f"读取监视配置错误: {str(e)}")
+        return []
+    result = []
+    for item in items:
+        try:
+            result.append({
+                "region": {key: int(item[key]) for key in ("x", "y", "width", "height")},
+                "name": item.get("name"),
+                "threshold": item.get("threshold"),
+                "method": item.get("method", "mad"),
+                "command": item.get("command"),
+                "notify": item.get("notify", True),
+                "cooldown": item.get("cooldown", 0.0)
+            })
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"忽略无效的监视配置: {item} ({str(e)})")
+    return result
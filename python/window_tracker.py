@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LandscapeCutter 窗口跟随模块
+让区域锚定到目标窗口：目标窗口移动或改变大小时，区域按相对窗口左上角的偏移随之移动。
+
+目标窗口的位置缓存在窗口跟踪器中，捕获线程每次调度时只读取缓存，不逐帧查询系统：
+- 收到移动/缩放通知的窗口在下一次调度时单独刷新
+- 所有被跟踪的窗口按轮询间隔批量刷新一次；通知可用时轮询间隔放宽，仅用于兜底
+
+可替换的跟踪器后端：
+- windows：GetWindowRect 查询位置，SetWinEventHook（EVENT_OBJECT_LOCATIONCHANGE）接收移动通知
+- fake：在内存中模拟窗口，由 add_window、move_window 等方法操作，用于测试、基准测试和非 Windows 平台
+"""
+
+import sys
+import time
+import ctypes
+import threading
+import importlib
+
+from stats import LatencyHistogram
+
+# Windows API常量
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+DWMWA_CLOAKED = 14
+
+
+class WindowTracker:
+    """窗口跟踪器基类
+
+    子类实现 query_rect、window_info、find_window 和 list_windows，支持移动通知的子类实现 watch 和 unwatch，
+    收到通知时调用 notify。track、untrack 和 watch 在 GUI 线程中调用，refresh 在捕获线程中调用
+    """
+
+    # 后端名称
+    name = ""
+
+    def __init__(self, poll_interval=0.1, notified_poll_interval=1.0):
+        """初始化窗口跟踪器
+
+        Args:
+            poll_interval: 没有移动通知时批量刷新所有窗口位置的间隔（秒）
+            notified_poll_interval: 所有窗口都有移动通知时的兜底刷新间隔（秒）
+        """
+        self.poll_interval = poll_interval
+        self.notified_poll_interval = notified_poll_interval
+        self.lock = threading.Lock()
+        # 被跟踪的窗口：hwnd -> {"rect", "refs", "dirty", "notified"}
+        self.windows = {}
+        self.next_poll = 0.0
+
+        # 统计信息
+        self.refresh_latency = LatencyHistogram()
+        self.polls = 0
+        self.queries = 0
+        self.notifications = 0
+        self.moves = 0
+
+    def query_rect(self, hwnd):
+        """向系统查询窗口位置
+
+        Args:
+            hwnd: 窗口句柄
+
+        Returns:
+            tuple: (x, y, width, height)（物理像素），窗口已关闭或最小化时返回 None
+        """
+        raise NotImplementedError
+
+    def window_info(self, hwnd):
+        """窗口标题和进程ID
+
+        Returns:
+            tuple: (title, process_id)，窗口不存在时返回 None
+        """
+        raise NotImplementedError
+
+    def list_windows(self):
+        """列出所有可见顶层窗口（按 Z 序从上到下，包括最小化的窗口）
+
+        Returns:
+            list: 与 find_window 相同的 dict，最小化窗口的 rect 为 None
+        """
+        raise NotImplementedError
+
+    def find_window(self, x, y, exclude=()):
+        """查找某点下最上层的可见顶层窗口
+
+        Args:
+            x: 屏幕坐标（物理像素）
+            y: 屏幕坐标（物理像素）
+            exclude: 忽略的窗口句柄（如本程序的悬浮窗）
+
+        Returns:
+            dict: 包含 hwnd, title, process_id, rect，找不到时返回 None
+        """
+        raise NotImplementedError
+
+    def watch(self, hwnd):
+        """开始接收窗口的移动通知
+
+        Returns:
+            bool: 是否支持通知，不支持时只依靠轮询
+        """
+        return False
+
+    def unwatch(self, hwnd):
+        """停止接收窗口的移动通知"""
+        pass
+
+    def track(self, hwnd):
+        """开始跟踪窗口（可重复调用，与 untrack 成对）
+
+        Returns:
+            tuple: 窗口当前位置，窗口不存在时返回 None
+        """
+        with self.lock:
+            window = self.windows.get(hwnd)
+            if window is not None:
+                window["refs"] += 1
+                return window["rect"]
+        rect = self.query_rect(hwnd)
+        notified = self.watch(hwnd)
+        with self.lock:
+            self.windows[hwnd] = {"rect": rect, "refs": 1, "dirty": False, "notified": notified}
+        return rect
+
+    def untrack(self, hwnd):
+        """停止跟踪窗口"""
+        with self.lock:
+            window = self.windows.get(hwnd)
+            if window is None:
+                return
+            window["refs"] -= 1
+            if window["refs"] > 0:
+                return
+            del self.windows[hwnd]
+        if window["notified"]:
+            self.unwatch(hwnd)
+
+    def geometry(self, hwnd):
+        """窗口的缓存位置，不查询系统"""
+        window = self.windows.get(hwnd)
+        return window["rect"] if window is not None else None
+
+    def notify(self, hwnd):
+        """标记窗口位置已变化，下次 refresh 时刷新（可在任意线程中调用）"""
+        window = self.windows.get(hwnd)
+        if window is not None:
+            window["dirty"] = True
+            self.notifications += 1
+
+    def refresh(self, now=None):
+        """刷新收到通知的窗口，到达轮询间隔时刷新所有窗口
+
+        Args:
+            now: 当前时间（time.perf_counter），默认取当前时间
+
+        Returns:
+            dict: 位置发生变化的窗口 hwnd -> 新位置（窗口关闭或最小化时为 None）
+        """
+        start = time.perf_counter()
+        now = start if now is None else now
+        with self.lock:
+            if not self.windows:
+                return {}
+            if now >= self.next_poll:
+                targets = list(self.windows)
+                notified = all(window["notified"] for window in self.windows.values())
+                self.next_poll = now + (self.notified_poll_interval if notified else self.poll_interval)
+                self.polls += 1
+            else:
+                targets = [hwnd for hwnd, window in self.windows.items() if window["dirty"]]
+            if not targets:
+                return {}
+            for hwnd in targets:
+                self.windows[hwnd]["dirty"] = False
+
+        # 查询系统时不持有锁
+        rects = {hwnd: self.query_rect(hwnd) for hwnd in targets}
+        changed = {}
+        with self.lock:
+            self.queries += len(targets)
+            for hwnd, rect in rects.items():
+                window = self.windows.get(hwnd)
+                if window is not None and window["rect"] != rect:
+                    window["rect"] = rect
+                    changed[hwnd] = rect
+            self.moves += len(changed)
+        self.refresh_latency.record(time.perf_counter() - start)
+        return changed
+
+    def get_stats(self):
+        """获取跟踪统计
+
+        Returns:
+            dict: 包含 track_windows, track_notified（有移动通知的窗口数）, track_polls,
+                track_queries, track_notifications, track_moves 和 track_refresh（刷新耗时的直方图摘要）
+        """
+        with self.lock:
+            notified = sum(1 for window in self.windows.values() if window["notified"])
+            count = len(self.windows)
+        return {
+            "track_backend": self.name,
+            "track_windows": count,
+            "track_notified": notified,
+            "track_polls": self.polls,
+            "track_queries": self.queries,
+            "track_notifications": self.notifications,
+            "track_moves": self.moves,
+            "track_refresh": self.refresh_latency.snapshot()
+        }
+
+    def close(self):
+        """停止跟踪所有窗口"""
+        with self.lock:
+            windows = dict(self.windows)
+            self.windows.clear()
+        for hwnd, window in windows.items():
+            if window["notified"]:
+                self.unwatch(hwnd)
+
+
+class FakeWindowTracker(WindowTracker):
+    name = "fake"
+
+    def __init__(self, poll_interval=0.1, notified_poll_interval=1.0, notifications=True):
+        """初始化模拟窗口跟踪器
+
+        Args:
+            notifications: 是否模拟移动通知，为 False 时只依靠轮询
+        """
+        super().__init__(poll_interval, notified_poll_interval)
+        self.notifications_enabled = notifications
+        # 模拟的窗口：hwnd -> {"rect", "title", "process_id"}，后添加的窗口在上层
+        self.fake_windows = {}
+        self.next_hwnd = 0x1000
+
+    def add_window(self, rect, title="", process_id=0):
+        """添加模拟窗口
+
+        Args:
+            rect: (x, y, width, height)
+
+        Returns:
+            int: 窗口句柄
+        """
+        hwnd = self.next_hwnd
+        self.next_hwnd += 1
+        self.fake_windows[hwnd] = {"rect": tuple(rect), "title": title, "process_id": process_id}
+        return hwnd
+
+    def move_window(self, hwnd, x, y, width=None, height=None):
+        """移动模拟窗口或改变其大小，启用通知时通知跟踪器"""
+        window = self.fake_windows[hwnd]
+        _, _, old_width, old_height = window["rect"]
+        window["rect"] = (x, y, old_width if width is None else width, old_height if height is None else height)
+        if self.notifications_enabled:
+            self.notify(hwnd)
+
+    def close_window(self, hwnd):
+        """关闭模拟窗口"""
+        self.fake_windows.pop(hwnd, None)
+        if self.notifications_enabled:
+            self.notify(hwnd)
+
+    def query_rect(self, hwnd):
+        window = self.fake_windows.get(hwnd)
+        return window["rect"] if window is not None else None
+
+    def window_info(self, hwnd):
+        window = self.fake_windows.get(hwnd)
+        return (window["title"], window["process_id"]) if window is not None else None
+
+    def list_windows(self):
+        return [{"hwnd": hwnd, "title": window["title"], "process_id": window["process_id"], "rect": window["rect"]}
+                for hwnd, window in reversed(list(self.fake_windows.items()))]
+
+    def find_window(self, x, y, exclude=()):
+        for hwnd in reversed(list(self.fake_windows)):
+            if hwnd in exclude:
+                continue
+            window = self.fake_windows[hwnd]
+            left, top, width, height = window["rect"]
+            if left <= x < left + width and top <= y < top + height:
+                return {"hwnd": hwnd, "title": window["title"], "process_id": window["process_id"],
+                        "rect": window["rect"]}
+        return None
+
+    def watch(self, hwnd):
+        return self.notifications_enabled
+
+
+class WindowsWindowTracker(WindowTracker):
+    name = "windows"
+
+    def __init__(self, poll_interval=0.1, notified_poll_interval=1.0):
+        super().__init__(poll_interval, notified_poll_interval)
+        from ctypes import wintypes
+        self.wintypes = wintypes
+        self.user32 = ctypes.windll.user32
+        self.user32.SetWinEventHook.restype = wintypes.HANDLE
+        self.user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        try:
+            self.dwmapi = ctypes.windll.dwmapi
+        except OSError:
+            self.dwmapi = None
+        # 移动通知：每个目标进程一个钩子，process_id -> [钩子句柄, 引用数]；
+        # 钩子回调由设置钩子的线程（GUI 线程）的消息循环调用
+        self.hooks = {}
+        self.hook_processes = {}
+        win_event_proc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND, wintypes.LONG,
+                                            wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        self.hook_callback = win_event_proc(self.on_win_event)
+
+    def query_rect(self, hwnd):
+        if not self.user32.IsWindow(hwnd) or self.user32.IsIconic(hwnd):
+            return None
+        rect = self.wintypes.RECT()
+        if not self.user32.GetWindowRect(hwnd, ctypes.byref(rect)):
+            return None
+        return (rect.left, rect.top, rect.right - rect.left, rect.bottom - rect.top)
+
+    def window_info(self, hwnd):
+        if not self.user32.IsWindow(hwnd):
+            return None
+        length = self.user32.GetWindowTextLengthW(hwnd)
+        buffer = ctypes.create_unicode_buffer(length + 1)
+        self.user32.GetWindowTextW(hwnd, buffer, length + 1)
+        process_id = self.wintypes.DWORD()
+        self.user32.GetWindowThreadProcessId(hwnd, ctypes.byref(process_id))
+        return buffer.value, process_id.value
+
+    def is_cloaked(self, hwnd):
+        """是否为被 DWM 隐藏的窗口（如后台的 UWP 应用）"""
+        if self.dwmapi is None:
+            return False
+        cloaked = self.wintypes.DWORD()
+        result = self.dwmapi.DwmGetWindowAttribute(hwnd, DWMWA_CLOAKED, ctypes.byref(cloaked),
+                                                   ctypes.sizeof(cloaked))
+        return result == 0 and cloaked.value != 0
+
+    def find_window(self, x, y, exclude=()):
+        found = []
+
+        # EnumWindows 按 Z 序从上到下枚举顶层窗口
+        def callback(hwnd, lparam):
+            if hwnd in exclude or not self.user32.IsWindowVisible(hwnd) or self.is_cloaked(hwnd):
+                return True
+            rect = self.query_rect(hwnd)
+            if rect is None:
+                return True
+            left, top, width, height = rect
+            if left <= x < left + width and top <= y < top + height:
+                found.append((hwnd, rect))
+                return False
+            return True
+
+        enum_proc = ctypes.WINFUNCTYPE(self.wintypes.BOOL, self.wintypes.HWND, self.wintypes.LPARAM)
+        self.user32.EnumWindows(enum_proc(callback), 0)
+        if not found:
+            return None
+        hwnd, rect = found[0]
+        info = self.window_info(hwnd)
+        if info is None:
+            return None
+        return {"hwnd": hwnd, "title": info[0], "process_id": info[1], "rect": rect}
+
+    def list_windows(self):
+        hwnds = []
+
+        def callback(hwnd, lparam):
+            if self.user32.IsWindowVisible(hwnd) and not self.is_cloaked(hwnd):
+                hwnds.append(hwnd)
+            return True
+
+        enum_proc = ctypes.WINFUNCTYPE(self.wintypes.BOOL, self.wintypes.HWND, self.wintypes.LPARAM)
+        self.user32.EnumWindows(enum_proc(callback), 0)
+        windows = []
+        for hwnd in hwnds:
+            info = self.window_info(hwnd)
+            if info is not None:
+                windows.append({"hwnd": hwnd, "title": info[0], "process_id": info[1],
+                                "rect": self.query_rect(hwnd)})
+        return windows
+
+    def watch(self, hwnd):
+        info = self.window_info(hwnd)
+        if info is None or not info[1]:
+            return False
+        title, process_id = info
+        hook = self.hooks.get(process_id)
+        if hook is None:
+            handle = self.user32.SetWinEventHook(EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_LOCATIONCHANGE, None,
+                                                 self.hook_callback, process_id, 0,
+                                                 WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS)
+            if not handle:
+                print(f"设置窗口移动通知失败: {title}")
+                return False
+            hook = self.hooks[process_id] = [handle, 0]
+        hook[1] += 1
+        self.hook_processes[hwnd] = process_id
+        return True
+
+    def unwatch(self, hwnd):
+        process_id = self.hook_processes.pop(hwnd, None)
+        hook = self.hooks.get(process_id)
+        if hook is None:
+            return
+        hook[1] -= 1
+        if hook[1] <= 0:
+            self.user32.UnhookWinEvent(hook[0])
+            del self.hooks[process_id]
+
+    def on_win_event(self, hook, event, hwnd, id_object, id_child, thread_id, event_time):
+        """窗口移动或改变大小的通知（只处理窗口本身，忽略其中的控件）"""
+        if id_object == OBJID_WINDOW and id_child == CHILDID_SELF and hwnd:
+            self.notify(hwnd)
+
+
+class WindowAnchors:
+    def __init__(self, tracker, broker):
+        """初始化窗口锚定
+
+        Args:
+            tracker: 窗口跟踪器（WindowTracker）
+            broker: 捕获调度器（CaptureBroker 或 ProcessCaptureEngine），区域移动时调用其 update_region
+        """
+        self.tracker = tracker
+        self.broker = broker
+        self.lock = threading.Lock()
+        # 锚定的区域：token -> {"anchor", "region", "stats", "lost"}
+        self.anchors = {}
+
+    def add(self, token, anchor, region, stats=None):
+        """把已注册的区域锚定到目标窗口
+
+        Args:
+            token: 捕获调度器的订阅标识
+            anchor: 锚定信息，包含 hwnd, relative_x, relative_y（区域相对窗口左上角的偏移，物理像素）
+            region: 区域信息，宽高保持不变
+            stats: FrameStats 对象，提供时记录每帧分摊的跟随耗时
+        """
+        rect = self.tracker.track(anchor["hwnd"])
+        entry = {"anchor": anchor, "region": dict(region), "stats": stats, "lost": rect is None}
+        with self.lock:
+            self.anchors[token] = entry
+        if rect is not None:
+            self.move(token, entry, rect)
+
+    def remove(self, token):
+        """取消区域的锚定"""
+        with self.lock:
+            entry = self.anchors.pop(token, None)
+        if entry is not None:
+            self.tracker.untrack(entry["anchor"]["hwnd"])
+
+    def has_anchors(self):
+        """是否有锚定的区域"""
+        return bool(self.anchors)
+
+    def region(self, token):
+        """锚定区域的当前位置，未锚定时返回 None"""
+        entry = self.anchors.get(token)
+        return dict(entry["region"]) if entry is not None else None
+
+    def move(self, token, entry, rect):
+        """按窗口位置移动区域"""
+        anchor = entry["anchor"]
+        region = dict(entry["region"], x=rect[0] + anchor["relative_x"], y=rect[1] + anchor["relative_y"])
+        if region["x"] != entry["region"]["x"] or region["y"] != entry["region"]["y"]:
+            entry["region"] = region
+            self.broker.update_region(token, region)
+
+    def update(self, tokens=None):
+        """刷新目标窗口位置并移动锚定的区域（捕获线程在截图前调用）
+
+        Args:
+            tokens: 本次将要截图的订阅标识，跟随耗时分摊到其中锚定的区域各一帧
+
+        Returns:
+            float: 本次跟随耗时（秒）
+        """
+        if not self.anchors:
+            return 0.0
+        start = time.perf_counter()
+        changed = self.tracker.refresh(start)
+        with self.lock:
+            anchors = dict(self.anchors)
+        if changed:
+            for token, entry in anchors.items():
+                hwnd = entry["anchor"]["hwnd"]
+                if hwnd not in changed:
+                    continue
+                rect = changed[hwnd]
+                # 窗口关闭或最小化时保持原位置，恢复后继续跟随
+                entry["lost"] = rect is None
+                if rect is not None:
+                    self.move(token, entry, rect)
+        cost = time.perf_counter() - start
+
+        due = [entry for token, entry in anchors.items()
+               if entry["stats"] is not None and (tokens is None or token in tokens)]
+        for entry in due:
+            entry["stats"].record("track", cost / len(due))
+        return cost
+
+    def get_stats(self):
+        """获取窗口跟随统计
+
+        Returns:
+            dict: 包含 anchor_regions, anchor_lost（目标窗口已关闭或最小化的区域数）
+                以及 WindowTracker.get_stats 的各项
+        """
+        stats = self.tracker.get_stats()
+        stats["anchor_regions"] = len(self.anchors)
+        stats["anchor_lost"] = sum(1 for entry in list(self.anchors.values()) if entry["lost"])
+        return stats
+
+
+def make_anchor(target, region):
+    """根据目标窗口和区域生成锚定信息
+
+    Args:
+        target: find_window 返回的窗口信息
+        region: 区域信息（物理像素）
+
+    Returns:
+        dict: 包含 hwnd, title, process_id, relative_x, relative_y
+    """
+    x, y = target["rect"][:2]
+    return {
+        "hwnd": target["hwnd"],
+        "title": target["title"],
+        "process_id": target["process_id"],
+        "relative_x": region["x"] - x,
+        "relative_y": region["y"] - y
+    }
+
+
+def resolve_anchor(tracker, anchor):
+    """确认保存的锚定仍指向原来的目标窗口
+
+    窗口句柄在窗口关闭后可能被其他窗口重用，程序重启后目标窗口也可能重新创建：
+    句柄的标题和进程ID与保存的一致时直接使用；否则按标题和进程ID重新查找
+    （依次为标题和进程都相同、标题相同、同一进程的窗口），找到时更新句柄
+
+    Args:
+        tracker: 窗口跟踪器（WindowTracker）
+        anchor: 保存的锚定信息，见 make_anchor
+
+    Returns:
+        dict: 可用的锚定信息，找不到目标窗口时返回 None
+    """
+    title = anchor.get("title", "")
+    process_id = anchor.get("process_id", 0)
+    if tracker.window_info(anchor["hwnd"]) == (title, process_id):
+        return anchor
+    windows = tracker.list_windows()
+    candidates = ([window for window in windows if window["title"] == title and window["process_id"] == process_id],
+                  [window for window in windows if title and window["title"] == title],
+                  [window for window in windows if process_id and window["process_id"] == process_id])
+    for matches in candidates:
+        if matches:
+            target = matches[0]
+            return dict(anchor, hwnd=target["hwnd"], title=target["title"], process_id=target["process_id"])
+    return None
+
+
+# 内置后端：名称 -> "模块:类名"
+TRACKER_BACKENDS = {
+    "windows": "window_tracker:WindowsWindowTracker",
+    "fake": "window_tracker:FakeWindowTracker",
+}
+
+
+def default_tracker_backend():
+    """当前平台的默认窗口跟踪器后端名称"""
+    return "windows" if sys.platform == "win32" else "fake"
+
+
+def create_window_tracker(name=None, **options):
+    """按名称创建窗口跟踪器
+
+    Args:
+        name: 后端名称，为 None 时使用当前平台的默认后端
+        options: 传给后端构造函数的参数
+
+    Returns:
+        WindowTracker: 窗口跟踪器实例
+
+    Raises:
+        ValueError: 后端未注册
+    """
+    name = name or default_tracker_backend()
+    if name not in TRACKER_BACKENDS:
+        raise ValueError(f"未知的窗口跟踪器后端: {name}，可用后端: {', '.join(sorted(TRACKER_BACKENDS))}")
+    backend = TRACKER_BACKENDS[name]
+    if isinstance(backend, str):
+        module_name, class_name = backend.split(":")
+        backend = getattr(importlib.import_module(module_name), class_name)
+    return backend(**options)